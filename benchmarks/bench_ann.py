@@ -0,0 +1,87 @@
+# benchmarks/bench_ann.py
+#
+# recall@k vs query latency vs index memory for the index types in
+# vector_store.INDEX_TYPES, on a synthetic clustered corpus of normalized
+# 384-d vectors (the shape of multi-qa-MiniLM-L6-cos-v1 embeddings).
+# Ground truth comes from exact inner-product search.
+#
+# Run from the project root (1M vectors needs ~4 GB RAM; use --n to scale down):
+#   python -m benchmarks.bench_ann --n 1000000 --types flat_ip ivf_flat hnsw ivf_pq
+
+import argparse
+import time
+
+import faiss  # type: ignore
+import numpy as np
+
+from src.rag_pipeline.vector_store import INDEX_TYPES, build_index
+
+# Query-time settings swept per index type
+SWEEPS = {
+    "flat_l2": [None],
+    "flat_ip": [None],
+    "ivf_flat": [("nprobe", v) for v in (1, 4, 16, 64)],
+    "ivf_pq": [("nprobe", v) for v in (1, 4, 16, 64)],
+    "hnsw": [("efSearch", v) for v in (16, 32, 64, 128)],
+}
+
+
+def synthetic_corpus(n: int, dim: int, n_queries: int, seed: int = 0) -> tuple:
+    """Clustered unit vectors (topics) and queries drawn near existing vectors."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(n // 1000, 16), dim), dtype=np.float32)
+    data = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, 100_000):
+        stop = min(start + 100_000, n)
+        assign = rng.integers(0, len(centers), stop - start)
+        data[start:stop] = centers[assign] + 0.6 * rng.standard_normal((stop - start, dim), dtype=np.float32)
+    faiss.normalize_L2(data)
+    queries = data[rng.choice(n, n_queries, replace=False)] + 0.1 * rng.standard_normal((n_queries, dim), dtype=np.float32)
+    faiss.normalize_L2(queries)
+    return data, queries
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ANN index types")
+    parser.add_argument("--n", type=int, default=1_000_000, help="corpus size")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=["flat_ip", "ivf_flat", "hnsw", "ivf_pq"])
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    data, queries = synthetic_corpus(args.n, args.dim, args.queries)
+    print(f"generated {args.n} x {args.dim} corpus in {time.perf_counter() - start:.1f}s")
+
+    exact = faiss.IndexFlatIP(args.dim)
+    exact.add(data)
+    _, truth = exact.search(queries, args.k)
+    del exact
+
+    print(f"\n{'index':<9} {'param':<13} {'build s':>8} {'recall@' + str(args.k):>9} "
+          f"{'ms/query':>9} {'memory MB':>10}")
+    for index_type in args.types:
+        start = time.perf_counter()
+        index = build_index(data, index_type)
+        build_s = time.perf_counter() - start
+        memory_mb = faiss.serialize_index(index).nbytes / 1e6
+
+        for setting in SWEEPS[index_type]:
+            label = "-"
+            if setting:
+                faiss.ParameterSpace().set_index_parameter(index, *setting)
+                label = f"{setting[0]}={setting[1]}"
+            start = time.perf_counter()
+            for q in queries:  # one query at a time, like the chatbot
+                index.search(q[None, :], args.k)
+            ms_per_query = (time.perf_counter() - start) * 1000 / len(queries)
+            _, found = index.search(queries, args.k)
+            print(f"{index_type:<9} {label:<13} {build_s:8.1f} {recall_at_k(found, truth):9.3f} "
+                  f"{ms_per_query:9.3f} {memory_mb:10.1f}")
+        del index
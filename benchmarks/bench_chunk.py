@@ -0,0 +1,86 @@
+# benchmarks/bench_chunk.py
+#
+# Chunking throughput (MB/s, chunks/s) on the policy PDF text and on a
+# synthetic document 10x its size:
+#   legacy       the previous chunk_text (per-section re.sub + split/join,
+#                always writes the chunks JSON)
+#   words        chunk_text(max_words=500), nothing written
+#   words+ovl    chunk_text(max_words=500, overlap=50)
+#   tokens       chunk_text(max_tokens=256, overlap=32) measured with the
+#                embedding model's tokenizer (skipped if it can't be loaded)
+#
+# Run from the project root:
+#   python -m benchmarks.bench_chunk --tokenizer multi-qa-MiniLM-L6-cos-v1
+
+import argparse
+import json
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import policy_text
+from src.pdf_processing.chunk_text import chunk_text, load_tokenizer, token_counter
+from src.pdf_processing.extract_text import extract_pdf_text
+
+PDF_PATH = Path("data/input/information_security_policy_v4.0.pdf")
+
+
+def legacy_chunk_text(text: str, output_path: Path, max_words: int = 500) -> list:
+    """The previous implementation, kept here as the baseline."""
+    matches = list(re.finditer(r'(\d+(\.\d+){0,2})\s+([^\n]+)', text))
+    chunks = []
+    for i, match in enumerate(matches):
+        section_num, title = match.group(1), match.group(3).strip()
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        section_text = re.sub(r'page\s*\d+\s*of\s*\d+', '', text[match.end():end], flags=re.IGNORECASE)
+        section_text = re.sub(r'\n+', ' ', section_text).strip() or "[No text extracted]"
+        words = section_text.split()
+        if len(words) > max_words:
+            for j in range(0, len(words), max_words):
+                chunks.append({"section": section_num, "title": title, "text": " ".join(words[j:j + max_words])})
+        else:
+            chunks.append({"section": section_num, "title": title, "text": section_text})
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(chunks, f, indent=2, ensure_ascii=False)
+    return chunks
+
+
+def measure(fn, text: str, repeat: int) -> tuple:
+    best, chunks = float("inf"), []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best, len(chunks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark text chunking")
+    parser.add_argument("--tokenizer", default="multi-qa-MiniLM-L6-cos-v1")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = extract_pdf_text(PDF_PATH)
+    n_words = len(text.split())
+    documents = {"policy": text, "synthetic x10": policy_text(10 * n_words)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        variants = {
+            "legacy": lambda t: legacy_chunk_text(t, Path(tmp) / "chunks.json"),
+            "words": lambda t: chunk_text(t, max_words=500),
+            "words+ovl": lambda t: chunk_text(t, max_words=500, overlap=50),
+        }
+        try:
+            count_tokens = token_counter(load_tokenizer(args.tokenizer))
+            variants["tokens"] = lambda t: chunk_text(t, max_tokens=256, overlap=32, count_tokens=count_tokens)
+        except Exception as e:
+            print(f"Tokenizer {args.tokenizer} unavailable, skipping token-aware run: {e}")
+
+        for name, doc in documents.items():
+            mb = len(doc.encode("utf-8")) / 1e6
+            print(f"\n{name}: {len(doc.split())} words, {mb:.2f} MB")
+            for label, fn in variants.items():
+                seconds, n_chunks = measure(fn, doc, args.repeat)
+                print(f"  {label:<10} {seconds * 1000:8.1f} ms  {mb / seconds:7.1f} MB/s  "
+                      f"{n_chunks:6d} chunks  {n_chunks / seconds:9.0f} chunks/s")
@@ -0,0 +1,74 @@
+# benchmarks/bench_chunk_store.py
+#
+# Chunk lookup cost for the indent=2 JSON (json.load + dict table, the
+# previous query path) vs the memory-mapped binary ChunkStore, on the real
+# chunks replicated 1x/10x/100x: open time, RSS added by opening, and the
+# latency of fetching 20 chunks by FAISS id (one query's worth of hits).
+# Each measurement runs in a fresh interpreter.
+#
+# Run from the project root:
+#   python -m benchmarks.bench_chunk_store --scales 1 10 100
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.rag_pipeline.chunk_store import ChunkStore, store_path_for, write_chunk_store
+
+CHUNKS_PATH = "data/knowledge_base/chunks_structured.json"
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4096 / 1e6
+
+
+def run_one(path: Path) -> dict:
+    before = rss_mb()
+    start = time.perf_counter()
+    if path.suffix == ".json":
+        with open(path, 'r', encoding='utf-8') as f:
+            table = dict(enumerate(json.load(f)))
+    else:
+        table = ChunkStore(path)
+    open_ms = (time.perf_counter() - start) * 1000
+    rss = rss_mb() - before
+
+    ids = random.Random(0).sample(range(len(table)), 20)
+    start = time.perf_counter()
+    for _ in range(1000):
+        hits = [table.get(i)["text"] for i in ids]
+    lookup_us = (time.perf_counter() - start) * 1e6 / 1000
+    return {"open_ms": open_ms, "rss_mb": rss, "lookup_us": lookup_us, "n": len(table), "hits": len(hits)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the binary chunk store")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_one(Path(args.run_one))))
+    else:
+        with open(CHUNKS_PATH, 'r', encoding='utf-8') as f:
+            chunks = json.load(f)
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"{'scale':>5} {'chunks':>8} {'format':<7} {'file MB':>8} {'open ms':>9} "
+                  f"{'+RSS MB':>8} {'20 hits us':>11}")
+            for scale in args.scales:
+                json_path = Path(tmp) / f"chunks_x{scale}.json"
+                with open(json_path, 'w', encoding='utf-8') as f:
+                    json.dump(chunks * scale, f, indent=2, ensure_ascii=False)
+                store_path = write_chunk_store(chunks * scale, store_path_for(json_path))
+                for label, path in (("json", json_path), ("store", store_path)):
+                    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_chunk_store", "--run-one", str(path)],
+                                         capture_output=True, text=True, check=True)
+                    r = json.loads(out.stdout.strip().splitlines()[-1])
+                    print(f"{scale:>5} {r['n']:>8} {label:<7} {path.stat().st_size / 1e6:8.1f} {r['open_ms']:9.1f} "
+                          f"{r['rss_mb']:8.1f} {r['lookup_us']:11.1f}")
@@ -0,0 +1,55 @@
+# benchmarks/bench_embed.py
+#
+# Embedding throughput (chunks/sec) of EmbeddingService across batch sizes,
+# worker processes and CPU backends (torch, int8, onnx), without the
+# embedding cache. "unsorted" is the previous path: one encode call over the
+# chunks in document order with a freshly constructed model.
+# Pool start-up and model loading are excluded (one warm-up batch first).
+#
+# Run from the project root:
+#   python -m benchmarks.bench_embed --batch-sizes 16 32 64 128 --workers 1 2 4 --backends torch int8
+
+import argparse
+import json
+import time
+
+from src.rag_pipeline.embedding_service import EMBEDDING_MODEL_NAME, EmbeddingService
+
+CHUNKS_PATH = "data/knowledge_base/chunks_structured.json"
+
+
+def unsorted_baseline(texts: list) -> float:
+    from sentence_transformers import SentenceTransformer  # type: ignore
+    start = time.perf_counter()
+    SentenceTransformer(EMBEDDING_MODEL_NAME).encode(texts, show_progress_bar=False)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark embedding generation")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 32, 64, 128])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8"])
+    parser.add_argument("--repeat", type=int, default=1, help="copies of the chunk list to encode")
+    args = parser.parse_args()
+
+    with open(CHUNKS_PATH, "r", encoding="utf-8") as f:
+        texts = [c["text"] for c in json.load(f)] * args.repeat
+    print(f"{len(texts)} chunks, model {EMBEDDING_MODEL_NAME}")
+
+    seconds = unsorted_baseline(texts)
+    print(f"{'unsorted':<8} {'-':>6} {'-':>8} {len(texts) / seconds:10.1f} chunks/s  (includes model load)")
+
+    for backend in args.backends:
+        for workers in args.workers:
+            for batch_size in args.batch_sizes:
+                try:
+                    with EmbeddingService(backend=backend, batch_size=batch_size, workers=workers) as service:
+                        service.encode(texts[:batch_size * workers])
+                        start = time.perf_counter()
+                        service.encode(texts)
+                        seconds = time.perf_counter() - start
+                except Exception as e:
+                    print(f"{backend:<8} unavailable: {e}")
+                    break
+                print(f"{backend:<8} {workers:>6} {batch_size:>8} {len(texts) / seconds:10.1f} chunks/s")
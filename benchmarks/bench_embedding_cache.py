@@ -0,0 +1,54 @@
+# benchmarks/bench_embedding_cache.py
+#
+# Knowledge-base embedding builds with the persistent embedding cache:
+#   cold     empty cache, every chunk is encoded
+#   warm     same chunks again, nothing is encoded
+#   revised  a fraction of chunks edited (a policy revision), only those are encoded
+#
+# Run from the project root:
+#   python -m benchmarks.bench_embedding_cache --revised-fraction 0.05
+
+import argparse
+import json
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from src.rag_pipeline.embedding_cache import get_embedding_cache
+from src.rag_pipeline.embeddings import EMBEDDING_MODEL_NAME, generate_embeddings
+
+CHUNKS_PATH = "data/knowledge_base/chunks_structured.json"
+
+
+def timed_build(label: str, chunks: list, cache_dir: str) -> np.ndarray:
+    cache = get_embedding_cache(EMBEDDING_MODEL_NAME, cache_dir)
+    before = cache.stats()
+    start = time.perf_counter()
+    embeddings = generate_embeddings(chunks, cache_dir=cache_dir)
+    elapsed = time.perf_counter() - start
+    after = cache.stats()
+    hits = after["hits"] - before["hits"]
+    saved = after["estimated_seconds_saved"] - before["estimated_seconds_saved"]
+    print(f"{label:<8} {elapsed:7.2f}s  hit rate={hits / len(chunks):6.1%}  saved~{saved:6.2f}s")
+    return embeddings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the persistent embedding cache")
+    parser.add_argument("--revised-fraction", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with open(CHUNKS_PATH, "r", encoding="utf-8") as f:
+        chunks = json.load(f)
+
+    revised = [dict(c) for c in chunks]
+    for c in random.Random(0).sample(revised, max(1, int(len(revised) * args.revised_fraction))):
+        c["text"] += " (revised)"
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold = timed_build("cold", chunks, cache_dir)
+        warm = timed_build("warm", chunks, cache_dir)
+        timed_build("revised", revised, cache_dir)
+        print(f"warm vectors identical to cold: {np.array_equal(cold, warm)}")
@@ -0,0 +1,67 @@
+# benchmarks/bench_extract.py
+#
+# PDF extraction throughput (pages/sec) and peak RSS on a generated
+# multi-hundred-page policy PDF:
+#   legacy       the original whole-document loop (text += page_text)
+#   workers=N    extract_pdf_text with page ranges split over N processes
+# Each configuration runs in a fresh interpreter so peak RSS is not shared.
+#
+# Run from the project root:
+#   python -m benchmarks.bench_extract --pages 400 --workers 1 2 4
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def legacy_extract(pdf_path: Path) -> str:
+    """The pre-streaming implementation (quadratic string building, whole document in memory)."""
+    import pdfplumber
+    text = ""
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            page_text = page.extract_text()
+            if page_text:
+                text += page_text + "\n"
+    return text
+
+
+def run_one(pdf_path: Path, workers: int) -> dict:
+    from src.pdf_processing.extract_text import count_pages, extract_pdf_text
+    start = time.perf_counter()
+    text = legacy_extract(pdf_path) if workers == 0 else extract_pdf_text(pdf_path, workers=workers)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is KiB on Linux; children covers the worker processes
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return {"workers": workers, "seconds": elapsed, "pages_per_sec": count_pages(pdf_path) / elapsed,
+            "peak_rss_mb": own, "peak_child_rss_mb": children, "chars": len(text)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark PDF extraction")
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--run-one", nargs=2, metavar=("PDF", "WORKERS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_one(Path(args.run_one[0]), int(args.run_one[1]))))
+    else:
+        from benchmarks.synthetic import write_policy_pdf
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_path = write_policy_pdf(Path(tmp) / "policy.pdf", args.pages)
+            print(f"{args.pages}-page PDF, {pdf_path.stat().st_size / 1e6:.1f} MB")
+            for workers in [0] + args.workers:
+                out = subprocess.run([sys.executable, "-m", "benchmarks.bench_extract",
+                                      "--run-one", str(pdf_path), str(workers)],
+                                     capture_output=True, text=True, check=True)
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                label = "legacy" if workers == 0 else f"workers={workers}"
+                print(f"{label:<10} {r['pages_per_sec']:7.1f} pages/s  {r['seconds']:6.1f}s  "
+                      f"peak RSS {r['peak_rss_mb']:6.0f} MB (largest worker {r['peak_child_rss_mb']:4.0f} MB)")
@@ -0,0 +1,38 @@
+# benchmarks/bench_ingest.py
+#
+# Multi-document ingest throughput (pages/sec) as the extraction worker count grows.
+# Generates a directory of synthetic policy PDFs, then runs ingest_directory once
+# per worker count into a fresh corpus directory.
+#
+# Run from the project root:
+#   python -m benchmarks.bench_ingest --documents 24 --pages 40 --workers 1 2 4 8
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from benchmarks.synthetic import write_policy_pdf
+from src.rag_pipeline.corpus import ingest_directory
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sharded corpus ingestion")
+    parser.add_argument("--documents", type=int, default=24)
+    parser.add_argument("--pages", type=int, default=40, help="pages per document")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_dir = Path(tmp) / "pdfs"
+        for i in range(args.documents):
+            write_policy_pdf(input_dir / f"policy_{i:03d}.pdf", args.pages, seed=i)
+
+        rows = []
+        for workers in args.workers:
+            stats = ingest_directory(input_dir, Path(tmp) / f"corpus_{workers}", workers=workers)
+            rows.append(stats)
+
+    print(f"\n{args.documents} documents x {args.pages} pages")
+    base = rows[0]["extract_pages_per_sec"]
+    for stats in rows:
+        print(f"workers={stats['workers']:<3} extract {stats['extract_pages_per_sec']:7.1f} pages/s "
+              f"({stats['extract_pages_per_sec'] / base:4.1f}x)  end-to-end {stats['total_seconds']:6.1f}s")
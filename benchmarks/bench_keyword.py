@@ -0,0 +1,72 @@
+# benchmarks/bench_keyword.py
+#
+# Keyword fallback search: the previous linear scan (json.load + lowercase
+# substring match of the whole query against every chunk, on every query)
+# vs the BM25 inverted index (built once, resident), on the real chunks and
+# on the chunks replicated 100x.
+#
+# Run from the project root:
+#   python -m benchmarks.bench_keyword --scales 1 100
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from src.rag_pipeline.keyword_index import KeywordIndex
+
+CHUNKS_PATH = "data/knowledge_base/chunks_structured.json"
+QUERIES = [
+    "password", "encryption", "access control", "incident", "backup", "firewall",
+    "antivirus", "third party", "audit logs", "remote access", "clean desk", "patch management",
+]
+
+
+def linear_scan(query: str, chunks_path: Path) -> list:
+    """The previous scan_chunk_records."""
+    with open(chunks_path, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    q_lower = query.lower()
+    return [c for c in chunks
+            if c.get("text", "").strip() != "[No text extracted]"
+            and (q_lower in c.get("text", "").lower() or q_lower in c.get("title", "").lower())]
+
+
+def per_query_ms(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in QUERIES:
+            fn(query)
+    return (time.perf_counter() - start) * 1000 / (repeat * len(QUERIES))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark keyword search")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(CHUNKS_PATH, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            corpus = chunks * scale
+            chunks_path = Path(tmp) / f"chunks_x{scale}.json"
+            with open(chunks_path, 'w', encoding='utf-8') as f:
+                json.dump(corpus, f, indent=2, ensure_ascii=False)
+
+            start = time.perf_counter()
+            index = KeywordIndex.build(enumerate(corpus))
+            build_s = time.perf_counter() - start
+            index_path = index.save(Path(tmp) / f"index_x{scale}.bm25")
+
+            scan_ms = per_query_ms(lambda q: linear_scan(q, chunks_path), args.repeat)
+            bm25_ms = per_query_ms(lambda q: index.search(q, 20), args.repeat * 10)
+            scan_hits = sum(len(linear_scan(q, chunks_path)) > 0 for q in QUERIES)
+            bm25_hits = sum(len(index.search(q, 20)) > 0 for q in QUERIES)
+            print(f"x{scale}: {len(corpus)} chunks, BM25 build {build_s:.2f}s, "
+                  f"index {index_path.stat().st_size / 1e6:.1f} MB")
+            print(f"  linear scan {scan_ms:9.2f} ms/query  ({scan_hits}/{len(QUERIES)} queries with hits, unranked)")
+            print(f"  bm25        {bm25_ms:9.2f} ms/query  ({bm25_hits}/{len(QUERIES)} queries with hits, top 20 ranked)")
@@ -0,0 +1,86 @@
+# benchmarks/bench_mapping.py
+#
+# Compliance-mapping lookups: the previous linear analyze_compliance (walk the
+# mappings list for the section, then one `desc in response.lower()` per
+# clause) vs the compiled MappingIndex, on synthetic mappings with thousands
+# of sections and tens of thousands of clauses. Checks both give identical
+# results.
+#
+# Run from the project root:
+#   python -m benchmarks.bench_mapping --sections 100 1000 5000 --clauses 8
+
+import argparse
+import random
+import time
+
+from benchmarks.synthetic import VOCABULARY, policy_text
+from src.compliance_analysis.mapping_index import MappingIndex
+
+
+def synthetic_mappings(n_sections: int, clauses_per_section: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    mappings = []
+    for s in range(n_sections):
+        def clauses(prefix):
+            return [{"clause": f"{prefix}{s}.{c}",
+                     "description": " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(2, 5)))}
+                    for c in range(clauses_per_section // 2)]
+        mappings.append({"policy_section": f"{s // 50 + 1}.{s % 50 + 1} Section {s}",
+                         "pci_dss": clauses("PCI "), "iso_27001": clauses("A.")})
+    return mappings
+
+
+def linear_analyze(response: str, section: str, mappings: list):
+    """The previous analyze_compliance."""
+    for mapping in mappings:
+        if mapping.get("policy_section", "").startswith(section):
+            pci_dss = mapping.get("pci_dss", [])
+            iso_27001 = mapping.get("iso_27001", [])
+            pci_gaps, iso_gaps, gaps = [], [], []
+            for label, clauses, out in (("PCI-DSS", pci_dss, pci_gaps), ("ISO 27001", iso_27001, iso_gaps)):
+                for clause in clauses:
+                    desc = clause.get("description", "").lower()
+                    if desc and desc not in response.lower():
+                        gap_text = f"{label} {clause['clause']}: Missing {clause['description']}"
+                        gaps.append(gap_text)
+                        out.append(gap_text)
+            if not gaps:
+                status = "Compliant"
+            elif len(gaps) < (len(pci_dss) + len(iso_27001)):
+                status = "Partially Compliant"
+            else:
+                status = "Non-Compliant"
+            return status, gaps, pci_gaps, iso_gaps
+    return "Unknown", ["Section not found in compliance mapping"], [], []
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark compliance-mapping analysis")
+    parser.add_argument("--sections", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--clauses", type=int, default=8, help="clauses per section (half PCI-DSS, half ISO)")
+    parser.add_argument("--lookups", type=int, default=200, help="(response, section) pairs per run")
+    parser.add_argument("--response-words", type=int, default=300)
+    args = parser.parse_args()
+
+    for n_sections in args.sections:
+        mappings = synthetic_mappings(n_sections, args.clauses)
+        rng = random.Random(1)
+        picks = [rng.randrange(n_sections) for _ in range(args.lookups)]
+        sections = [mappings[i]["policy_section"].partition(" ")[0] for i in picks]
+        responses = [policy_text(args.response_words, seed=i) for i in range(args.lookups)]
+
+        start = time.perf_counter()
+        index = MappingIndex(mappings)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        old = [linear_analyze(r, s, mappings) for r, s in zip(responses, sections)]
+        linear_ms = (time.perf_counter() - start) * 1000 / args.lookups
+        start = time.perf_counter()
+        new = [index.analyze(r, s) for r, s in zip(responses, sections)]
+        index_ms = (time.perf_counter() - start) * 1000 / args.lookups
+
+        assert old == new, "MappingIndex results differ from the linear analysis"
+        print(f"{n_sections} sections, {n_sections * args.clauses} clauses: index build {build_ms:.0f} ms")
+        print(f"  linear   {linear_ms:8.3f} ms/lookup")
+        print(f"  compiled {index_ms:8.3f} ms/lookup  ({linear_ms / index_ms:.1f}x, results identical)")
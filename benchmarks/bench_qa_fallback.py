@@ -0,0 +1,107 @@
+# benchmarks/bench_qa_fallback.py
+#
+# Hugging Face QA fallback under a simulated LLM outage: N client threads
+# send questions back to back and every one lands on the fallback. Compares
+# the previous per-request path (first chunk only, truncated, no
+# inference_mode) with QAFallbackEngine (micro-batched, length-grouped
+# forward passes), in fp32 and dynamic int8, reading the top chunk only (the
+# same text budget as before) and the top QA_TOP_CHUNKS chunks in full.
+# Reports QPS and latency percentiles. Context chunks come from the BM25
+# index, so no encoder is needed.
+#
+# Run from the project root:
+#   python -m benchmarks.bench_qa_fallback --clients 1 8 --requests 64
+#   (--model takes a local model directory when the hub is not reachable)
+
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+
+from src.rag_pipeline.keyword_index import KeywordIndex
+from src.rag_pipeline.qa_fallback import QA_MODEL_NAME, QA_TOP_CHUNKS, QAFallbackEngine, load_qa_model
+
+CHUNKS_PATH = "data/knowledge_base/chunks_structured.json"
+QUESTIONS = [
+    "How are passwords managed?", "What is the access control policy?", "How is data encrypted?",
+    "What is the incident response procedure?", "How often are vulnerabilities scanned?",
+    "How are backups performed?", "Who approves remote access?", "How long are logs retained?",
+]
+
+
+def legacy_answer(tokenizer, model, question: str, chunks: list):
+    """The previous _hf_answer: first chunk cut to 300 words, one request per forward pass."""
+    context = " ".join(chunks[0].split()[:300])
+    inputs = tokenizer(question, context, return_tensors="pt", truncation=True, max_length=512)
+    outputs = model(**{name: inputs[name] for name in tokenizer.model_input_names if name in inputs})
+    start_idx = outputs.start_logits.argmax().item()
+    end_idx = outputs.end_logits.argmax().item()
+    if 0 <= start_idx <= end_idx < len(inputs.input_ids[0]):
+        return tokenizer.decode(inputs.input_ids[0, start_idx:end_idx + 1])
+    return None
+
+
+def run_load(answer, workload: list, clients: int) -> tuple:
+    """Closed-loop load: `clients` threads share the workload; returns (seconds, per-request latencies)."""
+    latencies, position, lock = [], [0], threading.Lock()
+
+    def client():
+        while True:
+            with lock:
+                if position[0] == len(workload):
+                    return
+                question, chunks = workload[position[0]]
+                position[0] += 1
+            start = time.perf_counter()
+            answer(question, chunks)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the QA fallback under outage load")
+    parser.add_argument("--model", default=QA_MODEL_NAME)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--requests", type=int, default=64)
+    args = parser.parse_args()
+
+    with open(CHUNKS_PATH, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    keyword_index = KeywordIndex.build(enumerate(chunks))
+    workload = []
+    for i in range(args.requests):
+        question = QUESTIONS[i % len(QUESTIONS)]
+        hits = keyword_index.search(question, QA_TOP_CHUNKS) or [(0, 0.0)]
+        workload.append((question, [chunks[faiss_id]["text"] for faiss_id, _ in hits]))
+
+    tokenizer, model = load_qa_model(args.model)
+    configs = [("legacy (per request)", lambda q, c: legacy_answer(tokenizer, model, q, c), None)]
+    models = {"fp32": (tokenizer, model), "int8": load_qa_model(args.model, quantize=True)}
+    for top_chunks in (1, QA_TOP_CHUNKS):
+        for precision, (qa_tokenizer, qa_model) in models.items():
+            engine = QAFallbackEngine(qa_tokenizer, qa_model, top_chunks=top_chunks)
+            configs.append((f"batched {precision} top {top_chunks}", engine.answer, engine))
+
+    for label, answer, _ in configs:
+        answer(*workload[0])  # warm up
+    print(f"{args.requests} requests")
+    for clients in args.clients:
+        for label, answer, _ in configs:
+            seconds, latencies = run_load(answer, workload, clients)
+            p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+            print(f"clients={clients:<3} {label:<22} {len(workload) / seconds:7.1f} QPS  "
+                  f"p50 {p50:7.0f} ms  p95 {p95:7.0f} ms")
+    for _, _, running in configs:
+        if running is not None:
+            running.close()
@@ -0,0 +1,51 @@
+# benchmarks/bench_report.py
+#
+# Sequential vs concurrent generate_report against a local stub LLM.
+# Checks that every mode writes a byte-identical report (deterministic order).
+# Also times the direct evidence mode (no LLM) and its gaps-only LLM pass.
+#
+# Run from the project root:
+#   python -m benchmarks.bench_report --llm-latency 0.5 --concurrency 1 4 10
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.stub_llm import StubChatModel
+from src.compliance_analysis.report_generator import generate_report
+from src.rag_pipeline import query_engine
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent report generation")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="stub LLM latency in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 10])
+    args = parser.parse_args()
+
+    query_engine.set_llm(StubChatModel(latency=args.llm_latency))
+    query_engine.set_answer_cache(None)  # every mode must pay for its LLM calls
+    query_engine.warm_up()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.concurrency:
+            output = Path(tmp) / f"report_{workers}.md"
+            start = time.perf_counter()
+            generate_report(str(output), concurrency=workers)
+            results[workers] = (time.perf_counter() - start, output.read_text(encoding="utf-8"))
+
+        evidence = {}
+        for label, summarize in (("evidence", False), ("evidence + gap summaries", True)):
+            output = Path(tmp) / "report_evidence.md"
+            start = time.perf_counter()
+            generate_report(str(output), concurrency=args.concurrency[-1], report_mode="evidence",
+                            summarize=summarize)
+            evidence[label] = (time.perf_counter() - start, output.read_text(encoding="utf-8").count("Missing "))
+
+    baseline_s, baseline_report = results[args.concurrency[0]]
+    print(f"\nstub LLM latency: {args.llm_latency:.2f}s per call")
+    for workers, (seconds, report) in results.items():
+        same = "identical" if report == baseline_report else "DIFFERENT"
+        print(f"concurrency={workers:<3} {seconds:6.2f}s  speedup={baseline_s / seconds:5.1f}x  report {same}")
+    for label, (seconds, n_gaps) in evidence.items():
+        print(f"{label:<26} {seconds:6.2f}s  speedup={baseline_s / seconds:5.1f}x  {n_gaps} gaps")
@@ -0,0 +1,75 @@
+# benchmarks/bench_retrieval.py
+#
+# Before/after latency of retrieve_chunks.
+#   "before": the original per-call path (json.load + faiss.read_index + new SentenceTransformer)
+#   "after":  the resident Retriever (loaded once, mtime-checked on each query)
+#
+# Run from the project root:
+#   python -m benchmarks.bench_retrieval --repeat 3
+
+import argparse
+import json
+import statistics
+import time
+
+import faiss
+from sentence_transformers import SentenceTransformer
+
+from src.rag_pipeline.query_engine import enhance_query, retrieve_chunks
+from src.rag_pipeline.retriever import QUERY_MODEL_NAME
+
+INDEX_PATH = "data/knowledge_base/index.faiss"
+CHUNKS_PATH = "data/knowledge_base/chunks_structured.json"
+
+QUERIES = [
+    "What are the access control policies?",
+    "How does the policy address encryption?",
+    "What are the vulnerability management procedures?",
+    "What is the incident response plan?",
+    "How are passwords managed?",
+]
+
+
+def retrieve_chunks_cold(query: str, index_path: str, chunks_path: str, top_k: int = 20) -> list:
+    """The pre-Retriever implementation: reload everything on every call."""
+    with open(chunks_path, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    index = faiss.read_index(index_path)
+    model = SentenceTransformer(QUERY_MODEL_NAME)
+    q_embed = model.encode([enhance_query(query)], show_progress_bar=False, normalize_embeddings=True)
+    _, indices = index.search(q_embed, top_k)
+    return [chunks[i]["text"] for i in indices[0] if 0 <= i < len(chunks)]
+
+
+def time_calls(fn, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        for q in QUERIES:
+            start = time.perf_counter()
+            fn(q, INDEX_PATH, CHUNKS_PATH)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(label: str, timings: list):
+    print(f"{label:<8} n={len(timings):<4} mean={statistics.mean(timings):8.1f} ms  "
+          f"median={statistics.median(timings):8.1f} ms  max={max(timings):8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark retrieve_chunks latency")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the query set")
+    args = parser.parse_args()
+
+    before = time_calls(retrieve_chunks_cold, args.repeat)
+
+    # First resident call pays the one-time load; report it separately
+    start = time.perf_counter()
+    retrieve_chunks(QUERIES[0], INDEX_PATH, CHUNKS_PATH)
+    first_ms = (time.perf_counter() - start) * 1000
+    after = time_calls(retrieve_chunks, args.repeat)
+
+    summarize("before", before)
+    print(f"after    first call (load) = {first_ms:.1f} ms")
+    summarize("after", after)
+    print(f"speedup (median): {statistics.median(before) / statistics.median(after):.1f}x")
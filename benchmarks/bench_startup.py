@@ -0,0 +1,63 @@
+# benchmarks/bench_startup.py
+#
+# Cold-start profile of the query engine:
+#   - import time of src.rag_pipeline.query_engine (fresh interpreter)
+#   - first and second query latency with a stub LLM
+#   - proof that the Hugging Face QA model is only loaded once the LLM path fails
+#
+# Run from the project root:
+#   python -m benchmarks.bench_startup
+
+import argparse
+import subprocess
+import sys
+import time
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); "
+    "import src.rag_pipeline.query_engine; "
+    "print((time.perf_counter() - t) * 1000)"
+)
+
+
+def measure_import_ms(runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET],
+                             capture_output=True, text=True, check=True)
+        timings.append(float(out.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark query engine cold start")
+    parser.add_argument("--import-runs", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="stub LLM latency in seconds")
+    args = parser.parse_args()
+
+    import_ms = measure_import_ms(args.import_runs)
+    print(f"import query_engine: min={min(import_ms):.0f} ms  max={max(import_ms):.0f} ms")
+
+    from benchmarks.stub_llm import StubChatModel
+    from src.rag_pipeline import query_engine
+
+    query_engine.set_llm(StubChatModel(latency=args.llm_latency))
+    query_engine.set_answer_cache(None)  # measure the model path, not cache hits
+    query = "What are the access control policies?"
+
+    _, first_ms = timed(query_engine.query_knowledge_base, query)
+    _, second_ms = timed(query_engine.query_knowledge_base, query)
+    print(f"first query:  {first_ms:.0f} ms (loads encoder, index, chunks)")
+    print(f"second query: {second_ms:.0f} ms")
+    print(f"HF QA model loaded after LLM path succeeded: {query_engine.is_loaded('hf_qa')}")
+
+    query_engine.set_llm(StubChatModel(fail=True))
+    _, fallback_ms = timed(query_engine.query_knowledge_base, query)
+    print(f"query with failing LLM: {fallback_ms:.0f} ms (includes HF model load)")
+    print(f"HF QA model loaded after LLM failure: {query_engine.is_loaded('hf_qa')}")
@@ -0,0 +1,85 @@
+# benchmarks/eval_retrieval.py
+#
+# Offline retrieval evaluation on the report's query -> section pairs
+# (report_generator.REPORT_QUERIES), per retrieval mode:
+#   dense    FAISS top 20, deduplicated (the previous default)
+#   hybrid   dense + BM25 reciprocal-rank fusion with the section boost
+#   rerank   hybrid followed by the cross-encoder, best --rerank-top-k kept
+# For each query: rank of the first chunk in the target section (by section
+# number, and by the mapped section title since the mapping's numbering can
+# drift from the document's), and the size of the context answer_query would
+# send to the LLM (after pack_context, in tokens of the context tokenizer).
+#
+# Run from the project root:
+#   python -m benchmarks.eval_retrieval --modes dense hybrid rerank
+
+import argparse
+import logging
+import time
+
+from src.compliance_analysis.report_generator import REPORT_QUERIES
+from src.rag_pipeline import query_engine
+from src.rag_pipeline.context_packer import pack_context
+from src.rag_pipeline.hybrid_retriever import section_matches
+
+INDEX_PATH = "data/knowledge_base/index.faiss"
+CHUNKS_PATH = "data/knowledge_base/chunks_structured.json"
+
+
+def retrieve(mode: str, query: str, rerank_top_k: int) -> list:
+    if mode == "dense":
+        return query_engine.retrieve_chunk_records(query, INDEX_PATH, CHUNKS_PATH, top_k=20)
+    return query_engine.retrieve_hybrid_records(query, INDEX_PATH, CHUNKS_PATH,
+                                                rerank_top_k=rerank_top_k if mode == "rerank" else None)
+
+
+def first_hit(chunks: list, targets: list):
+    """1-based rank of the first chunk matching `targets`, or None."""
+    return next((rank for rank, c in enumerate(chunks, start=1) if section_matches(c, targets)), None)
+
+
+def mapped_title(section: str) -> str:
+    for mapping in query_engine.get_compliance_mapping().get("mappings", []):
+        if mapping.get("policy_section", "").partition(" ")[0] == section:
+            return mapping["policy_section"]
+    return section
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate retrieval recall and prompt size")
+    parser.add_argument("--modes", nargs="+", choices=["dense", "hybrid", "rerank"], default=["dense", "hybrid"])
+    parser.add_argument("--rerank-top-k", type=int, default=4)
+    parser.add_argument("--k", type=int, default=5, help="cut-off for recall@k")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    summary = []
+    for mode in args.modes:
+        print(f"\n== {mode}")
+        print(f"{'section':<8} {'chunks':>6} {'rank#':>6} {'rank title':>10} {'ctx words':>9} {'tokens':>8} {'ms':>7}  query")
+        rows = []
+        for item in REPORT_QUERIES:
+            start = time.perf_counter()
+            chunks = retrieve(mode, item["query"], args.rerank_top_k)
+            ms = (time.perf_counter() - start) * 1000
+            by_number = first_hit(chunks, [item["section"]])  # bare number: numeric match only
+            by_title = first_hit(chunks, [mapped_title(item["section"])])
+            context, packed = pack_context([c["text"] for c in chunks])
+            words = len(context.split())
+            rows.append((by_number, by_title, words, ms, packed["tokens"]))
+            print(f"{item['section']:<8} {len(chunks):>6} {by_number or '-':>6} {by_title or '-':>10} "
+                  f"{words:>9} {packed['tokens']:>8} {ms:7.1f}  {item['query']}")
+
+        n = len(rows)
+        recall_number = sum(1 for r in rows if r[0] and r[0] <= args.k) / n
+        recall_title = sum(1 for r in rows if r[1] and r[1] <= args.k) / n
+        mrr_title = sum(1 / r[1] for r in rows if r[1]) / n
+        mean_words = sum(r[2] for r in rows) / n
+        mean_tokens = sum(r[4] for r in rows) / n
+        summary.append((mode, recall_number, recall_title, mrr_title, mean_words, mean_tokens,
+                        sum(r[3] for r in rows) / n))
+
+    print(f"\n{'mode':<8} {'recall@' + str(args.k) + ' #':>11} {'recall@' + str(args.k) + ' title':>14} "
+          f"{'MRR title':>10} {'ctx words':>10} {'tokens':>8} {'ms/query':>9}")
+    for mode, rn, rt, mrr, words, tokens, ms in summary:
+        print(f"{mode:<8} {rn:11.2f} {rt:14.2f} {mrr:10.2f} {words:10.0f} {tokens:8.0f} {ms:9.1f}")
@@ -0,0 +1,108 @@
+# benchmarks/load_test_server.py
+#
+# Load test for the HTTP query service (src/api/server.py). Starts the
+# service in-process on a local port with a stub LLM, then N concurrent
+# clients send POST /query back to back with distinct queries (so neither the
+# answer cache nor the query embedding cache helps). Runs once with
+# micro-batching off (max batch 1) and once per --max-batch value, and reports
+# throughput, p50/p95/p99 latency, 503/504 counts and the mean retrieval
+# batch size the scheduler achieved.
+#
+# Run from the project root:
+#   python -m benchmarks.load_test_server --clients 32 --requests 512 --llm-latency 0.2
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from collections import Counter
+
+import httpx
+import numpy as np
+import uvicorn
+
+from benchmarks.stub_llm import StubChatModel
+from benchmarks.synthetic import VOCABULARY
+from src.api.server import create_app
+from src.rag_pipeline import query_engine
+from src.rag_pipeline.batch_scheduler import MAX_BATCH, MAX_WAIT
+
+
+def make_queries(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [f"How does the policy cover {' '.join(rng.choice(VOCABULARY) for _ in range(6))}?" for _ in range(n)]
+
+
+def start_server(app, port: int) -> tuple:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("query service failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+
+async def run_load(url: str, queries: list, clients: int, timeout: float) -> tuple:
+    """Closed-loop load; returns (seconds, latencies of 200 responses, status counts, health)."""
+    latencies, statuses, position = [], Counter(), [0]
+
+    async def client(http):
+        while position[0] < len(queries):
+            query = queries[position[0]]
+            position[0] += 1
+            start = time.perf_counter()
+            try:
+                response = await http.post(f"{url}/query", json={"query": query})
+                status = response.status_code
+            except httpx.TimeoutException:
+                status = "client timeout"
+            statuses[status] += 1
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(clients)))
+        seconds = time.perf_counter() - start
+        health = (await http.get(f"{url}/health")).json()
+    return seconds, latencies, statuses, health
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the HTTP query service")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="stub LLM latency in seconds")
+    parser.add_argument("--max-batch", type=int, nargs="+", default=[MAX_BATCH])
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT * 1000)
+    parser.add_argument("--llm-workers", type=int, default=32)
+    parser.add_argument("--timeout", type=float, default=30.0, help="server-side request timeout in seconds")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    query_engine.set_llm(StubChatModel(latency=args.llm_latency))
+    query_engine.set_answer_cache(None)  # every request must be retrieved and answered
+
+    print(f"{args.requests} requests, {args.clients} clients, stub LLM latency {args.llm_latency:.2f}s")
+    for run, max_batch in enumerate([1] + args.max_batch):
+        app = create_app(max_batch=max_batch, max_wait=args.max_wait_ms / 1000 if max_batch > 1 else 0.0,
+                         max_in_flight=max(args.clients, 1) * 2, timeout=args.timeout,
+                         llm_workers=args.llm_workers)
+        server, thread = start_server(app, args.port)
+        url = f"http://127.0.0.1:{args.port}"
+        queries = make_queries(args.requests, seed=run)
+        asyncio.run(run_load(url, make_queries(args.clients, seed=1000 + run), args.clients, args.timeout + 5))
+        seconds, latencies, statuses, health = asyncio.run(
+            run_load(url, queries, args.clients, args.timeout + 5))
+        server.should_exit = True
+        thread.join()
+
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000 if latencies else (float("nan"),) * 3
+        errors = ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items(), key=str)
+                           if status != 200) or "none"
+        print(f"max_batch={max_batch:<3} {statuses[200] / seconds:7.1f} QPS  p50 {p50:6.0f} ms  "
+              f"p95 {p95:6.0f} ms  p99 {p99:6.0f} ms  mean batch {health['mean_batch']:4.1f}  errors {errors}")
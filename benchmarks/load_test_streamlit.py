@@ -0,0 +1,108 @@
+# benchmarks/load_test_streamlit.py
+#
+# Multi-session load test for the Streamlit app (src/ui/streamlit_app.py).
+# Opens N independent sessions with Streamlit's AppTest harness, in-process
+# and with a stub LLM, then has all of them submit a distinct query at the
+# same moment. If sessions were serialized, the last answer would arrive
+# after about N single-query latencies; with the shared models and the
+# background query executor it arrives after roughly one. Runs once per
+# --workers value (the app's RAG_UI_WORKERS), so --workers 1 shows the
+# serialized case for comparison. Streamlit's "missing ScriptRunContext"
+# and "No runtime found" warnings come from the test harness and can be
+# ignored.
+#
+# Run from the project root (needs the knowledge base, like the app):
+#   python -m benchmarks.load_test_streamlit --sessions 8 --workers 1 8 --llm-latency 0.5
+
+import argparse
+import os
+import statistics
+import threading
+import time
+
+import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.stub_llm import StubChatModel
+from src.rag_pipeline import query_engine
+
+APP_PATH = "../src/ui/streamlit_app.py"  # AppTest resolves it against this file
+
+
+def share_test_runtime():
+    """
+    AppTest registers a mock Runtime for each run and unregisters it when the
+    run ends, which breaks the other sessions' runs still in progress. Keep
+    the most recent one available instead, as a real server has one Runtime
+    for all sessions.
+    """
+    last = [None]
+
+    def instance(cls):
+        if cls._instance is not None:
+            last[0] = cls._instance
+        if last[0] is None:
+            raise RuntimeError("Runtime hasn't been created!")
+        return last[0]
+
+    Runtime.instance = classmethod(instance)
+
+
+def open_session(timeout: float) -> AppTest:
+    app = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    app.run()
+    return app
+
+
+def ask(app: AppTest, query: str, start: threading.Barrier, results: list, i: int):
+    app.text_input[0].input(query).run()
+    start.wait()
+    began = time.perf_counter()
+    try:
+        app.button[0].click().run()
+        errors, status = [e.message for e in app.exception], [s.label for s in app.status]
+    except Exception as e:
+        errors, status = [str(e)], []
+    results[i] = {"seconds": time.perf_counter() - began, "errors": errors, "status": status}
+
+
+def run(sessions: int, timeout: float) -> tuple:
+    """All sessions ask at once; returns (wall seconds, per-session results)."""
+    apps = [open_session(timeout) for _ in range(sessions)]
+    results, start = [None] * sessions, threading.Barrier(sessions + 1)
+    threads = [threading.Thread(target=ask, args=(app, f"How are passwords managed? (session {i})", start, results, i))
+               for i, app in enumerate(apps)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - began, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent sessions against the Streamlit app")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--workers", type=int, nargs="+", default=[8], help="RAG_UI_WORKERS values to compare")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="stub LLM latency in seconds")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds a session may take")
+    args = parser.parse_args()
+
+    share_test_runtime()
+    query_engine.set_llm(StubChatModel(latency=args.llm_latency))
+    query_engine.set_answer_cache(None)
+
+    single, results = run(1, args.timeout)
+    print(f"1 session: {single:.2f}s per query")
+    for workers in args.workers:
+        os.environ["RAG_UI_WORKERS"] = str(workers)
+        st.cache_resource.clear()  # a new executor with this many workers (warm-up is cheap once loaded)
+        run(1, args.timeout)  # warm-up: starts the new executor
+        wall, results = run(args.sessions, args.timeout)
+        latencies = sorted(r["seconds"] for r in results)
+        failed = sum(bool(r["errors"]) or "Answered" not in "".join(r["status"]) for r in results)
+        print(f"{args.sessions} sessions, {workers} workers: all answered after {wall:.2f}s "
+              f"({wall / single:.1f}x one query), median {statistics.median(latencies):.2f}s, "
+              f"max {latencies[-1]:.2f}s, {failed} failed")
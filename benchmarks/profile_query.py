@@ -0,0 +1,81 @@
+# benchmarks/profile_query.py
+#
+# Where does a query's time go? Runs queries through traced_query with a
+# local stub LLM and prints the mean per-stage breakdown (enhance_query,
+# encode, faiss_search, bm25_search, pack_context, llm, ...). With
+# --cprofile the whole run is profiled too and the top functions by
+# cumulative time are printed (and saved with --output for snakeviz).
+# --stub-encoder swaps the embedding model for a hashing stand-in
+# (benchmarks/stub_encoder.py), so the breakdown runs offline and repeats
+# exactly; its retrieval results are meaningless. Without network access,
+# also set HF_HUB_OFFLINE=1 so the prompt tokenizer falls back immediately.
+# The script is also a convenient target for sampling profilers:
+#   py-spy record -o query.svg -- python -m benchmarks.profile_query --repeat 50
+#
+# Run from the project root:
+#   python -m benchmarks.profile_query --repeat 20 --cprofile
+#   python -m benchmarks.profile_query --repeat 20 --stub-encoder --encoder-latency 0.005
+
+import argparse
+import cProfile
+import pstats
+
+from benchmarks.stub_encoder import install_stub_encoder
+from benchmarks.stub_llm import StubChatModel
+from src.rag_pipeline import query_engine
+from src.rag_pipeline import tracing
+from src.rag_pipeline.tracing import METRICS
+
+QUERIES = [
+    "What is the access control policy?", "How are passwords managed?", "How is data encrypted?",
+    "What is the incident response procedure?", "How often are vulnerabilities scanned?",
+    "How are backups performed?", "Who approves remote access?", "How long are logs retained?",
+]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage latency breakdown of the query pipeline")
+    parser.add_argument("--repeat", type=int, default=10, help="passes over the query set")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="stub LLM latency in seconds")
+    parser.add_argument("--full-scan", action="store_true", help="keyword (BM25) retrieval instead")
+    parser.add_argument("--stub-encoder", action="store_true", help="offline hashing encoder instead of the model")
+    parser.add_argument("--encoder-latency", type=float, default=0.0, help="stub encoder seconds per call")
+    parser.add_argument("--cprofile", action="store_true")
+    parser.add_argument("--output", help="write the cProfile stats here")
+    parser.add_argument("--top", type=int, default=25, help="functions to list with --cprofile")
+    args = parser.parse_args()
+
+    if args.stub_encoder:
+        install_stub_encoder(latency=args.encoder_latency)
+    query_engine.set_llm(StubChatModel(latency=args.llm_latency))
+    query_engine.set_answer_cache(None)
+    query_engine.warm_up()
+    METRICS.reset()  # drop the warm-up
+
+    profiler = cProfile.Profile() if args.cprofile else None
+    if profiler:
+        tracing.PROFILE_DIR = None  # per-request profiles (RAG_PROFILE_DIR) would replace this one
+        profiler.enable()
+    totals, n = {}, 0
+    for i in range(args.repeat):
+        for query in QUERIES:
+            # A new suffix per pass, so the query cache does not hide the encoder
+            _, trace = query_engine.traced_query(f"{query} ({i})", full_scan=args.full_scan)
+            for name, ms in trace.breakdown().items():
+                totals[name] = totals.get(name, 0.0) + ms
+            totals["total"] = totals.get("total", 0.0) + trace.total_ms
+            n += 1
+    if profiler:
+        profiler.disable()
+
+    total_ms = totals.pop("total") / n
+    print(f"\n{n} queries, mean {total_ms:.1f} ms")
+    for name, ms in sorted(totals.items(), key=lambda item: -item[1]):
+        print(f"  {name:<18} {ms / n:8.2f} ms  {ms / n / total_ms:5.1%}")
+    other_ms = total_ms - sum(totals.values()) / n
+    print(f"  {'other':<18} {other_ms:8.2f} ms  {other_ms / total_ms:5.1%}")
+
+    if profiler:
+        if args.output:
+            profiler.dump_stats(args.output)
+        print()
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(args.top)
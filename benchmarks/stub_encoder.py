@@ -0,0 +1,49 @@
+# benchmarks/stub_encoder.py
+#
+# Deterministic local stand-in for the SentenceTransformer encoder, so query
+# profiles run offline (no model download) and repeat exactly. Each word is
+# hashed into one of `dimension` buckets: retrieval quality is meaningless,
+# but the time spent around the encoder is real. Install it before the first
+# query with install_stub_encoder(latency=0.005).
+
+import hashlib
+import time
+
+import numpy as np
+
+from src.rag_pipeline import embedding_service
+from src.rag_pipeline.embedding_service import EMBEDDING_MODEL_NAME, default_backend
+
+
+class StubEncoder:
+    def __init__(self, dimension: int = 384, latency: float = 0.0, max_seq_length: int = 512):
+        self.dimension = dimension
+        self.latency = latency  # seconds per encode() call (simulated forward pass)
+        self.max_seq_length = max_seq_length
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False,
+               normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        if self.latency:
+            time.sleep(self.latency)
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.dimension] += 1.0
+        if normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+        return vectors[0] if single else vectors
+
+
+def install_stub_encoder(dimension: int = 384, latency: float = 0.0, model_name: str = EMBEDDING_MODEL_NAME,
+                         backend: str = None) -> StubEncoder:
+    """Make get_encoder(model_name, backend) return a StubEncoder instead of loading the model."""
+    encoder = StubEncoder(dimension, latency)
+    with embedding_service._encoders_lock:
+        embedding_service._encoders[(model_name, backend or default_backend())] = encoder
+    return encoder
@@ -0,0 +1,60 @@
+# benchmarks/stub_llm.py
+#
+# Deterministic local stand-in for ChatGroq so benchmarks run offline and
+# measure our code rather than the remote API. Plug it in with
+# query_engine.set_llm(StubChatModel(latency=0.5)).
+
+import hashlib
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+WORDS = ("policy control access encryption review logging monitoring incident supplier "
+         "password retention continuity physical security compliant partial gap audit").split()
+
+
+class StubLLMError(RuntimeError):
+    """Raised by the stub to simulate a Groq outage."""
+
+
+class StubChatModel(BaseChatModel):
+    latency: float = 0.0
+    """Seconds slept before the first token (simulated round trip)."""
+    token_latency: float = 0.0
+    """Seconds slept between streamed tokens."""
+    answer_words: int = 120
+    fail: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat-model"
+
+    def _answer(self, messages: List[BaseMessage]) -> list:
+        # Same prompt -> same answer, so cached/concurrent runs are comparable
+        prompt = "".join(str(m.content) for m in messages)
+        seed = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest(), 16)
+        return [WORDS[(seed >> (i % 64)) % len(WORDS)] for i in range(self.answer_words)]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.fail:
+            raise StubLLMError("stub LLM unavailable")
+        time.sleep(self.latency + self.token_latency * self.answer_words)
+        text = " ".join(self._answer(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        if self.fail:
+            raise StubLLMError("stub LLM unavailable")
+        time.sleep(self.latency)
+        for i, word in enumerate(self._answer(messages)):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
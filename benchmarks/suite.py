@@ -0,0 +1,192 @@
+# benchmarks/suite.py
+#
+# End-to-end regression suite, fully offline. For each corpus size it writes
+# a synthetic policy PDF, then times every pipeline stage on it:
+#   extract        extract_pdf_text
+#   chunk          chunk_text
+#   embed          generate_embeddings (embedding cache off)
+#   index          create_vector_store (FAISS index, chunk store, BM25 index)
+#   query          query_knowledge_base, mean per query (query embedding cache off)
+#   report_llm     generate_report, LLM mode
+#   report_evidence generate_report, direct evidence mode
+# ChatGroq is replaced by the deterministic stub (benchmarks/stub_llm.py) with
+# --llm-latency seconds per call, so LLM-bound stages measure our overhead
+# plus a fixed, known wait. --stub-encoder does the same for the embedding
+# model (benchmarks/stub_encoder.py), so the suite also runs without the
+# model download; set HF_HUB_OFFLINE=1 when there is no network. Each stage gets one untimed warm-up call (model
+# loading, first-call costs) and --repeat timed runs; the median is kept.
+#
+# Results go to --output as JSON and every stage is compared against the
+# baseline (--baseline, written by --update-baseline on a reference machine).
+# The run exits with status 1 when a stage is more than --threshold slower
+# (and by more than --min-delta-ms, to ignore noise on tiny stages), and
+# with status 2 when there is no baseline or it was recorded with the other
+# encoder. The committed benchmarks/baseline.json uses --stub-encoder.
+#
+# Run from the project root:
+#   python -m benchmarks.suite --stub-encoder
+#   python -m benchmarks.suite --stub-encoder --update-baseline
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.stub_encoder import install_stub_encoder
+from benchmarks.stub_llm import StubChatModel
+from benchmarks.synthetic import write_policy_pdf
+from src.compliance_analysis.report_generator import generate_report
+from src.pdf_processing.chunk_text import chunk_text
+from src.pdf_processing.extract_text import extract_pdf_text
+from src.rag_pipeline import query_engine
+from src.rag_pipeline.embeddings import generate_embeddings
+from src.rag_pipeline.retriever import get_retriever
+from src.rag_pipeline.vector_store import create_vector_store
+
+BASELINE_PATH = "benchmarks/baseline.json"
+RESULTS_PATH = "benchmarks/results/latest.json"
+QUERIES = [
+    "What is the access control policy?", "How are passwords managed?", "How is data encrypted?",
+    "What is the incident response procedure?", "How often are vulnerabilities scanned?",
+    "How are backups performed?", "Who approves remote access?", "How long are logs retained?",
+]
+
+
+def measure(fn, repeat: int, per: int = 1) -> dict:
+    """One warm-up call, then `repeat` timed calls: {"seconds": median, "runs": [...]}, divided by `per`."""
+    fn()
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - start) / per)
+    return {"seconds": statistics.median(runs), "runs": runs}
+
+
+def run_size(pages: int, workdir: Path, repeat: int) -> dict:
+    """Time every stage on a `pages`-page synthetic policy; returns {stage: measurement}."""
+    pdf_path = write_policy_pdf(workdir / f"policy_{pages}p.pdf", pages, seed=pages)
+    index_path = workdir / f"{pages}p" / "index.faiss"
+    chunks_path = workdir / f"{pages}p" / "chunks_structured.json"
+
+    text = extract_pdf_text(pdf_path)
+    chunks = chunk_text(text)
+    embeddings = generate_embeddings(chunks, use_cache=False)
+    create_vector_store(embeddings, chunks, index_path, chunks_path)
+    get_retriever(index_path, chunks_path).use_cache = False
+
+    def run_queries():
+        for query in QUERIES:
+            query_engine.query_knowledge_base(query, index_path, chunks_path)
+
+    results = {
+        "extract": measure(lambda: extract_pdf_text(pdf_path), repeat),
+        "chunk": measure(lambda: chunk_text(text), repeat),
+        "embed": measure(lambda: generate_embeddings(chunks, use_cache=False), repeat),
+        "index": measure(lambda: create_vector_store(embeddings, chunks, index_path, chunks_path), repeat),
+        "query": measure(run_queries, repeat, per=len(QUERIES)),
+    }
+    for mode in ("llm", "evidence"):
+        output = workdir / f"report_{pages}p_{mode}.md"
+        results[f"report_{mode}"] = measure(
+            lambda: generate_report(str(output), concurrency=4, report_mode=mode,
+                                    index_path=index_path, chunks_path=chunks_path), repeat)
+    for stage in results.values():
+        stage["pages"], stage["chunks"] = pages, len(chunks)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta: float) -> list:
+    """Print current vs baseline per benchmark; return the names of the regressions."""
+    regressions = []
+    print(f"\n{'benchmark':<24} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<24} {'-':>10} {current['seconds'] * 1000:8.1f}ms {'new':>7}")
+            continue
+        ratio = current["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+        regressed = ratio > 1 + threshold and current["seconds"] - base["seconds"] > min_delta
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<24} {base['seconds'] * 1000:8.1f}ms {current['seconds'] * 1000:8.1f}ms "
+              f"{ratio:6.2f}x{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark suite with baseline comparison")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50], help="synthetic policy sizes in pages")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage (the median is kept)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="stub LLM latency in seconds")
+    parser.add_argument("--stub-encoder", action="store_true", help="offline hashing encoder instead of the model")
+    parser.add_argument("--encoder-latency", type=float, default=0.0, help="stub encoder seconds per call")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", "--save-baseline", action="store_true",
+                        help="store these results as the baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--min-delta-ms", type=float, default=10.0,
+                        help="slowdowns smaller than this are never regressions")
+    args = parser.parse_args()
+
+    if args.stub_encoder:
+        install_stub_encoder(latency=args.encoder_latency)
+    query_engine.set_llm(StubChatModel(latency=args.llm_latency))
+    query_engine.set_answer_cache(None)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.sizes:
+            for stage, measurement in run_size(pages, Path(tmp), args.repeat).items():
+                results[f"{pages}p/{stage}"] = measurement
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "llm_latency": args.llm_latency,
+            "stub_encoder": args.stub_encoder,
+            "encoder_latency": args.encoder_latency if args.stub_encoder else None,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\nResults saved to {output}")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Baseline saved to {baseline_path}")
+    elif not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --update-baseline to create one")
+        sys.exit(2)
+    else:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        if baseline["meta"].get("stub_encoder", False) != args.stub_encoder:
+            # Model vs stub embedding times differ by orders of magnitude: nothing to compare
+            flag = "with" if baseline["meta"].get("stub_encoder") else "without"
+            print(f"Baseline {baseline_path} was recorded {flag} --stub-encoder; run the same way "
+                  f"or use --update-baseline")
+            sys.exit(2)
+        if baseline["meta"].get("llm_latency") != args.llm_latency:
+            print(f"Warning: baseline used --llm-latency {baseline['meta'].get('llm_latency')}")
+        if baseline["meta"].get("encoder_latency") != report["meta"]["encoder_latency"]:
+            print(f"Warning: baseline used --encoder-latency {baseline['meta'].get('encoder_latency')}")
+        regressions = compare(results, baseline["results"], args.threshold, args.min_delta_ms / 1000)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) more than {args.threshold:.0%} slower than the baseline: "
+                  f"{', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
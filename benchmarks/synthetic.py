@@ -0,0 +1,82 @@
+# benchmarks/synthetic.py
+#
+# Synthetic policy documents for offline benchmarks: numbered sections
+# ("4.12 Logging and Monitoring") followed by policy-like prose, as plain
+# text or as a minimal text-based PDF that pdfplumber/PyPDF2 can read.
+
+import random
+from pathlib import Path
+
+TOPICS = [
+    "Access Control", "Password Management", "Encryption", "Vulnerability Management",
+    "Incident Response", "Logging and Monitoring", "Data Retention", "Supplier Risk",
+    "Physical Security", "Business Continuity", "Change Management", "Asset Management",
+]
+VOCABULARY = (
+    "the bank shall ensure that all users systems data access controls are reviewed approved "
+    "documented monitored logged encrypted retained protected according to policy requirements "
+    "information security officer must authorize privileged accounts passwords keys backups "
+    "incidents vulnerabilities suppliers premises records annually quarterly periodically"
+).split()
+
+LINES_PER_PAGE = 55
+WORDS_PER_LINE = 10
+
+
+def policy_lines(n_lines: int, seed: int = 0) -> list:
+    """Lines of a synthetic policy: a section heading roughly every 25 lines."""
+    rng = random.Random(seed)
+    lines, section = [], 0
+    for i in range(n_lines):
+        if i % 25 == 0:
+            section += 1
+            lines.append(f"4.{section} {TOPICS[section % len(TOPICS)]}")
+        else:
+            lines.append(" ".join(rng.choice(VOCABULARY) for _ in range(WORDS_PER_LINE)) + ".")
+    return lines
+
+
+def policy_text(n_words: int, seed: int = 0) -> str:
+    return "\n".join(policy_lines(n_words // WORDS_PER_LINE + 1, seed))
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_policy_pdf(path: Path, n_pages: int, seed: int = 0) -> Path:
+    """Write an n_pages text PDF (Helvetica, no external dependencies)."""
+    lines = policy_lines(n_pages * LINES_PER_PAGE, seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for p in range(n_pages):
+        page_lines = lines[p * LINES_PER_PAGE:(p + 1) * LINES_PER_PAGE]
+        page_lines.append(f"Page {p + 1} of {n_pages}")
+        body = "BT /F1 9 Tf 40 800 Td 13 TL " + " ".join(f"({_escape(l)}) '" for l in page_lines) + " ET"
+        stream = body.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref)
+        page_refs.append(len(objects))
+    kids = " ".join(f"{n} 0 R" for n in page_refs)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {n_pages} >>".encode("latin-1")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(bytes(out))
+    return path
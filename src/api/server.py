@@ -0,0 +1,314 @@
+# src/api/server.py
+
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from pathlib import Path
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from src.rag_pipeline import query_engine
+from src.rag_pipeline.batch_scheduler import MAX_BATCH, MAX_QUEUE, MAX_WAIT, BatchScheduler, Overloaded
+from src.rag_pipeline.tracing import METRICS, Trace
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REQUEST_TIMEOUT = 30.0  # seconds per query/stream request, retrieval and answer included
+REPORT_TIMEOUT = 900.0
+MAX_IN_FLIGHT = 128  # concurrent query/stream requests before new ones get 503
+LLM_WORKERS = 16  # threads running answer generation (blocking Groq / HF calls)
+
+
+class ServiceState:
+    """Everything the handlers share: the retrieval scheduler, the answer threads and admission counters."""
+
+    def __init__(self, index_path, chunks_path, max_batch, max_wait, max_queue, max_in_flight, timeout,
+                 llm_workers):
+        self.index_path = index_path
+        self.chunks_path = chunks_path
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.scheduler = BatchScheduler(
+            partial(query_engine.retrieve_chunk_records_batch, index_path=index_path, chunks_path=chunks_path),
+            max_batch=max_batch, max_wait=max_wait, max_queue=max_queue, name="retrieval")
+        self.executor = ThreadPoolExecutor(max_workers=llm_workers, thread_name_prefix="answer")
+        self.report_lock = asyncio.Lock()
+
+    def admit(self) -> bool:
+        if self.in_flight >= self.max_in_flight:
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+
+    async def retrieve(self, query: str, full_scan: bool, timeout: float, trace: Trace) -> list:
+        """Chunk dicts for `query`; the wait (queueing included) is recorded as the trace's "retrieval" stage."""
+        start = time.perf_counter()
+        if full_scan:
+            loop = asyncio.get_running_loop()
+            records = await asyncio.wait_for(loop.run_in_executor(
+                self.executor, query_engine.scan_chunk_records, query, self.chunks_path, self.index_path), timeout)
+        else:
+            records = await self.scheduler.submit(query, timeout)
+        trace.add("retrieval", (time.perf_counter() - start) * 1000)
+        return records
+
+
+def _overloaded(reason: str) -> JSONResponse:
+    return JSONResponse({"error": reason}, status_code=503, headers={"Retry-After": "1"})
+
+
+def _timed_out(state: ServiceState) -> JSONResponse:
+    state.timed_out += 1
+    return JSONResponse({"error": f"request timed out after {state.timeout:g}s"}, status_code=504)
+
+
+def _answer_traced(trace: Trace, query: str, chunks: list, sources: tuple) -> str:
+    with trace.activate():
+        return query_engine.answer_query(query, chunks, sources)
+
+
+def _render_report(**kwargs) -> str:
+    """generate_report into a temporary directory owned by the worker thread; returns the Markdown."""
+    from src.compliance_analysis.report_generator import generate_report
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "compliance_report.md"
+        generate_report(str(output), **kwargs)
+        return output.read_text(encoding="utf-8")
+
+
+async def _json_body(request, required: bool = True) -> dict:
+    """The request's JSON object (an empty body is {} unless `required`), or raise ValueError."""
+    if not required and not await request.body():
+        return {}
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise ValueError("body must be JSON") from None
+    if not isinstance(body, dict):
+        raise ValueError("body must be a JSON object")
+    return body
+
+
+async def _query_request(request):
+    """(query, full_scan) from a JSON body, or raise ValueError."""
+    body = await _json_body(request)
+    query = body.get("query", "")
+    if not isinstance(query, str) or not query.strip():
+        raise ValueError('"query" must be a non-empty string')
+    return query.strip(), bool(body.get("full_scan", False))
+
+
+# ===========================
+# Handlers
+# ===========================
+async def query(request):
+    """
+    POST /query {"query": str, "full_scan": bool}
+    -> {"answer", "sections", "total_ms", "stages", "prompt_tokens"}
+    """
+    state = request.app.state.service
+    try:
+        text, full_scan = await _query_request(request)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    if not state.admit():
+        return _overloaded("too many requests in flight")
+
+    trace = Trace(text)
+    loop = asyncio.get_running_loop()
+    try:
+        records = await state.retrieve(text, full_scan, state.timeout, trace)
+        remaining = state.timeout - (time.perf_counter() - trace.start)
+        answer = await asyncio.wait_for(loop.run_in_executor(
+            state.executor, _answer_traced, trace, text, [c["text"] for c in records],
+            query_engine.knowledge_base_files(state.index_path, state.chunks_path)), remaining)
+    except Overloaded as e:
+        return _overloaded(str(e))
+    except asyncio.TimeoutError:
+        return _timed_out(state)
+    finally:
+        state.release()
+    trace.finish()
+    return JSONResponse({"answer": answer, "sections": query_engine.section_summaries(records),
+                         "total_ms": trace.total_ms, "stages": trace.breakdown(),
+                         "prompt_tokens": trace.attributes.get("prompt_tokens")})
+
+
+async def stream(request):
+    """
+    POST /stream {"query": str, "full_scan": bool} -> NDJSON events, as from
+    stream_query_knowledge_base ("sections", "token"..., "done"), or a final
+    {"type": "error"} event if the answer runs past the request timeout.
+    """
+    state = request.app.state.service
+    try:
+        text, full_scan = await _query_request(request)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    if not state.admit():
+        return _overloaded("too many requests in flight")
+
+    trace = Trace(text, kind="stream")
+    try:
+        records = await state.retrieve(text, full_scan, state.timeout, trace)
+    except Overloaded as e:
+        state.release()
+        return _overloaded(str(e))
+    except asyncio.TimeoutError:
+        state.release()
+        return _timed_out(state)
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        iterator = query_engine.stream_records_answer(
+            text, records, trace=trace, sources=query_engine.knowledge_base_files(state.index_path, state.chunks_path))
+        step, finished = None, False
+        try:
+            while True:
+                remaining = state.timeout - (time.perf_counter() - trace.start)
+                step = loop.run_in_executor(state.executor, next, iterator, None)
+                try:
+                    event = await asyncio.wait_for(asyncio.shield(step), max(remaining, 0))
+                except asyncio.TimeoutError:
+                    state.timed_out += 1
+                    yield json.dumps({"type": "error", "error": "timed out"}) + "\n"
+                    return
+                if event is None:
+                    finished = True
+                    return
+                yield json.dumps(event) + "\n"
+        finally:
+            state.release()
+            if not finished:
+                # Timed out or client gone: close the answer generator (and the LLM stream
+                # behind it) once its current step returns, rather than leave it running
+                def close(_=None):
+                    state.executor.submit(iterator.close)
+                if step is None or step.done():
+                    close()
+                else:
+                    step.add_done_callback(close)
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+async def report(request):
+    """POST /report {"mode": "llm" | "evidence", "summarize_gaps": bool} -> the Markdown report"""
+    from src.compliance_analysis.report_generator import REPORT_MODES
+    state = request.app.state.service
+    try:
+        body = await _json_body(request, required=False)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    mode = body.get("mode", "evidence")
+    if not isinstance(mode, str) or mode not in REPORT_MODES:
+        return JSONResponse({"error": f'"mode" must be one of {list(REPORT_MODES)}'}, status_code=400)
+
+    loop = asyncio.get_running_loop()
+    await state.report_lock.acquire()  # one report at a time; later requests wait their turn
+    job = loop.run_in_executor(state.executor, partial(
+        _render_report, report_mode=mode, summarize=bool(body.get("summarize_gaps", False)),
+        index_path=state.index_path, chunks_path=state.chunks_path))
+    # A report thread cannot be interrupted: after a timeout (or a client
+    # disconnect) it keeps running, so the lock is held until it ends
+    job.add_done_callback(lambda _: state.report_lock.release())
+    try:
+        markdown = await asyncio.wait_for(asyncio.shield(job), REPORT_TIMEOUT)
+    except asyncio.TimeoutError:
+        return _timed_out(state)
+    return PlainTextResponse(markdown, media_type="text/markdown")
+
+
+async def health(request):
+    state = request.app.state.service
+    return JSONResponse({
+        "status": "ok",
+        "in_flight": state.in_flight,
+        "queued": state.scheduler.queued(),
+        "rejected": state.rejected,
+        "timed_out": state.timed_out,
+        "batches": state.scheduler.batches,
+        "mean_batch": state.scheduler.batched_queries / max(state.scheduler.batches, 1),
+        "stages": METRICS.summary(),
+    })
+
+
+async def metrics(request):
+    """GET /metrics: per-stage latency histograms in the Prometheus text format."""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+# ===========================
+# App
+# ===========================
+def create_app(index_path=query_engine.INDEX_PATH, chunks_path=query_engine.CHUNKS_PATH,
+               max_batch: int = MAX_BATCH, max_wait: float = MAX_WAIT, max_queue: int = MAX_QUEUE,
+               max_in_flight: int = MAX_IN_FLIGHT, timeout: float = REQUEST_TIMEOUT,
+               llm_workers: int = LLM_WORKERS) -> Starlette:
+    """
+    The query service. Models, index and chunks are loaded once at startup
+    (query_engine.warm_up) and stay resident; concurrent retrievals are
+    coalesced by a BatchScheduler, answers are generated on a thread pool.
+    Requests beyond max_in_flight, or arriving while max_queue retrievals
+    wait, get 503 with Retry-After; requests running past `timeout` get 504.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app):
+        state = ServiceState(index_path, chunks_path, max_batch, max_wait, max_queue, max_in_flight, timeout,
+                             llm_workers)
+        await asyncio.get_running_loop().run_in_executor(state.executor, query_engine.warm_up,
+                                                         index_path, chunks_path)
+        state.scheduler.start()
+        app.state.service = state
+        logger.info(f"Query service ready (max batch {max_batch}, max wait {max_wait * 1000:.0f} ms, "
+                    f"queue {max_queue}, in flight {max_in_flight}, timeout {timeout:.0f}s)")
+        yield
+        await state.scheduler.stop()
+        state.executor.shutdown(wait=False)
+
+    return Starlette(routes=[
+        Route("/query", query, methods=["POST"]),
+        Route("/stream", stream, methods=["POST"]),
+        Route("/report", report, methods=["POST"]),
+        Route("/health", health, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+    ], lifespan=lifespan)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the compliance knowledge base over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--index", default=query_engine.INDEX_PATH)
+    parser.add_argument("--chunks", default=query_engine.CHUNKS_PATH)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="queries per retrieval batch")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT * 1000,
+                        help="how long a retrieval batch waits for more queries")
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE, help="queued retrievals before 503")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT, help="concurrent requests before 503")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT, help="seconds per request before 504")
+    parser.add_argument("--llm-workers", type=int, default=LLM_WORKERS)
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.index, args.chunks, args.max_batch, args.max_wait_ms / 1000, args.max_queue,
+                           args.max_in_flight, args.timeout, args.llm_workers),
+                host=args.host, port=args.port)
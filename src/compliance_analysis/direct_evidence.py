@@ -0,0 +1,106 @@
+import logging
+
+import numpy as np
+
+from src.compliance_analysis.mapping_index import gap_status, get_mapping_index
+from src.compliance_analysis.semantic_gaps import SEMANTIC_GAP_THRESHOLD
+from src.rag_pipeline.embedding_service import EMBEDDING_MODEL_NAME, encode_normalized
+from src.rag_pipeline.hybrid_retriever import hybrid_search_batch
+
+logger = logging.getLogger(__name__)
+
+# Chunks retrieved per clause; the best scoring one is reported as its support
+EVIDENCE_TOP_K = 3
+
+
+def collect_clause_evidence(mappings: list, sections: list, index_path, chunks_path,
+                            top_k: int = EVIDENCE_TOP_K, threshold: float = SEMANTIC_GAP_THRESHOLD,
+                            model_name: str = EMBEDDING_MODEL_NAME, backend: str = None) -> list:
+    """
+    Look up policy text for every mapped clause of `sections`, without an LLM.
+
+    Each distinct (clause description, policy section) becomes one retrieval
+    query, and all of them go through a single hybrid_search_batch call
+    (boosted towards the clause's policy section). The retrieved chunks and
+    the descriptions are embedded through the embedding cache and every
+    clause is scored against its own chunks. A clause is backed when its best
+    chunk reaches `threshold` cosine similarity or contains the description
+    verbatim.
+
+    Returns one list per section (None if the section is not in the mapping)
+    of {"framework", "clause", "description", "backed", "score", "chunk"}
+    dicts, in clause order; "chunk" is the best chunk dict or None.
+    """
+    index = get_mapping_index(mappings)
+    positions = [index.find_mapping(section) for section in sections]
+    queries = {}  # (description, policy_section) -> query number
+    for position in dict.fromkeys(p for p in positions if p is not None):
+        policy_section = mappings[position].get("policy_section", "")
+        for _, _, desc, _ in index.clauses(position):
+            queries.setdefault((desc, policy_section), len(queries))
+    keys = list(queries)
+
+    try:
+        retrieved = hybrid_search_batch([desc for desc, _ in keys], index_path, chunks_path,
+                                        sections=[[policy_section] for _, policy_section in keys],
+                                        top_k=top_k) if keys else []
+    except Exception as e:
+        logger.error(f"Error retrieving clause evidence: {e}")
+        retrieved = [[] for _ in keys]
+
+    texts = list(dict.fromkeys(chunk["text"] for chunks in retrieved for chunk in chunks))
+    text_rows = {text: row for row, text in enumerate(texts)}
+    if texts:
+        clause_vectors = encode_normalized([desc for desc, _ in keys], model_name, backend)
+        chunk_vectors = encode_normalized(texts, model_name, backend)
+
+    support = []  # per query: (best chunk, score, backed)
+    for query, ((desc, _), chunks) in enumerate(zip(keys, retrieved)):
+        if not chunks:
+            support.append((None, None, False))
+            continue
+        scores = chunk_vectors[[text_rows[chunk["text"]] for chunk in chunks]] @ clause_vectors[query]
+        best = int(np.argmax(scores))
+        verbatim = any(desc.lower() in chunk["text"].lower() for chunk in chunks)
+        support.append((chunks[best], float(scores[best]), verbatim or bool(scores[best] >= threshold)))
+
+    results = []
+    for position in positions:
+        if position is None:
+            results.append(None)
+            continue
+        policy_section = mappings[position].get("policy_section", "")
+        entries = []
+        for label, clause, desc, _ in index.clauses(position):
+            chunk, score, backed = support[queries[(desc, policy_section)]]
+            entries.append({"framework": label, "clause": clause, "description": desc,
+                            "backed": backed, "score": score, "chunk": chunk})
+        results.append(entries)
+    logger.info(f"Collected evidence for {len(keys)} clauses in one retrieval batch")
+    return results
+
+
+def _support_text(entry: dict) -> str:
+    chunk = entry["chunk"]
+    if chunk is None:
+        return "no supporting text found"
+    return f"{chunk.get('section', 'Unknown')} {chunk.get('title', '')}".strip() + f", score {entry['score']:.2f}"
+
+
+def evidence_analysis(entries: list, n_clauses: int):
+    """
+    analyze_compliance-style result for one section's clause evidence:
+    (status, gaps, pci_gaps, iso_gaps, evidence), where each gap names the
+    closest policy text found and `evidence` lists the backed clauses with
+    their supporting section and score.
+    """
+    pci_gaps, iso_gaps, gaps, evidence = [], [], [], []
+    for entry in entries:
+        name = f"{entry['framework']} {entry['clause']}"
+        if entry["backed"]:
+            evidence.append(f"{name}: {entry['description']} ({_support_text(entry)})")
+            continue
+        gap_text = f"{name}: Missing {entry['description']} (closest: {_support_text(entry)})"
+        gaps.append(gap_text)
+        (pci_gaps if entry["framework"] == "PCI-DSS" else iso_gaps).append(gap_text)
+    return gap_status(len(gaps), n_clauses), gaps, pci_gaps, iso_gaps, evidence
@@ -0,0 +1,213 @@
+import re
+import threading
+from collections import defaultdict
+
+from src.rag_pipeline.text_terms import section_title_terms, tokenize
+
+# Patterns are filed under their first few characters (all anchors the same
+# width, so at most one matches at any text position)
+MAX_ANCHOR = 8
+# Below this many clauses a mapping is checked with plain `in` tests, which
+# beat a regex pass over the response for short clause lists
+MATCHER_MIN_CLAUSES = 64
+FRAMEWORKS = (("pci_dss", "PCI-DSS"), ("iso_27001", "ISO 27001"))
+
+
+def _trie_pattern(words: list) -> str:
+    """Regex alternation of `words` shaped as a prefix trie, so the engine follows one branch per character."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node):
+        end = "" in node
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 and not end else "(?:" + "|".join(branches) + ")"
+        return body + ("?" if end else "")
+
+    return emit(trie)
+
+
+def gap_status(n_gaps: int, n_clauses: int) -> str:
+    """Compliant with no gaps, Non-Compliant when every clause is a gap, Partially Compliant otherwise."""
+    if not n_gaps:
+        return "Compliant"
+    if n_gaps < n_clauses:
+        return "Partially Compliant"
+    return "Non-Compliant"
+
+
+class SubstringMatcher:
+    """
+    Finds which of many fixed (lowercase) patterns occur in a text with one
+    compiled-regex pass. Each pattern is filed under its first `width`
+    characters (width = shortest pattern, at most MAX_ANCHOR); the regex, a
+    trie over the distinct anchors, reports every position where an anchor
+    starts and only the patterns filed under it are verified there.
+    Cost grows with the text length, not with the number of patterns.
+    """
+
+    def __init__(self, patterns: list):
+        filed = [(pattern_id, pattern) for pattern_id, pattern in enumerate(patterns) if pattern]
+        self._anchors = defaultdict(list)  # anchor -> [(id, pattern)]
+        self._regex = None
+        if filed:
+            width = min(MAX_ANCHOR, min(len(pattern) for _, pattern in filed))
+            for pattern_id, pattern in filed:
+                self._anchors[pattern[:width]].append((pattern_id, pattern))
+            self._regex = re.compile(f"(?=({_trie_pattern(list(self._anchors))}))")
+
+    def find(self, text: str) -> set:
+        """Ids (list positions) of the patterns occurring in `text`."""
+        found = set()
+        if self._regex is None:
+            return found
+        for match in self._regex.finditer(text):
+            position = match.start()
+            for pattern_id, pattern in self._anchors[match.group(1)]:
+                if pattern_id not in found and text.startswith(pattern, position):
+                    found.add(pattern_id)
+        return found
+
+
+class KeywordMatcher:
+    """
+    {keyword: value} lookup where the first keyword, in dict order, that occurs
+    in a text (case-insensitive substring) wins, like looping over the dict.
+    """
+
+    def __init__(self, keywords: dict):
+        self._keywords = [k.lower() for k in keywords]
+        self._values = list(keywords.values())
+        self._matcher = SubstringMatcher(self._keywords)
+
+    def first(self, text: str, default=None):
+        found = self._matcher.find(text.lower())
+        return self._values[min(found)] if found else default
+
+
+class MappingIndex:
+    """
+    Compiled form of compliance_mapping.json's "mappings" list for
+    analyze_compliance:
+      - every prefix of every policy_section -> first mapping with that prefix
+        (the list-order startswith(section) lookup, in one dict access)
+      - per mapping, its PCI-DSS then ISO 27001 clauses with pre-lowered
+        descriptions, and for mappings with MATCHER_MIN_CLAUSES or more
+        clauses a SubstringMatcher over them
+    The response is lowercased once per analysis.
+    """
+
+    def __init__(self, mappings: list):
+        self.mappings = mappings
+        self._by_prefix = {}
+        for position, mapping in enumerate(mappings):
+            policy_section = mapping.get("policy_section", "")
+            for i in range(len(policy_section) + 1):
+                self._by_prefix.setdefault(policy_section[:i], position)
+
+        self._clauses = []  # per mapping: [(framework label, clause, description, lowered description), ...]
+        self._counts = []  # per mapping: total PCI-DSS + ISO 27001 clauses, empty descriptions included
+        self._matchers = {}  # mapping position -> SubstringMatcher over its lowered descriptions
+        for position, mapping in enumerate(mappings):
+            clauses, count = [], 0
+            for key, label in FRAMEWORKS:
+                entries = mapping.get(key, [])
+                count += len(entries)
+                for clause in entries:
+                    desc = clause.get("description", "")
+                    if desc:
+                        clauses.append((label, clause["clause"], desc, desc.lower()))
+            self._clauses.append(clauses)
+            self._counts.append(count)
+            if len(clauses) >= MATCHER_MIN_CLAUSES:
+                self._matchers[position] = SubstringMatcher([lowered for _, _, _, lowered in clauses])
+
+    def find_mapping(self, section: str):
+        """Position of the first mapping whose policy_section starts with `section`, or None."""
+        return self._by_prefix.get(section)
+
+    def clauses(self, position: int) -> list:
+        """[(framework label, clause, description, lowered description), ...] of a mapping, PCI-DSS first."""
+        return self._clauses[position]
+
+    def clause_count(self, position: int) -> int:
+        """Number of clauses of a mapping, including those without a description."""
+        return self._counts[position]
+
+    def analyze(self, response: str, section: str):
+        """Same result as analyze_compliance: (status, gaps, pci_gaps, iso_gaps)."""
+        position = self.find_mapping(section)
+        if position is None:
+            return "Unknown", ["Section not found in compliance mapping"], [], []
+
+        text = response.lower()
+        clauses = self._clauses[position]
+        matcher = self._matchers.get(position)
+        if matcher is not None:
+            present = matcher.find(text)
+            missing = [c for i, c in enumerate(clauses) if i not in present]
+        else:
+            missing = [c for c in clauses if c[3] not in text]
+
+        pci_gaps, iso_gaps, gaps = [], [], []
+        for label, clause, desc, _ in missing:
+            gap_text = f"{label} {clause}: Missing {desc}"
+            gaps.append(gap_text)
+            (pci_gaps if label == "PCI-DSS" else iso_gaps).append(gap_text)
+
+        return gap_status(len(gaps), self._counts[position]), gaps, pci_gaps, iso_gaps
+
+
+class QueryMappingIndex:
+    """
+    Compiled query-side lookups over the raw compliance mapping document:
+      - enhance(): keyword-keyed entries ({"access control": {"sections": ...,
+        "keywords": ...}}) matched with a KeywordMatcher, first key wins
+      - sections(): distinctive section-title word -> mapped policy sections
+    """
+
+    def __init__(self, document: dict):
+        additions = {}
+        for key, value in document.items():
+            if isinstance(value, dict):
+                parts = [value.get("sections", ""), value.get("keywords", "")]
+                additions[key] = " ".join(" ".join(p) if isinstance(p, list) else str(p) for p in parts).strip()
+        self._enhancements = KeywordMatcher(additions)
+
+        self._sections_by_term = defaultdict(list)
+        self._section_order = {}
+        for mapping in document.get("mappings", []):
+            policy_section = mapping.get("policy_section", "")
+            self._section_order.setdefault(policy_section, len(self._section_order))
+            for term in section_title_terms(policy_section.partition(" ")[2]):
+                self._sections_by_term[term].append(policy_section)
+
+    def enhance(self, query: str) -> str:
+        additions = self._enhancements.first(query)
+        return f"{query} {additions}" if additions else query
+
+    def sections(self, query: str) -> list:
+        """Mapped policy sections ("4.4 Access Control") whose distinctive title words appear in the query."""
+        matched = set()
+        for term in set(tokenize(query)):
+            matched.update(self._sections_by_term.get(term, ()))
+        return sorted(matched, key=self._section_order.get)
+
+
+_compiled = (None, None)
+_compiled_lock = threading.Lock()
+
+
+def get_mapping_index(mappings: list) -> MappingIndex:
+    """MappingIndex for this exact list object, compiled on first use and reused while it is current."""
+    global _compiled
+    with _compiled_lock:
+        if _compiled[0] is not mappings:
+            _compiled = (mappings, MappingIndex(mappings))
+        return _compiled[1]
@@ -1,7 +1,13 @@
+import argparse
 import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from src.rag_pipeline.query_engine import query_knowledge_base
+from src.compliance_analysis.direct_evidence import collect_clause_evidence, evidence_analysis
+from src.compliance_analysis.mapping_index import KeywordMatcher, get_mapping_index
+from src.compliance_analysis.semantic_gaps import SEMANTIC_GAP_THRESHOLD, SemanticGapDetector
+from src.rag_pipeline.query_engine import answer_query, knowledge_base_files, retrieve_chunks_batch
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -22,13 +28,20 @@ RISK_LEVELS = {
     "password": "High"
 }
 
+_RISK_MATCHER = KeywordMatcher(RISK_LEVELS)
+
+INDEX_PATH = "data/knowledge_base/index.faiss"
+CHUNKS_PATH = "data/knowledge_base/chunks_structured.json"
+# exact: a clause is addressed only if its description appears verbatim in the response
+# semantic: also when the response or the retrieved chunks are similar enough (SemanticGapDetector)
+GAP_MODES = ("exact", "semantic")
+# llm: answer every report query with the LLM and check the answers against the mapping
+# evidence: retrieve policy text for every mapped clause directly, no LLM (collect_clause_evidence)
+REPORT_MODES = ("llm", "evidence")
+
 def assign_risk_level(query: str) -> str:
     """Assign audit priority (risk level) based on query keywords."""
-    query_lower = query.lower()
-    for keyword, risk in RISK_LEVELS.items():
-        if keyword in query_lower:
-            return risk
-    return "Low"
+    return _RISK_MATCHER.first(query, "Low")
 
 def load_compliance_mapping(mapping_path="data/mappings/compliance_mapping.json"):
     """Load compliance mapping from JSON."""
@@ -44,62 +57,137 @@ def analyze_compliance(response: str, section: str, mappings: list):
     if not mappings:
         return "Unknown", ["Compliance mapping not found"], [], []
 
-    for mapping in mappings:
-        if mapping.get("policy_section", "").startswith(section):
-            pci_dss = mapping.get("pci_dss", [])
-            iso_27001 = mapping.get("iso_27001", [])
-            pci_gaps, iso_gaps, gaps = [], [], []
-
-            # Check PCI-DSS clauses
-            for clause in pci_dss:
-                desc = clause.get("description", "").lower()
-                if desc and desc not in response.lower():
-                    gap_text = f"PCI-DSS {clause['clause']}: Missing {clause['description']}"
-                    gaps.append(gap_text)
-                    pci_gaps.append(gap_text)
-
-            # Check ISO 27001 clauses
-            for clause in iso_27001:
-                desc = clause.get("description", "").lower()
-                if desc and desc not in response.lower():
-                    gap_text = f"ISO 27001 {clause['clause']}: Missing {clause['description']}"
-                    gaps.append(gap_text)
-                    iso_gaps.append(gap_text)
-
-            # Determine compliance status
-            if not gaps:
-                status = "Compliant"
-            elif len(gaps) < (len(pci_dss) + len(iso_27001)):
-                status = "Partially Compliant"
-            else:
-                status = "Non-Compliant"
-
-            return status, gaps, pci_gaps, iso_gaps
-
-    return "Unknown", ["Section not found in compliance mapping"], [], []
-
-def generate_report(output_path="data/output/compliance_report.md"):
-    """Generate compliance gap analysis report."""
-    queries = [
-        {"query": "What are the access control policies?", "section": "4.4"},
-        {"query": "How does the policy address encryption?", "section": "4.34"},
-        {"query": "What are the vulnerability management procedures?", "section": "4.16"},
-        {"query": "What is the incident response plan?", "section": "4.33"},
-        {"query": "How are passwords managed?", "section": "4.5"},
-        {"query": "What are the logging and monitoring policies?", "section": "4.12"},
-        {"query": "What is the data retention policy?", "section": "4.20"},
-        {"query": "How is supplier risk managed?", "section": "4.29"},
-        {"query": "What is the physical security policy?", "section": "4.7"},
-        {"query": "How does the organization ensure business continuity?", "section": "4.25"}
-    ]
-
+    # Section lookup and clause matching run against the compiled mapping
+    # (built once per mappings list, see mapping_index.MappingIndex)
+    return get_mapping_index(mappings).analyze(response, section)
+
+def analyze_compliance_batch(responses: list, sections: list, mappings: list, mode: str = "exact",
+                             evidence: list = None, threshold: float = SEMANTIC_GAP_THRESHOLD) -> list:
+    """
+    analyze_compliance for a whole report. In "semantic" mode every clause is
+    also scored against the response and its `evidence` texts (e.g. retrieved
+    chunk texts, one list per response) in one vectorized pass.
+    """
+    if mode not in GAP_MODES:
+        raise ValueError(f"Unknown gap mode {mode!r}, expected one of {GAP_MODES}")
+    if mode == "exact" or not mappings:
+        return [analyze_compliance(response, section, mappings) for response, section in zip(responses, sections)]
+    evidence = evidence or [[] for _ in responses]
+    detector = SemanticGapDetector(mappings, threshold)
+    return detector.analyze_batch([(section, [response] + list(texts))
+                                   for response, section, texts in zip(responses, sections, evidence)])
+
+def analyze_direct_evidence(sections: list, mappings: list, threshold: float = SEMANTIC_GAP_THRESHOLD,
+                            index_path=INDEX_PATH, chunks_path=CHUNKS_PATH) -> list:
+    """
+    Evidence-mode analysis of every report section: one
+    (status, gaps, pci_gaps, iso_gaps, evidence, gap_entries) tuple per
+    section, where gap_entries are the clause evidence dicts of the gaps.
+    """
+    if not mappings:
+        return [analyze_compliance("", section, mappings) + ([], []) for section in sections]
+    index = get_mapping_index(mappings)
+    collected = collect_clause_evidence(mappings, sections, index_path, chunks_path, threshold=threshold)
+    results = []
+    for section, entries in zip(sections, collected):
+        if entries is None:
+            results.append(analyze_compliance("", section, mappings) + ([], []))
+            continue
+        analysis = evidence_analysis(entries, index.clause_count(index.find_mapping(section)))
+        results.append(analysis + ([e for e in entries if not e["backed"]],))
+    return results
+
+# Queries run for the report, each tied to the policy section it should cover
+REPORT_QUERIES = [
+    {"query": "What are the access control policies?", "section": "4.4"},
+    {"query": "How does the policy address encryption?", "section": "4.34"},
+    {"query": "What are the vulnerability management procedures?", "section": "4.16"},
+    {"query": "What is the incident response plan?", "section": "4.33"},
+    {"query": "How are passwords managed?", "section": "4.5"},
+    {"query": "What are the logging and monitoring policies?", "section": "4.12"},
+    {"query": "What is the data retention policy?", "section": "4.20"},
+    {"query": "How is supplier risk managed?", "section": "4.29"},
+    {"query": "What is the physical security policy?", "section": "4.7"},
+    {"query": "How does the organization ensure business continuity?", "section": "4.25"}
+]
+
+def run_report_queries(queries: list, concurrency: int = 1, index_path=INDEX_PATH, chunks_path=CHUNKS_PATH,
+                       retrieved: list = None) -> list:
+    """
+    Answer every report query and return the responses in the same order as `queries`.
+    Retrieval for the whole set is one encoder batch (unless the chunks are
+    passed in as `retrieved`); LLM calls run on up to `concurrency` worker
+    threads (1 = sequential).
+    """
+    texts = [q["query"] for q in queries]
+    sources = knowledge_base_files(index_path, chunks_path)
+    if retrieved is None:
+        retrieved = retrieve_chunks_batch(texts, index_path, chunks_path)
+
+    if concurrency <= 1:
+        responses = []
+        for text, chunks in zip(texts, retrieved):
+            logger.info(f"Processing query: {text}")
+            responses.append(answer_query(text, chunks, sources))
+        return responses
+
+    logger.info(f"Processing {len(texts)} queries with {concurrency} workers")
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # map() yields results in submission order, so sections stay deterministic
+        return list(executor.map(answer_query, texts, retrieved, [sources] * len(texts)))
+
+def summarize_gaps(analyses: list, concurrency: int = 1) -> list:
+    """
+    Optional LLM pass for evidence mode: one question per section that has
+    gaps, answered from the closest chunks found for those gaps.
+    """
+    gap_queries, gap_chunks, owners = [], [], []
+    for i, (_, _, _, _, _, gap_entries) in enumerate(analyses):
+        if gap_entries:
+            missing = "; ".join(e["description"] for e in gap_entries)
+            gap_queries.append({"query": f"Does the policy address the following requirements: {missing}?"})
+            gap_chunks.append(list(dict.fromkeys(e["chunk"]["text"] for e in gap_entries if e["chunk"])))
+            owners.append(i)
+    responses = ["No gaps to summarize."] * len(analyses)
+    for i, response in zip(owners, run_report_queries(gap_queries, concurrency=concurrency, retrieved=gap_chunks)):
+        responses[i] = response
+    return responses
+
+def generate_report(output_path="data/output/compliance_report.md", concurrency: int = 1,
+                    gap_mode: str = "exact", gap_threshold: float = SEMANTIC_GAP_THRESHOLD,
+                    report_mode: str = "llm", summarize: bool = False,
+                    index_path=INDEX_PATH, chunks_path=CHUNKS_PATH):
+    """
+    Generate compliance gap analysis report.
+    report_mode="evidence" skips answer generation: every mapped clause is
+    looked up in the indexed policy directly and tagged with its supporting
+    section and score; with `summarize`, the LLM is asked about the gaps only.
+    index_path / chunks_path select the knowledge base (e.g. a benchmark corpus).
+    """
+    if report_mode not in REPORT_MODES:
+        raise ValueError(f"Unknown report mode {report_mode!r}, expected one of {REPORT_MODES}")
+    queries = REPORT_QUERIES
+    sections = [q["section"] for q in queries]
+
+    start = time.perf_counter()
     mappings = load_compliance_mapping()
+    if report_mode == "evidence":
+        analyses = analyze_direct_evidence(sections, mappings, threshold=gap_threshold,
+                                           index_path=index_path, chunks_path=chunks_path)
+        if summarize:
+            responses = summarize_gaps(analyses, concurrency=concurrency)
+        else:
+            responses = ["Not generated (direct evidence mode, see Evidence)."] * len(queries)
+    else:
+        retrieved = retrieve_chunks_batch([q["query"] for q in queries], index_path, chunks_path)
+        responses = run_report_queries(queries, concurrency=concurrency, index_path=index_path,
+                                       chunks_path=chunks_path, retrieved=retrieved)
+        analyses = [analysis + (None, None) for analysis in
+                    analyze_compliance_batch(responses, sections, mappings, mode=gap_mode,
+                                             evidence=retrieved, threshold=gap_threshold)]
     report_content = ["# Compliance Gap Analysis Report\n", "## Summary\n"]
 
-    for q in queries:
-        logger.info(f"Processing query: {q['query']}")
-        response = query_knowledge_base(q["query"])
-        status, gaps, pci_gaps, iso_gaps = analyze_compliance(response, q["section"], mappings)
+    for q, response, (status, gaps, pci_gaps, iso_gaps, evidence, _) in zip(queries, responses, analyses):
         risk = assign_risk_level(q["query"])
 
         report_content.append(f"### Query: {q['query']}\n")
@@ -123,6 +211,11 @@ def generate_report(output_path="data/output/compliance_report.md"):
         else:
             report_content.append("- None\n")
 
+        if evidence is not None:
+            report_content.append("**Evidence**:\n")
+            for line in evidence or ["None"]:
+                report_content.append(f"- {line}\n")
+
         report_content.append("\n")
 
     # Save report
@@ -130,7 +223,21 @@ def generate_report(output_path="data/output/compliance_report.md"):
     output_file.parent.mkdir(parents=True, exist_ok=True)
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write("\n".join(report_content))
-    logger.info(f"Report generated at {output_path}")
+    logger.info(f"Report generated at {output_path} in {time.perf_counter() - start:.1f}s")
 
 if __name__ == "__main__":
-    generate_report()
+    parser = argparse.ArgumentParser(description="Generate the compliance gap analysis report")
+    parser.add_argument("--output", default="data/output/compliance_report.md")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="number of queries sent to the LLM in parallel (1 = sequential)")
+    parser.add_argument("--gap-mode", choices=GAP_MODES, default="exact",
+                        help="exact substring clause matching, or semantic similarity as well")
+    parser.add_argument("--gap-threshold", type=float, default=SEMANTIC_GAP_THRESHOLD,
+                        help="cosine similarity at which a clause counts as addressed (semantic mode)")
+    parser.add_argument("--mode", choices=REPORT_MODES, default="llm",
+                        help="llm: answer each report query; evidence: retrieve policy text per clause, no LLM")
+    parser.add_argument("--summarize-gaps", action="store_true",
+                        help="evidence mode: ask the LLM about the gaps only")
+    args = parser.parse_args()
+    generate_report(args.output, concurrency=args.concurrency, gap_mode=args.gap_mode,
+                    gap_threshold=args.gap_threshold, report_mode=args.mode, summarize=args.summarize_gaps)
@@ -0,0 +1,94 @@
+import logging
+
+import numpy as np
+
+from src.compliance_analysis.mapping_index import gap_status, get_mapping_index
+from src.rag_pipeline.embedding_service import EMBEDDING_MODEL_NAME, encode_normalized
+
+logger = logging.getLogger(__name__)
+
+# Cosine similarity at or above which a clause counts as addressed by the evidence
+SEMANTIC_GAP_THRESHOLD = 0.5
+
+
+class SemanticGapDetector:
+    """
+    Semantic counterpart of analyze_compliance for a whole report at once.
+
+    Every distinct clause description of the mapping is embedded once (unit
+    vectors, through the on-disk embedding cache). A batch of analyses
+    encodes all evidence texts (responses, retrieved chunks) in one encoder
+    call, then scores every clause of each item's mapping against that item's
+    evidence with matrix multiplies (see score). A clause is addressed when
+    its description appears verbatim in the evidence (the exact check) or its
+    best similarity reaches the threshold.
+
+    `encode(texts, cache)` returns unit-length float32 vectors; it defaults
+    to the shared query encoder (cache=False for one-off texts).
+    """
+
+    def __init__(self, mappings: list, threshold: float = SEMANTIC_GAP_THRESHOLD,
+                 model_name: str = EMBEDDING_MODEL_NAME, backend: str = None, encode=None):
+        self.index = get_mapping_index(mappings)
+        self.threshold = threshold
+        self._encode = encode or (lambda texts, cache: encode_normalized(texts, model_name, backend,
+                                                                           use_cache=cache))
+        rows = {}
+        self._rows = []  # per mapping: description row of each clause, in clause order
+        for position in range(len(mappings)):
+            self._rows.append(np.array([rows.setdefault(desc, len(rows))
+                                        for _, _, desc, _ in self.index.clauses(position)], dtype=np.int64))
+        descriptions = list(rows)
+        self.clause_vectors = self._encode(descriptions, True) if descriptions else np.zeros((0, 0), dtype=np.float32)
+        logger.info(f"Embedded {len(descriptions)} clause descriptions")
+
+    def score(self, positions: list, evidence_vectors: np.ndarray, evidence_offsets: np.ndarray) -> list:
+        """
+        Best similarity of each clause to its item's evidence.
+        `positions` are mapping positions (None = section not mapped); item i's
+        evidence vectors are rows evidence_offsets[i]:evidence_offsets[i + 1].
+        Returns one float32 array per item, in clause order (-1 without evidence).
+
+        Only the diagonal blocks of the clauses x evidence similarity matrix
+        are needed (each section's clauses against its own evidence), so each
+        block is one BLAS multiply; the full matrix would be as many times
+        larger as there are sections.
+        """
+        scores = []
+        for i, position in enumerate(positions):
+            rows = self._rows[position] if position is not None else ()
+            evidence = evidence_vectors[evidence_offsets[i]:evidence_offsets[i + 1]]
+            if len(rows) and len(evidence):
+                scores.append((self.clause_vectors[rows] @ evidence.T).max(axis=1))
+            else:
+                scores.append(np.full(len(rows), -1.0, dtype=np.float32))
+        return scores
+
+    def analyze_batch(self, items: list, threshold: float = None) -> list:
+        """
+        items: [(section, [evidence text, ...]), ...]. Returns one
+        (status, gaps, pci_gaps, iso_gaps) tuple per item, like analyze_compliance.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        positions = [self.index.find_mapping(section) for section, _ in items]
+        texts = [text for _, evidence in items for text in evidence]
+        offsets = np.zeros(len(items) + 1, dtype=np.int64)
+        np.cumsum([len(evidence) for _, evidence in items], out=offsets[1:])
+        # Responses are one-off texts, so they skip the embedding cache
+        vectors = self._encode(texts, False) if texts else np.zeros((0, 0), dtype=np.float32)
+        item_scores = self.score(positions, vectors, offsets)
+
+        results = []
+        for (section, evidence), position, scores in zip(items, positions, item_scores):
+            if position is None:
+                results.append(("Unknown", ["Section not found in compliance mapping"], [], []))
+                continue
+            text = "\n".join(evidence).lower()
+            pci_gaps, iso_gaps, gaps = [], [], []
+            for (label, clause, desc, lowered), score in zip(self.index.clauses(position), scores):
+                if score < threshold and lowered not in text:
+                    gap_text = f"{label} {clause}: Missing {desc}"
+                    gaps.append(gap_text)
+                    (pci_gaps if label == "PCI-DSS" else iso_gaps).append(gap_text)
+            results.append((gap_status(len(gaps), self.index.clause_count(position)), gaps, pci_gaps, iso_gaps))
+        return results
@@ -1,71 +1,189 @@
 import re
 import json
 from pathlib import Path
-from typing import List
+from typing import Callable, Iterator, List, Optional
 
-def chunk_text(text: str, max_words: int = 500) -> List[dict]:
+# Section number + title (allowing optional trailing numbers/page artifacts)
+SECTION_PATTERN = re.compile(r'(\d+(\.\d+){0,2})\s+([^\n]+)')
+PAGE_MARKER_PATTERN = re.compile(r'page\s*\d+\s*of\s*\d+', re.IGNORECASE)
+NEWLINES_PATTERN = re.compile(r'\n+')
+
+CHUNKS_OUTPUT_PATH = Path("data/input/chunks_structured.json")
+
+
+def load_tokenizer(model_name: str):
+    """Load the Hugging Face tokenizer behind a sentence-transformers model name."""
+    from transformers import AutoTokenizer  # type: ignore
+    if "/" not in model_name and not Path(model_name).exists():
+        model_name = f"sentence-transformers/{model_name}"
+    return AutoTokenizer.from_pretrained(model_name)
+
+
+def token_counter(tokenizer) -> Callable[[List[str]], List[int]]:
     """
-    Split policy text by section headings (e.g., 4, 4.1, 4.1.1) and keep sections intact.
-    Very long sections are split into ~max_words word chunks.
-    Returns a list of dicts: {"section": ..., "title": ..., "text": ...}
+    Return count(words) -> number of tokens per word for a Hugging Face tokenizer.
+    WordPiece/BPE tokenizers split on whitespace before sub-word splitting, so
+    per-word counts add up to the count for the joined text. Counts are cached
+    per distinct word, which keeps tokenizer calls proportional to the vocabulary.
+    """
+    cache = {}
+
+    def count(words: List[str]) -> List[int]:
+        missing = [w for w in dict.fromkeys(words) if w not in cache]
+        if missing:
+            ids = tokenizer(missing, add_special_tokens=False)["input_ids"]
+            cache.update(zip(missing, map(len, ids)))
+        return [cache[w] for w in words]
+
+    return count
+
+
+_budget_counters = {}  # tokenizer name -> (count_tokens, special tokens per text), or None if unavailable
+
+
+def token_budget(tokenizer_name: str, max_seq_length: Optional[int]) -> dict:
+    """
+    chunk_text keyword arguments that keep each chunk within an encoder's
+    `max_seq_length` (less the special tokens it adds), so the encoder sees
+    the whole chunk instead of truncating it. Returns {} - chunking by
+    max_words - when the limit is unknown or the tokenizer cannot be loaded.
     """
-    # Regex to match section number + title (allowing optional trailing numbers/page artifacts)
-    section_pattern = r'(\d+(\.\d+){0,2})\s+([^\n]+)'
+    if not max_seq_length:
+        return {}
+    if tokenizer_name not in _budget_counters:
+        try:
+            tokenizer = load_tokenizer(tokenizer_name)
+            _budget_counters[tokenizer_name] = (token_counter(tokenizer), tokenizer.num_special_tokens_to_add())
+        except Exception as e:
+            print(f"Could not load tokenizer {tokenizer_name} ({e}), chunking by words instead")
+            _budget_counters[tokenizer_name] = None
+    if _budget_counters[tokenizer_name] is None:
+        return {}
+    count_tokens, special = _budget_counters[tokenizer_name]
+    return {"max_tokens": max_seq_length - special, "count_tokens": count_tokens}
 
-    # Find all section headings
-    matches = list(re.finditer(section_pattern, text))
 
-    chunks = []
+def _clean_section(section_text: str) -> str:
+    # Remove page numbers, then collapse newlines into spaces
+    section_text = PAGE_MARKER_PATTERN.sub('', section_text)
+    section_text = NEWLINES_PATTERN.sub(' ', section_text)
+    return section_text.strip()
 
-    for i, match in enumerate(matches):
-        section_num = match.group(1)
-        title = match.group(3).strip()
 
-        # Determine text range for this section
-        start = match.end()
-        end = matches[i+1].start() if i+1 < len(matches) else len(text)
+def _windows(counts: List[int], budget: int, overlap: int) -> Iterator[tuple]:
+    """
+    Yield (start, end) word ranges whose token counts fit in `budget`, each
+    starting `overlap` tokens (rounded to whole words) before the previous end.
+    A single word longer than the budget becomes its own window.
+    """
+    n = len(counts)
+    start = 0
+    while start < n:
+        end, used = start, 0
+        while end < n and (end == start or used + counts[end] <= budget):
+            used += counts[end]
+            end += 1
+        yield start, end
+        if end == n:
+            return
+        back, carried = end, 0
+        # Keep the overlap small enough that the next window still reaches past `end`
+        while (back - 1 > start and carried + counts[back - 1] <= overlap
+               and carried + counts[back - 1] + counts[end] <= budget):
+            back -= 1
+            carried += counts[back]
+        start = back
+
+
+def iter_chunks(text: str, max_words: int = 500, max_tokens: Optional[int] = None,
+                overlap: int = 0, count_tokens: Optional[Callable] = None) -> Iterator[dict]:
+    """
+    Walk `text` once, yielding {"section", "title", "text"} chunks section by
+    section. Sections longer than the budget are split into windows of whole
+    words: `max_words` words by default, or `max_tokens` tokens when a
+    `count_tokens` function (see token_counter) is given. `overlap` is counted
+    in the same unit and repeats the tail of one window at the start of the next.
+    """
+    if max_tokens is not None and count_tokens is None:
+        raise ValueError("max_tokens requires count_tokens (see token_counter)")
+    budget = max_tokens if max_tokens is not None else max_words
+    if not 0 <= overlap < budget:
+        raise ValueError(f"overlap must be in [0, {budget})")
+
+    previous = None
+    for match in SECTION_PATTERN.finditer(text):
+        if previous is not None:
+            yield from _section_chunks(previous, text[previous.end():match.start()], budget, overlap, count_tokens)
+        previous = match
+    if previous is not None:
+        yield from _section_chunks(previous, text[previous.end():], budget, overlap, count_tokens)
+
 
-        # Extract section text
-        section_text = text[start:end]
+def _section_chunks(match, section_text: str, budget: int, overlap: int, count_tokens) -> Iterator[dict]:
+    section_num = match.group(1)
+    title = match.group(3).strip()
+    section_text = _clean_section(section_text)
 
-        # Clean text: remove page numbers, multiple newlines, and extra spaces
-        section_text = re.sub(r'page\s*\d+\s*of\s*\d+', '', section_text, flags=re.IGNORECASE)
-        section_text = re.sub(r'\n+', ' ', section_text)  # replace newlines with space
-        section_text = section_text.strip()
+    # Skip sections with no text
+    if not section_text:
+        section_text = "[No text extracted]"  # optional placeholder
 
-        # Skip sections with no text
-        if not section_text:
-            section_text = "[No text extracted]"  # optional placeholder
+    words = section_text.split()
+    counts = count_tokens(words) if count_tokens else [1] * len(words)
+    if sum(counts) <= budget:
+        yield {"section": section_num, "title": title, "text": section_text}
+        return
+    for start, end in _windows(counts, budget, overlap):
+        yield {"section": section_num, "title": title, "text": " ".join(words[start:end])}
 
-        # Split long sections into smaller chunks
-        words = section_text.split()
-        if len(words) > max_words:
-            for j in range(0, len(words), max_words):
-                chunk_text_str = " ".join(words[j:j+max_words])
-                chunks.append({"section": section_num, "title": title, "text": chunk_text_str})
-        else:
-            chunks.append({"section": section_num, "title": title, "text": section_text})
 
-    # Save structured chunks
-    output_path = Path("data/input/chunks_structured.json")
+def chunk_text(text: str, max_words: int = 500, max_tokens: Optional[int] = None,
+               overlap: int = 0, count_tokens: Optional[Callable] = None) -> List[dict]:
+    """
+    Split policy text by section headings (e.g., 4, 4.1, 4.1.1) and keep sections intact.
+    Very long sections are split into ~max_words word chunks (or max_tokens
+    tokens, see iter_chunks). Nothing is written to disk; use save_chunks.
+    Returns a list of dicts: {"section": ..., "title": ..., "text": ...}
+    """
+    return list(iter_chunks(text, max_words=max_words, max_tokens=max_tokens,
+                            overlap=overlap, count_tokens=count_tokens))
+
+
+def save_chunks(chunks: List[dict], output_path: Path = CHUNKS_OUTPUT_PATH) -> Path:
+    """Save structured chunks as JSON."""
+    output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(chunks, f, indent=2, ensure_ascii=False)
 
     print(f"Structured chunks saved to {output_path}")
-    return chunks
+    return output_path
 
 # -------------------------------
 # Run script
 # -------------------------------
 if __name__ == "__main__":
-    from extract_text import extract_pdf_text  # your existing PDF extractor
+    import argparse
+    from src.pdf_processing.extract_text import extract_pdf_text
+    from src.rag_pipeline.embedding_service import EMBEDDING_MODEL_NAME
+
+    parser = argparse.ArgumentParser(description="Chunk the policy PDF into structured sections")
+    parser.add_argument("--max-words", type=int, default=500)
+    parser.add_argument("--max-tokens", type=int, default=None,
+                        help="split on tokenizer length instead of words")
+    parser.add_argument("--tokenizer", default=EMBEDDING_MODEL_NAME,
+                        help="model whose tokenizer measures --max-tokens (default: the embedding model)")
+    parser.add_argument("--overlap", type=int, default=0, help="overlap between split windows (words or tokens)")
+    args = parser.parse_args()
 
     pdf_path = Path("data/input/information_security_policy_v4.0.pdf")
     text = extract_pdf_text(pdf_path)
 
     if text:
-        chunks = chunk_text(text, max_words=500)
+        count_tokens = token_counter(load_tokenizer(args.tokenizer)) if args.max_tokens else None
+        chunks = chunk_text(text, max_words=args.max_words, max_tokens=args.max_tokens,
+                            overlap=args.overlap, count_tokens=count_tokens)
+        save_chunks(chunks)
         print(f"Created {len(chunks)} structured chunks.")
         if chunks:
             print(f"First chunk:\n{chunks[0]['section']} - {chunks[0]['title']}\n{chunks[0]['text'][:500]}")
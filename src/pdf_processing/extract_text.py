@@ -1,47 +1,144 @@
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import pdfplumber # type: ignore
 import PyPDF2 # type: ignore
 from pathlib import Path
 
-def extract_pdf_text(pdf_path: Path):
-    """Extract text from a PDF using pdfplumber first, then PyPDF2 fallback."""
-    text = ""
+DEBUG_TEXT_PATH = Path("data/input/extracted_text.txt")
+# A page with fewer non-whitespace characters than this from pdfplumber is retried with PyPDF2
+MIN_PAGE_CHARS = 20
+PAGES_PER_TASK = 16
+
+class _PageExtractor:
+    """pdfplumber per page, with PyPDF2 opened lazily for pages pdfplumber can't read."""
+
+    def __init__(self, pdf_path: Path):
+        self.pdf_path = pdf_path
+        self._plumber = pdfplumber.open(pdf_path)
+        self._reader_file = None
+        self._reader = None
+
+    def __len__(self) -> int:
+        return len(self._plumber.pages)
+
+    def page_text(self, n: int) -> str:
+        page = self._plumber.pages[n]
+        text = page.extract_text() or ""
+        # Release pdfplumber's per-page layout cache so memory stays flat over long documents
+        page.close()
+        if len("".join(text.split())) < MIN_PAGE_CHARS:
+            if self._reader is None:
+                self._reader_file = open(self.pdf_path, 'rb')
+                self._reader = PyPDF2.PdfReader(self._reader_file)
+            fallback = self._reader.pages[n].extract_text() or ""
+            if len(fallback.strip()) > len(text.strip()):
+                text = fallback
+        return text
+
+    def close(self):
+        self._plumber.close()
+        if self._reader_file:
+            self._reader_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def count_pages(pdf_path: Path) -> int:
+    with open(pdf_path, 'rb') as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+def iter_pdf_pages(pdf_path: Path, start: int = 0, stop: int = None):
+    """Yield (page_number, text) for pages [start, stop), one page in memory at a time."""
+    with _PageExtractor(pdf_path) as extractor:
+        stop = len(extractor) if stop is None else min(stop, len(extractor))
+        for n in range(start, stop):
+            yield n, extractor.page_text(n)
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> list:
+    """Process-pool worker: [(page_number, text), ...] for one page range."""
+    return list(iter_pdf_pages(Path(pdf_path), start, stop))
+
+def iter_pdf_pages_parallel(pdf_path: Path, workers: int = None, pages_per_task: int = PAGES_PER_TASK):
+    """
+    iter_pdf_pages split into page ranges across a process pool. Pages are
+    yielded in document order, and at most 2 * workers ranges are in flight,
+    so memory stays bounded however long the document is.
+    """
+    workers = workers or os.cpu_count() or 1
+    n_pages = count_pages(pdf_path)
+    ranges = [(s, min(s + pages_per_task, n_pages)) for s in range(0, n_pages, pages_per_task)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for start, stop in ranges:
+            in_flight.append(executor.submit(_extract_page_range, str(pdf_path), start, stop))
+            if len(in_flight) >= 2 * workers:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+def extract_pdf_text(pdf_path: Path, workers: int = 1, debug_path: Path = None):
+    """
+    Extract text from a PDF page by page: pdfplumber first, PyPDF2 for pages it can't read.
+    workers > 1 extracts page ranges in parallel processes. The text is only
+    written to `debug_path` when one is given.
+    """
     try:
-        # pdfplumber extraction
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-
-        # Fallback to PyPDF2 if text is too short
-        if len(text.strip()) < 500:
-            print("pdfplumber extracted insufficient text, trying PyPDF2...")
-            text = ""
-            with open(pdf_path, 'rb') as f:
-                reader = PyPDF2.PdfReader(f)
-                for page in reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
+        pages = iter_pdf_pages(pdf_path) if workers <= 1 else iter_pdf_pages_parallel(pdf_path, workers)
+        text = "".join(page_text + "\n" for _, page_text in pages if page_text)
 
         # Save extracted text
-        debug_path = Path("data/input/extracted_text.txt")
-        debug_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(debug_path, 'w', encoding='utf-8') as f:
-            f.write(text)
-        print(f"Extracted text saved to {debug_path}")
+        if debug_path:
+            debug_path = Path(debug_path)
+            debug_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(debug_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            print(f"Extracted text saved to {debug_path}")
 
         return text
     except Exception as e:
         print(f"Error extracting text from {pdf_path}: {e}")
         return None
 
+def page_fingerprints(pdf_path: Path) -> list:
+    """
+    Cheap per-page change detector: hash of each page's raw content streams and
+    media box. Reads the PDF structure only, no text layout analysis.
+    """
+    fingerprints = []
+    with open(pdf_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        for page in reader.pages:
+            h = hashlib.sha1()
+            contents = page.get("/Contents")
+            if contents is not None:
+                contents = contents.get_object()
+                for stream in (contents if isinstance(contents, list) else [contents]):
+                    h.update(stream.get_object().get_data())
+            h.update(repr(page.mediabox).encode("utf-8"))
+            fingerprints.append(h.hexdigest())
+    return fingerprints
+
+def extract_pdf_pages(pdf_path: Path, page_numbers: list = None) -> dict:
+    """
+    Extract text for the given 0-based pages (all pages if None): {page_number: text}.
+    Same per-page PyPDF2 fallback as extract_pdf_text. Writes no debug files.
+    """
+    if page_numbers is None:
+        return dict(iter_pdf_pages(pdf_path))
+    with _PageExtractor(pdf_path) as extractor:
+        return {n: extractor.page_text(n) for n in page_numbers}
+
 if __name__ == "__main__":
     pdf_path = Path("data/input/information_security_policy_v4.0.pdf")
     if not pdf_path.exists():
         print(f"PDF file not found at {pdf_path}")
     else:
-        extracted_text = extract_pdf_text(pdf_path)
+        extracted_text = extract_pdf_text(pdf_path, debug_path=DEBUG_TEXT_PATH)
         if extracted_text:
             print("Text extracted successfully.")
             print(f"First 500 characters:\n{extracted_text[:500]}")
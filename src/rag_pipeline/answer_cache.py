@@ -0,0 +1,147 @@
+# src/rag_pipeline/answer_cache.py
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Case/whitespace/trailing-punctuation insensitive form of a query."""
+    return _WHITESPACE.sub(" ", query.lower()).strip().rstrip("?.! ")
+
+
+def chunk_id(text: str) -> str:
+    """Content-addressed id of a retrieved chunk."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def make_key(query: str, chunk_ids: list, prompt_version: str, model_name: str) -> str:
+    """Cache key: normalized query + retrieved chunk ids (in rank order) + prompt/model version."""
+    parts = [normalize_query(query), ",".join(chunk_ids), prompt_version, model_name]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def _generation(paths: tuple) -> str:
+    """Fingerprint of the files answers depend on; changes whenever one is rebuilt."""
+    parts = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            parts.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+        except OSError:
+            parts.append(f"{path}:missing")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """
+    LLM answer cache: in-memory LRU with TTL, plus an optional SQLite tier that
+    survives restarts. Each entry remembers the files it was answered from:
+    `watch_paths` (the compliance mapping) plus the `sources` given to put()
+    (the queried knowledge base's index and chunks). It is dropped on the
+    next lookup once any of them changes on disk, so knowledge bases other
+    than the default invalidate their own answers.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 24 * 3600,
+                 db_path=None, watch_paths: tuple = ()):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.watch_paths = tuple(str(p) for p in watch_paths)
+        self._entries = OrderedDict()  # key -> (expires_at, generation, value)
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, generation TEXT NOT NULL)"
+            )
+            # Rows from older generations never match a lookup; they go once expired
+            self._db.execute("DELETE FROM answers WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+
+    def _generation_of(self, sources: tuple) -> str:
+        return _generation(self.watch_paths + tuple(str(p) for p in sources))
+
+    # ---------- public API ----------
+    def get(self, key: str, sources: tuple = ()):
+        """Return the cached answer or None (also when one of its files changed since it was stored)."""
+        now = time.time()
+        generation = self._generation_of(sources)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, entry_generation, value = entry
+                if expires_at > now and entry_generation == generation:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                if entry_generation != generation:
+                    logger.info("Knowledge base or mapping changed, dropping cached answer")
+                    self.invalidations += 1
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM answers WHERE key = ? AND generation = ?",
+                    (key, generation)).fetchone()
+                if row and row[1] > now:
+                    self._remember(key, row[0], row[1], generation)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str, sources: tuple = ()):
+        """Store an answer generated from `sources` (and the watched files) as they are now."""
+        expires_at = time.time() + self.ttl_seconds
+        generation = self._generation_of(sources)
+        with self._lock:
+            self._remember(key, value, expires_at, generation)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?)",
+                                 (key, value, expires_at, generation))
+                self._db.commit()
+
+    def _remember(self, key: str, value: str, expires_at: float, generation: str):
+        self._entries[key] = (expires_at, generation, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM answers")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,107 @@
+# src/rag_pipeline/batch_scheduler.py
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = 32  # queries per encoder/FAISS call
+MAX_WAIT = 0.005  # seconds a batch stays open for more queries after the first
+MAX_QUEUE = 256  # queued queries before new ones are rejected
+
+
+class Overloaded(Exception):
+    """The scheduler queue is full; the caller should shed the request (HTTP 503)."""
+
+
+class BatchScheduler:
+    """
+    Coalesces concurrent single-query calls into micro-batches for a batch
+    function (e.g. retrieve_chunk_records_batch: one encoder batch and one
+    FAISS search for all of them).
+
+    submit() enqueues a query and awaits its result. A single loop task takes
+    the first waiting query, keeps the batch open until it has `max_batch`
+    queries or `max_wait` has passed, and runs the batch function on a
+    dedicated worker thread so the event loop stays free. Queries whose
+    caller already gave up (timeout, disconnect) are dropped before the
+    batch runs. The queue is bounded: when `max_queue` queries are waiting,
+    submit() raises Overloaded instead of queueing more work than can be
+    served in time.
+    """
+
+    def __init__(self, batch_fn, max_batch: int = MAX_BATCH, max_wait: float = MAX_WAIT,
+                 max_queue: int = MAX_QUEUE, name: str = "batch-scheduler"):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.name = name
+        self._queue = None
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self.batches = 0
+        self.batched_queries = 0
+
+    def start(self):
+        """Start the batching loop on the running event loop."""
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.get_running_loop().create_task(self._run(), name=self.name)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown(wait=False)
+
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, item, timeout: float = None):
+        """Result of batch_fn for `item`; raises Overloaded when the queue is full, TimeoutError after `timeout`."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            raise Overloaded(f"{self.name}: {self.max_queue} queries already queued") from None
+        return await asyncio.wait_for(future, timeout)
+
+    async def _next_batch(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - loop.time()
+            try:
+                if remaining > 0:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [(item, future) for item, future in await self._next_batch() if not future.done()]
+            if not batch:
+                continue
+            self.batches += 1
+            self.batched_queries += len(batch)
+            try:
+                results = await loop.run_in_executor(self._executor, self.batch_fn, [item for item, _ in batch])
+            except Exception as e:
+                logger.error(f"{self.name}: batch of {len(batch)} failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
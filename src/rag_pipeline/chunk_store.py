@@ -0,0 +1,248 @@
+# src/rag_pipeline/chunk_store.py
+
+import json
+import logging
+import mmap
+import os
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STORE_MAGIC = b"RAGCHNK\x01"
+STORE_SUFFIX = ".chunks"
+# Per-record string fields, stored back to back in the blob
+FIELDS = ("section", "title", "text", "extra")
+_HEADER = 32  # magic, record count, id-table length, flags (8 bytes each)
+_HAS_IDS = 1
+
+
+def store_path_for(chunks_path) -> Path:
+    """The binary store lives next to the JSON: chunks_structured.json -> chunks_structured.chunks"""
+    return Path(chunks_path).with_suffix(STORE_SUFFIX)
+
+
+class ChunkRecord:
+    """
+    One chunk read from a ChunkStore. Behaves like the chunk dicts from the
+    JSON files for reading (chunk["text"], chunk.get("section"), {**chunk}).
+    Extra keys (doc_id, source, ...) are decoded on first access.
+    """
+
+    __slots__ = ("id", "section", "title", "text", "_extra", "_has_id")
+
+    def __init__(self, chunk_id: int, section: str, title: str, text: str, extra, has_id: bool):
+        self.id = chunk_id
+        self.section = section
+        self.title = title
+        self.text = text
+        self._extra = extra
+        self._has_id = has_id
+
+    @property
+    def extra(self) -> dict:
+        if isinstance(self._extra, str):
+            self._extra = json.loads(self._extra) if self._extra else {}
+        return self._extra
+
+    def keys(self) -> list:
+        return (["id"] if self._has_id else []) + ["section", "title", "text"] + list(self.extra)
+
+    def __getitem__(self, key):
+        if key in ("section", "title", "text") or (key == "id" and self._has_id):
+            return getattr(self, key)
+        return self.extra[key]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key) -> bool:
+        return key in self.keys()
+
+    def to_dict(self) -> dict:
+        return {key: self[key] for key in self.keys()}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ChunkRecord):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    # Equal to the (unhashable) chunk dict it stands for, so unhashable like it
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ChunkRecord(id={self.id}, section={self.section!r}, title={self.title!r})"
+
+
+class ChunkStore:
+    """
+    Read-only, memory-mapped chunk table.
+
+    File layout (little-endian, 8-byte aligned):
+      header     magic, n records, id-table length, flags
+      positions  int64[id-table length]  FAISS id -> record position (-1 = removed id)
+      ids        int64[n]                record position -> FAISS id
+      bounds     int64[4n + 1]           field boundaries in the blob, FIELDS order
+      blob       UTF-8 bytes
+
+    get(faiss_id) is two table reads and four slices of the blob, so opening a
+    store and looking up a few chunks costs the same for any corpus size;
+    pages of the file are loaded by the OS only when they are touched.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:8] != STORE_MAGIC:
+            raise ValueError(f"{self.path} is not a chunk store")
+        # int64 views straight over the mapping (native order; the stores are
+        # written little-endian, like every platform FAISS ships for)
+        view = memoryview(self._mm)
+        n, n_ids, flags = view[8:_HEADER].cast("q")
+        self._view = view
+        self._n, self._has_ids = n, bool(flags & _HAS_IDS)
+        sizes = (n_ids, n, len(FIELDS) * n + 1)
+        offset = _HEADER
+        tables = []
+        for size in sizes:
+            tables.append(view[offset:offset + 8 * size].cast("q"))
+            offset += 8 * size
+        self._positions, self._ids, self._bounds = tables
+        self._blob = offset
+
+    def __len__(self) -> int:
+        return self._n
+
+    def record(self, position: int) -> ChunkRecord:
+        """The chunk at `position` in build order."""
+        start = len(FIELDS) * position
+        b0, b1, b2, b3, b4 = (self._blob + b for b in self._bounds[start:start + len(FIELDS) + 1])
+        mm = self._mm
+        return ChunkRecord(self._ids[position], mm[b0:b1].decode("utf-8"), mm[b1:b2].decode("utf-8"),
+                           mm[b2:b3].decode("utf-8"), mm[b3:b4].decode("utf-8"), self._has_ids)
+
+    def get(self, chunk_id: int, default=None):
+        """Chunk by FAISS id (the list position for indexes built without ids)."""
+        if not 0 <= chunk_id < len(self._positions):
+            return default
+        position = self._positions[chunk_id]
+        return self.record(position) if position >= 0 else default
+
+    def values(self):
+        for position in range(self._n):
+            yield self.record(position)
+
+    __iter__ = values
+
+    def close(self):
+        for view in (self._positions, self._ids, self._bounds, self._view):
+            view.release()
+        self._mm.close()
+
+
+def write_chunk_store(chunks: list, path) -> Path:
+    """
+    Write `chunks` (dicts with section/title/text, optionally "id" and extra
+    keys) as a ChunkStore. Written to a temp file and renamed into place, so
+    readers that still have the old file mapped are unaffected.
+    """
+    path = Path(path)
+    has_ids = bool(chunks) and "id" in chunks[0]
+    ids = np.array([c["id"] for c in chunks] if has_ids else range(len(chunks)), dtype="<i8")
+    positions = np.full(int(ids.max()) + 1 if len(ids) else 0, -1, dtype="<i8")
+    positions[ids] = np.arange(len(ids))
+
+    parts = []
+    for chunk in chunks:
+        extra = {k: v for k, v in chunk.items() if k not in ("id", "section", "title", "text")}
+        parts.extend((str(chunk.get("section", "")), str(chunk.get("title", "")), chunk.get("text", ""),
+                      json.dumps(extra, ensure_ascii=False) if extra else ""))
+    encoded = [p.encode("utf-8") for p in parts]
+    bounds = np.zeros(len(encoded) + 1, dtype="<i8")
+    np.cumsum([len(b) for b in encoded], out=bounds[1:])
+
+    header = np.array([len(ids), len(positions), _HAS_IDS if has_ids else 0], dtype="<i8")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(STORE_MAGIC)
+        f.write(header.tobytes())
+        f.write(positions.tobytes())
+        f.write(ids.tobytes())
+        f.write(bounds.tobytes())
+        f.write(b"".join(encoded))
+    os.replace(tmp, path)
+    return path
+
+
+def file_signature(path) -> tuple:
+    """Cheap change detector for a file on disk: (mtime_ns, size)."""
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def resolve_chunks_path(chunks_path) -> Path:
+    """
+    The file the query path should read for `chunks_path`: the binary store
+    next to it when that is at least as new as the JSON, else the JSON itself.
+    """
+    chunks_path = Path(chunks_path)
+    if chunks_path.suffix == STORE_SUFFIX:
+        return chunks_path
+    store = store_path_for(chunks_path)
+    if store.exists() and (not chunks_path.exists()
+                           or os.stat(store).st_mtime_ns >= os.stat(chunks_path).st_mtime_ns):
+        return store
+    return chunks_path
+
+
+def open_chunks(chunks_path):
+    """
+    Return a {faiss_id: chunk} lookup for `chunks_path`: a ChunkStore when a
+    current binary store exists, otherwise the JSON loaded into a dict.
+    Both support get(), values() and len().
+    """
+    path = resolve_chunks_path(chunks_path)
+    if path.suffix == STORE_SUFFIX:
+        return ChunkStore(path)
+    logger.warning(f"No binary chunk store for {path}, loading JSON "
+                   f"(python -m src.rag_pipeline.chunk_store {path} converts it)")
+    with open(path, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    # Incrementally built indexes carry explicit FAISS ids; older ones use list positions
+    if chunks and "id" in chunks[0]:
+        return {c["id"]: c for c in chunks}
+    return dict(enumerate(chunks))
+
+
+def migrate(chunks_path) -> Path:
+    """Convert a chunks JSON file into a binary store next to it and verify it."""
+    chunks_path = Path(chunks_path)
+    with open(chunks_path, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    store_path = write_chunk_store(chunks, store_path_for(chunks_path))
+    store = ChunkStore(store_path)
+    try:
+        if len(store) != len(chunks) or any(r != c for r, c in zip(store.values(), chunks)):
+            raise ValueError(f"Verification of {store_path} failed")
+    finally:
+        store.close()
+    return store_path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert chunks JSON files into binary chunk stores")
+    parser.add_argument("chunks_paths", nargs="+", help="chunks JSON files (e.g. data/knowledge_base/chunks_structured.json)")
+    args = parser.parse_args()
+
+    for chunks_path in args.chunks_paths:
+        store_path = migrate(chunks_path)
+        print(f"{chunks_path} ({os.path.getsize(chunks_path) / 1e3:.0f} kB) -> "
+              f"{store_path} ({os.path.getsize(store_path) / 1e3:.0f} kB)")
@@ -0,0 +1,207 @@
+# src/rag_pipeline/context_packer.py
+
+import json
+import logging
+import math
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from src.pdf_processing.chunk_text import load_tokenizer, token_counter
+from src.rag_pipeline.embedding_cache import get_embedding_cache, text_hash
+from src.rag_pipeline.embedding_service import EMBEDDING_MODEL_NAME, cache_name, default_backend
+
+logger = logging.getLogger(__name__)
+
+# Tokenizer that measures the prompt. The embedding model's tokenizer is always
+# available offline; point RAG_CONTEXT_TOKENIZER at a Llama 3 tokenizer for
+# Groq-exact counts. RAG_CONTEXT_TOKENS is the context budget per prompt.
+CONTEXT_TOKENIZER = os.getenv("RAG_CONTEXT_TOKENIZER", EMBEDDING_MODEL_NAME)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKENS", "3000"))
+NEAR_DUPLICATE_THRESHOLD = 0.95  # cosine similarity above which a lower-ranked chunk adds nothing new
+HEURISTIC_TOKENS_PER_WORD = 1.5  # only when the tokenizer cannot be loaded
+SEPARATOR = "\n"
+SEPARATOR_TOKENS = 1
+TOKEN_COUNTS_SUFFIX = ".tokens.json"
+
+
+def token_counts_path_for(index_path) -> Path:
+    """Per-chunk token counts live next to the FAISS index: index.faiss -> index.tokens.json"""
+    return Path(index_path).with_suffix(TOKEN_COUNTS_SUFFIX)
+
+
+# ===========================
+# Token counting
+# ===========================
+class TokenCounter:
+    """
+    Token counts of chunk texts, memoized per text hash. Counts computed at
+    index time (build_token_counts) are loaded with load(), so the query path
+    normally only looks them up. Falls back to 1.5 tokens per word, with a
+    warning, when the tokenizer cannot be loaded.
+    """
+
+    def __init__(self, tokenizer_name: str = CONTEXT_TOKENIZER):
+        self.tokenizer_name = tokenizer_name
+        self.exact = None  # unknown until the tokenizer is first needed
+        self._count_words = None
+        self._counts = {}
+        self._loaded = {}  # counts file -> mtime it was loaded at
+        self._lock = threading.Lock()
+
+    def _word_counter(self):
+        if self._count_words is None:
+            with self._lock:
+                if self._count_words is None:
+                    try:
+                        self._count_words = token_counter(load_tokenizer(self.tokenizer_name))
+                        self.exact = True
+                    except Exception as e:
+                        logger.warning(f"Could not load tokenizer {self.tokenizer_name} ({e}), "
+                                       f"estimating {HEURISTIC_TOKENS_PER_WORD} tokens per word")
+                        self._count_words = lambda words: [HEURISTIC_TOKENS_PER_WORD] * len(words)
+                        self.exact = False
+        return self._count_words
+
+    def count(self, text: str, memoize: bool = True) -> int:
+        """Tokens in `text`; memoize=False for one-off texts such as queries."""
+        if not memoize:
+            return math.ceil(sum(self._word_counter()(text.split())))
+        return self.counts([text])[0]
+
+    def counts(self, texts: list) -> list:
+        hashes = [text_hash(t) for t in texts]
+        for h, text in zip(hashes, texts):
+            if h not in self._counts:
+                self._counts[h] = math.ceil(sum(self._word_counter()(text.split())))
+        return [self._counts[h] for h in hashes]
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """The longest whole-word prefix of `text` within max_tokens."""
+        words = text.split()
+        used, keep = 0.0, 0
+        for n in self._word_counter()(words):
+            if used + n > max_tokens:
+                break
+            used += n
+            keep += 1
+        return " ".join(words[:keep])
+
+    def load(self, index_path) -> int:
+        """Add the counts stored next to `index_path` (if made with this tokenizer); returns how many."""
+        path = token_counts_path_for(index_path)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return 0
+        if self._loaded.get(path) == mtime:
+            return 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading token counts {path}: {e}")
+            return 0
+        self._loaded[path] = mtime
+        if stored.get("tokenizer") != self.tokenizer_name:
+            logger.info(f"Ignoring {path}: counted with {stored.get('tokenizer')}, not {self.tokenizer_name}")
+            return 0
+        self._counts.update(stored["counts"])
+        return len(stored["counts"])
+
+
+_counters = {}
+_counters_lock = threading.Lock()
+
+
+def get_token_counter(tokenizer_name: str = CONTEXT_TOKENIZER) -> TokenCounter:
+    with _counters_lock:
+        counter = _counters.get(tokenizer_name)
+        if counter is None:
+            counter = _counters[tokenizer_name] = TokenCounter(tokenizer_name)
+        return counter
+
+
+def build_token_counts(chunks: list, index_path, tokenizer_name: str = CONTEXT_TOKENIZER):
+    """Count every chunk's tokens once at index time and save them next to the index (None if no tokenizer)."""
+    counter = get_token_counter(tokenizer_name)
+    texts = [c["text"] if isinstance(c, dict) else c for c in chunks]
+    counts = counter.counts(texts)
+    if not counter.exact:
+        logger.warning("No tokenizer available, token counts not saved")
+        return None
+    path = token_counts_path_for(index_path)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"tokenizer": tokenizer_name, "counts": dict(zip(map(text_hash, texts), counts))}, f)
+    counter._loaded[path] = path.stat().st_mtime_ns
+    return path
+
+
+# ===========================
+# Packing
+# ===========================
+def stored_vectors(texts: list, model_name: str = EMBEDDING_MODEL_NAME) -> tuple:
+    """
+    Unit vectors for `texts` from the embedding cache (the index-time vectors,
+    or those encoded for direct evidence), without running the encoder.
+    Returns (vectors, found); rows of texts with no stored vector are zero.
+    """
+    name = cache_name(model_name, default_backend())
+    vectors, found = None, np.zeros(len(texts), dtype=bool)
+    for cache in (name, f"{name}-normalized"):
+        rows, hits = get_embedding_cache(cache).lookup(texts)
+        new = hits & ~found
+        if not new.any() or (vectors is not None and rows.shape[1] != vectors.shape[1]):
+            continue
+        if vectors is None:
+            vectors = np.zeros_like(rows)
+        vectors[new] = rows[new]
+        found |= new
+    if vectors is None:
+        return np.zeros((len(texts), 0), dtype=np.float32), found
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0), found
+
+
+def pack_context(chunks: list, budget: int = CONTEXT_TOKEN_BUDGET, counter: TokenCounter = None,
+                 near_duplicate: float = NEAR_DUPLICATE_THRESHOLD) -> tuple:
+    """
+    Assemble the LLM context from retrieved chunk texts, best first.
+
+    Whole chunks are taken in rank order while they fit in `budget` tokens; a
+    chunk that does not fit is skipped and smaller lower-ranked ones can
+    still fill the space. A chunk whose stored embedding is at least
+    `near_duplicate` cosine-similar to one already taken is dropped (chunks
+    without a stored vector are always considered). If even the best chunk
+    exceeds the budget, its leading part is used.
+
+    Returns (context, stats) with stats {"tokens", "chunks", "duplicates", "over_budget"}.
+    """
+    counter = counter or get_token_counter()
+    counts = counter.counts(chunks)
+    similar = None
+    if near_duplicate and len(chunks) > 1:
+        vectors, found = stored_vectors(chunks)
+        if found.sum() > 1:
+            similar = (vectors @ vectors.T >= near_duplicate) & found[:, None] & found[None, :]
+
+    selected, used, duplicates, over_budget = [], 0, 0, 0
+    for i, n in enumerate(counts):
+        if similar is not None and selected and similar[i, selected].any():
+            duplicates += 1
+            continue
+        cost = n + (SEPARATOR_TOKENS if selected else 0)
+        if used + cost > budget:
+            over_budget += 1
+            continue
+        selected.append(i)
+        used += cost
+
+    if not selected and chunks:
+        context = counter.truncate(chunks[0], budget)
+        return context, {"tokens": counter.count(context), "chunks": 1, "duplicates": duplicates,
+                         "over_budget": over_budget - 1}
+    context = SEPARATOR.join(chunks[i] for i in selected)
+    return context, {"tokens": used, "chunks": len(selected), "duplicates": duplicates, "over_budget": over_budget}
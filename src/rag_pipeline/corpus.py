@@ -0,0 +1,176 @@
+# src/rag_pipeline/corpus.py
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from src.pdf_processing.chunk_text import chunk_text, token_budget
+from src.pdf_processing.extract_text import extract_pdf_pages
+from src.rag_pipeline.embedding_service import EMBEDDING_MODEL_NAME, max_seq_length
+from src.rag_pipeline.embeddings import generate_embeddings
+from src.rag_pipeline.retriever import get_retriever
+from src.rag_pipeline.vector_store import create_vector_store
+
+logger = logging.getLogger(__name__)
+
+CORPUS_DIR = Path("data/knowledge_base/corpus")
+CORPUS_MANIFEST = "corpus.json"
+
+
+def document_id(pdf_path: Path) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", Path(pdf_path).stem.lower()).strip("-")
+
+
+def _extract_and_chunk(pdf_path: str, max_words: int, seq_length: int = None) -> tuple:
+    """
+    Worker: extract and chunk one PDF, to `seq_length` encoder tokens when
+    given (and the tokenizer loads), else to `max_words`. Returns (document
+    metadata, chunks).
+    """
+    pdf_path = Path(pdf_path)
+    pages = extract_pdf_pages(pdf_path)
+    text = "".join(pages[n] + "\n" for n in sorted(pages) if pages[n])
+    doc = {
+        "doc_id": document_id(pdf_path),
+        "source": pdf_path.name,
+        "title": pdf_path.stem.replace("_", " ").strip(),
+        "pages": len(pages),
+    }
+    # Optional sidecar metadata, e.g. pci_policy.meta.json: {"type": "standard", "owner": "..."}
+    sidecar = pdf_path.with_suffix(".meta.json")
+    if sidecar.exists():
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            doc.update(json.load(f))
+
+    budget = token_budget(EMBEDDING_MODEL_NAME, seq_length) if text else {}
+    chunks = chunk_text(text, max_words=max_words, **budget) if text else []
+    for chunk in chunks:
+        chunk.update({"doc_id": doc["doc_id"], "source": doc["source"], "doc_title": doc["title"]})
+    return doc, chunks
+
+
+def ingest_directory(input_dir, corpus_dir=CORPUS_DIR, workers: int = None, max_words: int = 500) -> dict:
+    """
+    Build one FAISS shard per PDF in `input_dir`.
+    Extraction and chunking run in a process pool; embedding runs in this
+    process so the model is loaded once and benefits from the embedding cache.
+    Writes <corpus_dir>/shards/<doc_id>/{index.faiss, chunks_structured.json}
+    and a corpus.json manifest listing every shard and its document metadata.
+    """
+    input_dir, corpus_dir = Path(input_dir), Path(corpus_dir)
+    pdfs = sorted(input_dir.glob("*.pdf"))
+    if not pdfs:
+        raise FileNotFoundError(f"No PDFs found in {input_dir}")
+    workers = workers or os.cpu_count() or 1
+
+    seq_length = max_seq_length()  # loads the encoder here; the workers only need its tokenizer
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_extract_and_chunk, [str(p) for p in pdfs], [max_words] * len(pdfs),
+                                    [seq_length] * len(pdfs)))
+    extract_seconds = time.perf_counter() - start
+
+    documents = []
+    for doc, chunks in results:
+        if not chunks:
+            logger.warning(f"No text extracted from {doc['source']}, skipping")
+            continue
+        embeddings = generate_embeddings(chunks)
+        if embeddings is None:
+            logger.error(f"Embedding failed for {doc['source']}, skipping")
+            continue
+        shard_dir = corpus_dir / "shards" / doc["doc_id"]
+        index_path, chunks_path = shard_dir / "index.faiss", shard_dir / "chunks_structured.json"
+        create_vector_store(embeddings, chunks, index_path, chunks_path)
+        documents.append({**doc, "chunks": len(chunks),
+                          "index_path": str(index_path), "chunks_path": str(chunks_path)})
+
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    with open(corpus_dir / CORPUS_MANIFEST, 'w', encoding='utf-8') as f:
+        json.dump({"documents": documents}, f, indent=2, ensure_ascii=False)
+
+    total_pages = sum(doc["pages"] for doc, _ in results)
+    stats = {
+        "documents": len(documents),
+        "pages": total_pages,
+        "workers": workers,
+        "extract_seconds": extract_seconds,
+        "extract_pages_per_sec": total_pages / extract_seconds if extract_seconds else 0.0,
+        "total_seconds": time.perf_counter() - start,
+    }
+    logger.info(f"Ingested {stats['documents']} documents ({total_pages} pages) with {workers} workers: "
+                f"extraction {stats['extract_pages_per_sec']:.1f} pages/s, total {stats['total_seconds']:.1f}s")
+    return stats
+
+
+class ShardedRetriever:
+    """
+    Searches every shard listed in corpus.json (or a filtered subset) with one
+    query embedding and merges the per-shard top-k by distance. Each shard is a
+    resident Retriever, so shards stay loaded and reload independently.
+    """
+
+    def __init__(self, corpus_dir=CORPUS_DIR):
+        self.manifest_path = Path(corpus_dir) / CORPUS_MANIFEST
+        self._lock = threading.Lock()
+        self._documents = None
+        self._mtime = None
+
+    def documents(self) -> list:
+        mtime = os.stat(self.manifest_path).st_mtime_ns
+        with self._lock:
+            if mtime != self._mtime:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self._documents = json.load(f)["documents"]
+                self._mtime = mtime
+            return self._documents
+
+    def search(self, query: str, top_k: int = 20, documents: list = None) -> list:
+        """
+        Return [(doc_id, faiss_id, chunk, score), ...] best first.
+        `documents` restricts the search to those doc_ids.
+        """
+        shards = [d for d in self.documents() if documents is None or d["doc_id"] in documents]
+        if not shards:
+            return []
+        retrievers = [get_retriever(d["index_path"], d["chunks_path"]) for d in shards]
+        q_embed = retrievers[0].encode([query])
+        merged = []
+        for doc, retriever in zip(shards, retrievers):
+            # Shards may mix metrics: for unit vectors squared L2 = 2 - 2*cosine
+            is_ip = retriever.higher_is_better()
+            for faiss_id, chunk, score in retriever.search_vectors(q_embed, top_k)[0]:
+                similarity = score if is_ip else 1.0 - score / 2.0
+                merged.append((similarity, doc["doc_id"], faiss_id, chunk, score))
+        merged.sort(key=lambda hit: hit[0], reverse=True)
+        return [hit[1:] for hit in merged[:top_k]]
+
+
+_sharded = {}
+_sharded_lock = threading.Lock()
+
+
+def get_sharded_retriever(corpus_dir=CORPUS_DIR) -> ShardedRetriever:
+    key = str(Path(corpus_dir).resolve())
+    with _sharded_lock:
+        if key not in _sharded:
+            _sharded[key] = ShardedRetriever(corpus_dir)
+        return _sharded[key]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest a directory of policy PDFs into a sharded corpus")
+    parser.add_argument("input_dir", help="directory containing the PDFs")
+    parser.add_argument("--corpus-dir", default=str(CORPUS_DIR))
+    parser.add_argument("--workers", type=int, default=None, help="extraction processes (default: CPU count)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    ingest_directory(args.input_dir, args.corpus_dir, workers=args.workers)
@@ -0,0 +1,308 @@
+# src/rag_pipeline/embedding_cache.py
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_DIR = Path("data/cache/embeddings")
+QUERY_CACHE_ENTRIES = 4096  # query vectors kept in memory per model
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def _locked(path: Path):
+    """Exclusive lock on `path` across processes (the file is created if missing)."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding store for one model (and encode variant).
+
+    Layout under <cache_dir>/<model>/:
+      vectors.f32  append-only float32 rows, read through np.memmap
+      keys.txt     one text hash per line; line i is row i of vectors.f32
+      meta.json    vector dimension and cumulative encode time (for "time saved")
+      lock         held by a process while it appends
+
+    Several processes (the app, the API server, ingestion) can share one
+    store: appends hold a file lock and number new rows after the keys already
+    in keys.txt, and each process picks up the others' rows from keys.txt
+    before encoding. Rows are written before their key, so a key never points
+    past the end of the vector file; the next append trims what an interrupted
+    one left behind.
+    """
+
+    def __init__(self, model_name: str, cache_dir=EMBEDDING_CACHE_DIR):
+        self.model_name = model_name
+        self.dir = Path(cache_dir) / re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self.dir / "vectors.f32"
+        self._keys_path = self.dir / "keys.txt"
+        self._meta_path = self.dir / "meta.json"
+        self._lock_path = self.dir / "lock"
+        self._lock = threading.Lock()
+        self._mmap = None
+
+        self.meta = {"dim": None, "encoded_texts": 0, "encode_seconds": 0.0}
+        self._read_meta()
+
+        self._rows = {}  # text hash -> row
+        self._n_keys = 0  # key lines read so far = rows with a key
+        self._keys_offset = 0  # bytes of keys.txt read so far
+        self._refresh()
+
+        self.hits = 0
+        self.misses = 0
+        self.encode_seconds = 0.0
+        self.seconds_saved = 0.0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _read_meta(self):
+        try:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                self.meta.update(json.load(f))
+        except FileNotFoundError:
+            pass
+
+    def _save_meta(self):
+        tmp_path = self._meta_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def _refresh(self):
+        """Index the keys appended since the last call, by this or any other process."""
+        try:
+            if os.path.getsize(self._keys_path) == self._keys_offset:
+                return
+            with open(self._keys_path, "rb") as f:
+                f.seek(self._keys_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        complete = data[:data.rfind(b"\n") + 1]  # a line still being written is read next time
+        for key in complete.decode("ascii").split():
+            self._rows.setdefault(key, self._n_keys)
+            self._n_keys += 1
+        self._keys_offset += len(complete)
+        if self.meta["dim"] is None:
+            self._read_meta()
+
+    def _vectors(self) -> np.ndarray:
+        n = self._n_keys
+        if self._mmap is None or self._mmap.shape[0] < n:
+            self._mmap = np.memmap(self._vectors_path, dtype=np.float32, mode="r",
+                                   shape=(n, self.meta["dim"]))
+        return self._mmap
+
+    def _missing(self, hashes: list) -> dict:
+        missing = {}
+        for i, h in enumerate(hashes):
+            if h not in self._rows and h not in missing:
+                missing[h] = i
+        return missing
+
+    def _append(self, hashes: list, vectors: np.ndarray, seconds: float):
+        """Store new rows (skipping any another process stored meanwhile) and add `seconds` to the encode time."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with _locked(self._lock_path):
+            self._read_meta()
+            self._refresh()
+            if self.meta["dim"] is None:
+                self.meta["dim"] = int(vectors.shape[1])
+            new = [i for i, h in enumerate(hashes) if h not in self._rows]
+            if new:
+                with open(self._vectors_path, "ab") as f:
+                    f.truncate(self._n_keys * 4 * self.meta["dim"])  # rows of an interrupted append
+                    f.write(vectors[new].tobytes())
+                with open(self._keys_path, "ab") as f:
+                    f.truncate(self._keys_offset)  # a partial key line of an interrupted append
+                    f.write("".join(hashes[i] + "\n" for i in new).encode("ascii"))
+                self._refresh()
+            self.meta["encoded_texts"] += len(hashes)
+            self.meta["encode_seconds"] += seconds
+            self._save_meta()
+
+    def encode(self, texts: list, encode_fn) -> np.ndarray:
+        """
+        Return embeddings for `texts`, calling encode_fn(list_of_texts) only for
+        texts not seen before. Output rows follow the input order. The encoder
+        runs outside the cache lock, so lookups by other threads are not held up.
+        """
+        hashes = [text_hash(t) for t in texts]
+        with self._lock:
+            missing = self._missing(hashes)
+            if missing:
+                self._refresh()  # another process may have stored them
+                missing = self._missing(hashes)
+            n_hits = len(texts) - len(missing)
+            self.hits += n_hits
+            self.misses += len(missing)
+
+        if missing:
+            start = time.perf_counter()
+            new_vectors = np.asarray(encode_fn([texts[i] for i in missing.values()]), dtype=np.float32)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.encode_seconds += elapsed
+                self._append(list(missing), new_vectors, elapsed)
+
+        with self._lock:
+            self.seconds_saved += n_hits * self.seconds_per_text()
+            if not texts:
+                return np.zeros((0, self.meta["dim"] or 0), dtype=np.float32)
+            return np.array(self._vectors()[[self._rows[h] for h in hashes]])
+
+    def lookup(self, texts: list) -> tuple:
+        """
+        Stored vectors for `texts` without encoding anything: (vectors, found),
+        where `found` is a bool mask and rows of unknown texts are zero.
+        """
+        hashes = [text_hash(t) for t in texts]
+        with self._lock:
+            self._refresh()
+            found = np.array([h in self._rows for h in hashes], dtype=bool)
+            vectors = np.zeros((len(texts), self.meta["dim"] or 0), dtype=np.float32)
+            if found.any():
+                vectors[found] = self._vectors()[[self._rows[h] for h in hashes if h in self._rows]]
+        return vectors, found
+
+    def seconds_per_text(self) -> float:
+        """Average encoder time per text over the cache's lifetime (0 if unknown)."""
+        if not self.meta["encoded_texts"]:
+            return 0.0
+        return self.meta["encode_seconds"] / self.meta["encoded_texts"]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "encode_seconds": self.encode_seconds,
+            "estimated_seconds_saved": self.seconds_saved,
+            "stored_vectors": len(self._rows),
+        }
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded in-memory LRU of query embeddings. Queries are mostly one-off, so
+    unlike corpus chunks they are not worth persisting; repeats within a
+    process (retries, the same question from several users, warm-up) still
+    skip the encoder.
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # text hash -> vector
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.encode_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def encode(self, texts: list, encode_fn) -> np.ndarray:
+        """Same contract as EmbeddingCache.encode; the encoder runs outside the lock."""
+        hashes = [text_hash(t) for t in texts]
+        found, missing = {}, {}
+        with self._lock:
+            for i, h in enumerate(hashes):
+                if h in self._entries:
+                    self._entries.move_to_end(h)
+                    found[h] = self._entries[h]
+                elif h not in missing:
+                    missing[h] = i
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            start = time.perf_counter()
+            new_vectors = np.asarray(encode_fn([texts[i] for i in missing.values()]), dtype=np.float32)
+            elapsed = time.perf_counter() - start
+            found.update(zip(missing, new_vectors))
+            with self._lock:
+                self.encode_seconds += elapsed
+                for h, vector in zip(missing, new_vectors):
+                    self._entries[h] = vector
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([found[h] for h in hashes])
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "encode_seconds": self.encode_seconds,
+            "stored_vectors": len(self._entries),
+        }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model_name: str, cache_dir=EMBEDDING_CACHE_DIR) -> EmbeddingCache:
+    """Process-wide EmbeddingCache per (model, directory)."""
+    key = (model_name, str(Path(cache_dir).resolve()))
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = EmbeddingCache(model_name, cache_dir)
+            _caches[key] = cache
+        return cache
+
+
+_query_caches = {}
+
+
+def get_query_cache(model_name: str) -> QueryEmbeddingCache:
+    """Process-wide QueryEmbeddingCache per model."""
+    with _caches_lock:
+        cache = _query_caches.get(model_name)
+        if cache is None:
+            cache = _query_caches[model_name] = QueryEmbeddingCache()
+        return cache
@@ -0,0 +1,193 @@
+# src/rag_pipeline/embedding_service.py
+
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from src.rag_pipeline.embedding_cache import get_embedding_cache, get_query_cache
+from src.rag_pipeline.tracing import stage
+
+logger = logging.getLogger(__name__)
+
+# One model for both indexing and querying: vectors from different models are
+# not comparable, so the index must be built with the query encoder.
+EMBEDDING_MODEL_NAME = 'multi-qa-MiniLM-L6-cos-v1'
+EMBEDDING_BACKENDS = ("torch", "int8", "onnx")
+DEFAULT_BATCH_SIZE = 64
+
+
+def default_backend() -> str:
+    """RAG_EMBEDDING_BACKEND, shared by ingestion and the query path (default: torch)."""
+    backend = os.getenv("RAG_EMBEDDING_BACKEND", "torch")
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {EMBEDDING_BACKENDS}")
+    return backend
+
+
+def cache_name(model_name: str, backend: str) -> str:
+    """Embedding-cache namespace: quantized/ONNX vectors differ slightly from the torch ones."""
+    return model_name if backend == "torch" else f"{model_name}-{backend}"
+
+
+def _load_encoder(model_name: str, backend: str):
+    from sentence_transformers import SentenceTransformer  # type: ignore
+    if backend == "onnx":
+        # Needs the optional onnx extras: pip install "sentence-transformers[onnx]"
+        return SentenceTransformer(model_name, device="cpu", backend="onnx")
+    model = SentenceTransformer(model_name, device="cpu" if backend == "int8" else None)
+    if backend == "int8":
+        # Dynamic int8 quantization of the Linear layers (CPU only)
+        import torch
+        from torch.ao.quantization import quantize_dynamic
+        model = quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+# ===========================
+# Shared encoders
+# ===========================
+_encoders = {}
+_encoders_lock = threading.Lock()
+
+
+def get_encoder(model_name: str = EMBEDDING_MODEL_NAME, backend: str = None):
+    """Return the process-wide encoder for (model, backend), loading it on first use."""
+    backend = backend or default_backend()
+    with _encoders_lock:
+        model = _encoders.get((model_name, backend))
+        if model is None:
+            logger.info(f"Loading encoder {model_name} ({backend})")
+            with stage("encoder_load"):
+                model = _load_encoder(model_name, backend)
+            _encoders[(model_name, backend)] = model
+        return model
+
+
+def max_seq_length(model_name: str = EMBEDDING_MODEL_NAME, backend: str = None):
+    """Tokens the encoder reads per text, special tokens included (None if unknown); longer texts are truncated."""
+    try:
+        return getattr(get_encoder(model_name, backend), "max_seq_length", None)
+    except Exception as e:
+        logger.warning(f"Could not load encoder {model_name} to read its sequence length: {e}")
+        return None
+
+
+def encode_normalized(texts: list, model_name: str = EMBEDDING_MODEL_NAME, backend: str = None,
+                      use_cache: bool = True, persist: bool = True) -> np.ndarray:
+    """
+    Unit-length float32 vectors for `texts` from the shared encoder, so dot
+    products are cosine similarities. Previously seen texts come from the
+    "-normalized" embedding cache without touching the encoder; with
+    persist=False (user queries) from an in-memory LRU instead, so one-off
+    texts do not grow the on-disk store.
+    """
+    backend = backend or default_backend()
+
+    def encode_fn(batch):
+        model = get_encoder(model_name, backend)
+        with stage("encode"):
+            return model.encode(batch, show_progress_bar=False, normalize_embeddings=True)
+    if not use_cache:
+        return np.asarray(encode_fn(texts), dtype=np.float32)
+    name = f"{cache_name(model_name, backend)}-normalized"
+    if not persist:
+        return get_query_cache(name).encode(texts, encode_fn)
+    return get_embedding_cache(name).encode(texts, encode_fn)
+
+
+def length_sorted_batches(texts: list, batch_size: int) -> list:
+    """
+    Split text positions into batches of similar length (longest first), so
+    each batch pads to its own longest text rather than the corpus maximum.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def _encode_batch(model, batch: list, normalize: bool) -> np.ndarray:
+    return np.asarray(model.encode(batch, batch_size=len(batch), show_progress_bar=False,
+                                   normalize_embeddings=normalize), dtype=np.float32)
+
+
+# ===========================
+# Worker pool
+# ===========================
+_worker_config = {}
+
+
+def _init_worker(model_name: str, backend: str, threads: int):
+    import torch
+    torch.set_num_threads(threads)
+    _worker_config.update(model_name=model_name, backend=backend)
+    get_encoder(model_name, backend)
+
+
+def _encode_in_worker(batch: list, normalize: bool) -> np.ndarray:
+    model = get_encoder(_worker_config["model_name"], _worker_config["backend"])
+    return _encode_batch(model, batch, normalize)
+
+
+class EmbeddingService:
+    """
+    Encodes texts in length-sorted batches with one model per process.
+
+    workers=1 encodes in this process with the shared encoder (get_encoder).
+    workers>1 starts a spawn-based process pool once; every worker loads the
+    model in its initializer and gets cpu_count // workers torch threads, so
+    the pool does not oversubscribe the CPU. Batches are dispatched in order
+    and reassembled into the input order.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, backend: str = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 1):
+        self.model_name = model_name
+        self.backend = backend or default_backend()
+        if self.backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend {self.backend!r}, expected one of {EMBEDDING_BACKENDS}")
+        self.batch_size = batch_size
+        self.workers = max(1, workers)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                threads = max(1, (os.cpu_count() or 1) // self.workers)
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"),
+                                                 initializer=_init_worker,
+                                                 initargs=(self.model_name, self.backend, threads))
+            return self._pool
+
+    def encode(self, texts: list, normalize: bool = False) -> np.ndarray:
+        """Return a (len(texts), dim) float32 array in input order."""
+        texts = list(texts)
+        batches = length_sorted_batches(texts, self.batch_size)
+        if not batches:
+            return np.zeros((0, 0), dtype=np.float32)
+        text_batches = [[texts[i] for i in batch] for batch in batches]
+        if self.workers == 1:
+            model = get_encoder(self.model_name, self.backend)
+            vectors = [_encode_batch(model, batch, normalize) for batch in text_batches]
+        else:
+            vectors = list(self._executor().map(_encode_in_worker, text_batches, [normalize] * len(batches)))
+
+        out = np.empty((len(texts), vectors[0].shape[1]), dtype=np.float32)
+        for batch, batch_vectors in zip(batches, vectors):
+            out[batch] = batch_vectors
+        return out
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
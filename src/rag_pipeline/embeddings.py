@@ -1,11 +1,35 @@
-from sentence_transformers import SentenceTransformer # type: ignore
 import numpy as np
 
-def generate_embeddings(chunks: list) -> np.ndarray:
-    """Generate embeddings for text chunks using sentence-transformers."""
-    model = SentenceTransformer('all-MiniLM-L6-v2')
+from src.rag_pipeline.embedding_cache import EMBEDDING_CACHE_DIR, get_embedding_cache
+from src.rag_pipeline.embedding_service import (DEFAULT_BATCH_SIZE, EMBEDDING_MODEL_NAME, EmbeddingService,
+                                                cache_name)
+
+def generate_embeddings(chunks: list, use_cache: bool = True, cache_dir=EMBEDDING_CACHE_DIR,
+                        batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 1, backend: str = None) -> np.ndarray:
+    """
+    Generate embeddings for text chunks using sentence-transformers.
+    Accepts plain strings or structured chunk dicts. With use_cache, vectors for
+    unchanged chunk texts come from the on-disk embedding cache and only new or
+    edited chunks go through the encoder. Texts are encoded in length-sorted
+    batches, across `workers` processes when workers > 1, with the backend
+    from RAG_EMBEDDING_BACKEND unless `backend` is given.
+    """
+    texts = [c["text"] if isinstance(c, dict) else c for c in chunks]
+
     try:
-        embeddings = model.encode(chunks, show_progress_bar=True)
+        with EmbeddingService(EMBEDDING_MODEL_NAME, backend, batch_size=batch_size, workers=workers) as service:
+            if not use_cache:
+                return service.encode(texts)
+            cache = get_embedding_cache(cache_name(EMBEDDING_MODEL_NAME, service.backend), cache_dir)
+            before = cache.stats()
+            embeddings = cache.encode(texts, service.encode)
+        after = cache.stats()
+        hits = after["hits"] - before["hits"]
+        misses = after["misses"] - before["misses"]
+        print(f"Embedding cache: {hits} hits / {misses} misses "
+              f"({hits / max(len(texts), 1):.0%} hit rate), "
+              f"encoded {misses} texts in {after['encode_seconds'] - before['encode_seconds']:.1f}s, "
+              f"saved ~{after['estimated_seconds_saved'] - before['estimated_seconds_saved']:.1f}s")
         return embeddings
     except Exception as e:
         print(f"Error generating embeddings: {e}")
@@ -13,12 +37,13 @@ def generate_embeddings(chunks: list) -> np.ndarray:
 
 if __name__ == "__main__":
     from src.pdf_processing.extract_text import extract_pdf_text
-    from src.pdf_processing.chunk_text import chunk_text
+    from src.pdf_processing.chunk_text import chunk_text, token_budget
+    from src.rag_pipeline.embedding_service import max_seq_length
     from pathlib import Path
     pdf_path = Path("data/input/information_security_policy_v4.0.pdf")
     text = extract_pdf_text(pdf_path)
     if text:
-        chunks = chunk_text(text, chunk_size=500)
+        chunks = chunk_text(text, max_words=500, **token_budget(EMBEDDING_MODEL_NAME, max_seq_length()))
         embeddings = generate_embeddings(chunks)
         if embeddings is not None:
             print(f"Generated {len(embeddings)} embeddings with shape: {embeddings.shape}")
\ No newline at end of file
@@ -0,0 +1,137 @@
+# src/rag_pipeline/hybrid_retriever.py
+
+import logging
+import threading
+
+from src.rag_pipeline.keyword_index import get_keyword_searcher
+from src.rag_pipeline.retriever import get_retriever
+from src.rag_pipeline.text_terms import section_title_terms, tokenize
+from src.rag_pipeline.tracing import stage
+
+logger = logging.getLogger(__name__)
+
+RRF_K = 60  # standard reciprocal-rank-fusion damping constant
+SECTION_BOOST = 1.0 / (RRF_K + 1)  # as much as one extra first place
+CANDIDATES = 50  # per retriever, before fusion
+HYBRID_TOP_K = 8
+RERANK_TOP_K = 4
+RERANK_MODEL_NAME = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+def section_matches(chunk: dict, targets: list) -> bool:
+    """
+    True if the chunk belongs to one of the target sections ("4.5 Password
+    Management"-style strings from the compliance mapping). A chunk matches a
+    target whose distinctive title words all appear in the chunk's title;
+    targets without distinctive words fall back to the section number
+    ("4.4.1" is under "4.4", "4.40" is not). Titles are preferred because the
+    mapping's numbering can drift from the policy document's.
+    """
+    title_words = None
+    for target in targets:
+        number, _, title = target.partition(" ")
+        terms = section_title_terms(title)
+        if terms:
+            if title_words is None:
+                title_words = set(tokenize(chunk.get("title", "")))
+            if terms <= title_words:
+                return True
+        else:
+            section = chunk.get("section", "")
+            if section == number or section.startswith(number + "."):
+                return True
+    return False
+
+
+def reciprocal_rank_fusion(ranked_lists: list, k: int = RRF_K) -> dict:
+    """{faiss_id: sum of 1 / (k + rank)} over ranked lists of (faiss_id, chunk, score)."""
+    fused = {}
+    for hits in ranked_lists:
+        for rank, (faiss_id, _, _) in enumerate(hits, start=1):
+            fused[faiss_id] = fused.get(faiss_id, 0.0) + 1.0 / (k + rank)
+    return fused
+
+
+# ===========================
+# Cross-encoder reranker
+# ===========================
+_rerankers = {}
+_rerankers_lock = threading.Lock()
+
+
+def get_reranker(model_name: str = RERANK_MODEL_NAME):
+    """Return a process-wide CPU CrossEncoder, loading it on first use."""
+    from sentence_transformers import CrossEncoder  # type: ignore
+    with _rerankers_lock:
+        model = _rerankers.get(model_name)
+        if model is None:
+            logger.info(f"Loading reranker {model_name}")
+            model = CrossEncoder(model_name, device="cpu")
+            _rerankers[model_name] = model
+        return model
+
+
+def rerank_batch(queries: list, candidates: list, top_k: int = RERANK_TOP_K,
+                 model_name: str = RERANK_MODEL_NAME) -> list:
+    """Re-score each query's candidate chunks with the cross-encoder (one predict call) and keep the top_k."""
+    pairs = [(query, chunk["text"]) for query, chunks in zip(queries, candidates) for chunk in chunks]
+    if not pairs:
+        return [[] for _ in queries]
+    model = get_reranker(model_name)
+    with stage("rerank"):
+        scores = iter(model.predict(pairs, show_progress_bar=False))
+    results = []
+    for chunks in candidates:
+        scored = [(chunk, float(next(scores))) for chunk in chunks]
+        scored.sort(key=lambda pair: pair[1], reverse=True)
+        results.append([chunk for chunk, _ in scored[:top_k]])
+    return results
+
+
+# ===========================
+# Hybrid search
+# ===========================
+def hybrid_search_batch(queries: list, index_path, chunks_path, sections: list = None,
+                        top_k: int = HYBRID_TOP_K, candidates: int = CANDIDATES,
+                        rerank_top_k: int = None) -> list:
+    """
+    Dense (FAISS) and lexical (BM25) retrieval fused with reciprocal-rank fusion.
+
+    Each retriever contributes its top `candidates`; a chunk scores
+    sum(1 / (RRF_K + rank)) over the lists it appears in, plus SECTION_BOOST
+    when it belongs to one of the query's target `sections` (one list of
+    mapping policy_section strings per query, see section_matches). Chunks
+    are deduplicated by text and the best `top_k` are kept; with
+    `rerank_top_k` a cross-encoder re-scores those and keeps the best
+    `rerank_top_k`.
+    Returns one list of chunk dicts per query, best first.
+    """
+    sections = sections or [[] for _ in queries]
+    dense = get_retriever(index_path, chunks_path).search_batch(queries, candidates)
+    keyword = get_keyword_searcher(index_path, chunks_path)
+
+    results = []
+    for query, query_sections, dense_hits in zip(queries, sections, dense):
+        lexical_hits = keyword.search(query, candidates)
+        fused = reciprocal_rank_fusion([dense_hits, lexical_hits])
+        chunks = {faiss_id: chunk for faiss_id, chunk, _ in dense_hits + lexical_hits}
+        if query_sections:
+            for faiss_id, chunk in chunks.items():
+                if section_matches(chunk, query_sections):
+                    fused[faiss_id] += SECTION_BOOST
+
+        seen_texts, ranked = set(), []
+        for faiss_id in sorted(fused, key=lambda i: (-fused[i], i)):
+            text = chunks[faiss_id]["text"]
+            if text not in seen_texts:
+                seen_texts.add(text)
+                ranked.append(chunks[faiss_id])
+            if len(ranked) == top_k:
+                break
+        results.append(ranked)
+
+    if rerank_top_k:
+        results = rerank_batch(queries, results, rerank_top_k)
+    return results
+
+
+def hybrid_search(query: str, index_path, chunks_path, sections: list = None, **kwargs) -> list:
+    return hybrid_search_batch([query], index_path, chunks_path, [sections or []], **kwargs)[0]
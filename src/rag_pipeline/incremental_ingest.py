@@ -0,0 +1,183 @@
+# src/rag_pipeline/incremental_ingest.py
+
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+
+import faiss  # type: ignore
+import numpy as np
+
+from src.pdf_processing.chunk_text import chunk_text, token_budget
+from src.pdf_processing.extract_text import extract_pdf_pages, page_fingerprints
+from src.rag_pipeline.chunk_store import store_path_for, write_chunk_store
+from src.rag_pipeline.context_packer import build_token_counts
+from src.rag_pipeline.embedding_service import EMBEDDING_MODEL_NAME, cache_name, default_backend, max_seq_length
+from src.rag_pipeline.embeddings import generate_embeddings
+from src.rag_pipeline.keyword_index import build_keyword_index
+from src.rag_pipeline.vector_store import DEFAULT_INDEX_TYPE, new_index, prepare_embeddings, train_index
+
+MANIFEST_VERSION = 3  # 3: IVF indexes hold chunk ids themselves instead of inside an IndexIDMap2
+# HNSW cannot remove vectors, so it is not available for in-place updates
+INCREMENTAL_INDEX_TYPES = ("flat_l2", "flat_ip", "ivf_flat", "ivf_pq")
+IVF_INDEX_TYPES = ("ivf_flat", "ivf_pq")
+
+
+def manifest_path_for(index_path: Path) -> Path:
+    """The manifest lives next to the index: index.faiss -> index.manifest.json"""
+    return Path(index_path).with_suffix(".manifest.json")
+
+
+def chunk_fingerprint(chunk: dict) -> str:
+    key = "\x1f".join((chunk["section"], chunk["title"], chunk["text"]))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _embedding_model() -> str:
+    """Model (and backend, if not torch) whose vectors the index holds."""
+    return cache_name(EMBEDDING_MODEL_NAME, default_backend())
+
+
+def _write_atomic(path: Path, write):
+    """Write via a temp file + rename so a concurrent Retriever never reads a half-written file."""
+    tmp = path.with_name(path.name + ".tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _id_index_class(index_type: str):
+    """
+    Index class that maps chunk ids to vectors. IVF lists store ids directly.
+    An IndexIDMap2 around IVF must not be used: its remove_ids compacts the id
+    map, but the IVF lists keep the old internal ids, so later searches return
+    the ids of other chunks.
+    """
+    return faiss.IndexIVF if index_type in IVF_INDEX_TYPES else faiss.IndexIDMap2
+
+
+def _load_state(index_path: Path, manifest_path: Path, index_type: str):
+    """Return (manifest, index) from the previous build, or (None, None) if it can't be reused."""
+    if not manifest_path.exists() or not index_path.exists():
+        return None, None
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if (manifest.get("version") != MANIFEST_VERSION
+            or manifest.get("embedding_model") != _embedding_model()
+            or manifest.get("index_type") != index_type):
+        return None, None
+    index = faiss.read_index(str(index_path))
+    if not isinstance(index, _id_index_class(index_type)) or index.ntotal != len(manifest["chunks"]):
+        return None, None
+    return manifest, index
+
+
+def incremental_update(pdf_path: Path, index_path: Path, chunks_path: Path, max_words: int = 500,
+                       index_type: str = DEFAULT_INDEX_TYPE) -> dict:
+    """
+    Bring the knowledge base in line with `pdf_path`, redoing only what changed.
+
+    Pages are fingerprinted from their raw content streams; only pages whose
+    fingerprint is not in the manifest are re-extracted. The text is then
+    re-chunked (cheap), to the encoder's sequence length when its tokenizer
+    is available and to `max_words` otherwise, and chunks are diffed by (section, title, text) hash:
+    unchanged chunks keep their FAISS id and vector, removed ones are dropped
+    with remove_ids and new/edited ones are embedded and added with add_with_ids.
+    Falls back to a full build when there is no usable manifest (or the
+    embedding model / index type changed). IVF indexes are trained on that
+    full build and keep their centroids across updates. Raises ValueError,
+    without touching the knowledge base, if the PDF yields no chunks.
+    """
+    if index_type not in INCREMENTAL_INDEX_TYPES:
+        raise ValueError(f"Index type {index_type!r} does not support incremental updates")
+    start = time.perf_counter()
+    pdf_path, index_path, chunks_path = Path(pdf_path), Path(index_path), Path(chunks_path)
+    manifest_path = manifest_path_for(index_path)
+    manifest, index = _load_state(index_path, manifest_path, index_type)
+
+    # 1. Pages: reuse cached text for unchanged fingerprints
+    fingerprints = page_fingerprints(pdf_path)
+    cached_pages = {p["fingerprint"]: p["text"] for p in manifest["pages"]} if manifest else {}
+    changed_pages = [i for i, fp in enumerate(fingerprints) if fp not in cached_pages]
+    extracted = extract_pdf_pages(pdf_path, changed_pages)
+    page_texts = [extracted[i] if i in extracted else cached_pages[fp] for i, fp in enumerate(fingerprints)]
+    text = "".join(t + "\n" for t in page_texts if t)
+
+    # 2. Chunks: diff against the previous build
+    chunks = chunk_text(text, max_words=max_words, **token_budget(EMBEDDING_MODEL_NAME, max_seq_length()))
+    if not chunks:
+        # Nothing to build an index from (or an extraction failure that would empty the old one)
+        raise ValueError(f"No chunks extracted from {pdf_path}; knowledge base left unchanged")
+    previous = defaultdict(deque)
+    if manifest:
+        for record in manifest["chunks"]:
+            previous[record["hash"]].append(record["id"])
+    next_id = manifest["next_id"] if manifest else 0
+
+    records, new_chunks, new_ids = [], [], []
+    for chunk in chunks:
+        h = chunk_fingerprint(chunk)
+        if previous[h]:
+            chunk_id = previous[h].popleft()
+        else:
+            chunk_id = next_id
+            next_id += 1
+            new_chunks.append(chunk)
+            new_ids.append(chunk_id)
+        records.append({"id": chunk_id, "hash": h, "chunk": chunk})
+    removed_ids = [i for ids in previous.values() for i in ids]
+
+    # 3. Index: drop stale vectors, embed and add only the new chunks
+    if removed_ids:
+        index.remove_ids(np.array(removed_ids, dtype=np.int64))
+    if new_chunks:
+        embeddings = generate_embeddings(new_chunks)
+        if embeddings is None:
+            raise RuntimeError("Embedding generation failed; knowledge base left unchanged")
+        embeddings = prepare_embeddings(embeddings, index_type)
+        if index is None:
+            inner = new_index(embeddings.shape[1], index_type, n_vectors=len(embeddings))
+            train_index(inner, embeddings)
+            index = inner if index_type in IVF_INDEX_TYPES else faiss.IndexIDMap2(inner)
+        index.add_with_ids(embeddings, np.array(new_ids, dtype=np.int64))
+
+    # 4. Persist index, chunks (with ids, JSON and binary store), keyword index and manifest
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    chunks_path.parent.mkdir(parents=True, exist_ok=True)
+    _write_atomic(index_path, lambda p: faiss.write_index(index, str(p)))
+
+    def write_json(obj):
+        def write(p):
+            with open(p, 'w', encoding='utf-8') as f:
+                json.dump(obj, f, indent=2, ensure_ascii=False)
+        return write
+
+    chunk_records = [{"id": r["id"], **r["chunk"]} for r in records]
+    _write_atomic(chunks_path, write_json(chunk_records))
+    write_chunk_store(chunk_records, store_path_for(chunks_path))
+    build_keyword_index(chunk_records, index_path)
+    build_token_counts(chunk_records, index_path)
+    _write_atomic(manifest_path, write_json({
+        "version": MANIFEST_VERSION,
+        "source": str(pdf_path),
+        "embedding_model": _embedding_model(),
+        "index_type": index_type,
+        "next_id": next_id,
+        "pages": [{"fingerprint": fp, "text": t} for fp, t in zip(fingerprints, page_texts)],
+        "chunks": [{"id": r["id"], "hash": r["hash"]} for r in records],
+    }))
+
+    stats = {
+        "full_build": manifest is None,
+        "pages_total": len(fingerprints),
+        "pages_extracted": len(changed_pages),
+        "chunks_total": len(records),
+        "chunks_embedded": len(new_chunks),
+        "chunks_removed": len(removed_ids),
+        "seconds": time.perf_counter() - start,
+    }
+    print(f"Incremental update: {stats['pages_extracted']}/{stats['pages_total']} pages extracted, "
+          f"{stats['chunks_embedded']} chunks embedded, {stats['chunks_removed']} removed, "
+          f"{stats['chunks_total']} total in {stats['seconds']:.1f}s")
+    return stats
@@ -0,0 +1,192 @@
+# src/rag_pipeline/keyword_index.py
+
+import logging
+import os
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+
+from src.rag_pipeline.chunk_store import file_signature, open_chunks, resolve_chunks_path
+from src.rag_pipeline.text_terms import tokenize
+from src.rag_pipeline.tracing import stage
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+KEYWORD_INDEX_SUFFIX = ".bm25"
+EMPTY_CHUNK_TEXT = "[No text extracted]"
+
+
+def keyword_index_path_for(index_path) -> Path:
+    """The keyword index lives next to the FAISS index: index.faiss -> index.bm25"""
+    return Path(index_path).with_suffix(KEYWORD_INDEX_SUFFIX)
+
+
+class KeywordIndex:
+    """
+    BM25 inverted index over chunk titles and texts.
+
+    Postings for each term are a contiguous slice of `postings` (document
+    numbers) and `impacts` (the BM25 term-frequency factor, precomputed at
+    build time), so a query touches only the postings of its own terms:
+    score(d) = sum over query terms of idf(t) * impact(t, d).
+    Document numbers map back to FAISS ids through `doc_ids`.
+    """
+
+    def __init__(self, terms: list, offsets: np.ndarray, idf: np.ndarray,
+                 postings: np.ndarray, impacts: np.ndarray, doc_ids: np.ndarray):
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.idf = idf
+        self.postings = postings
+        self.impacts = impacts
+        self.doc_ids = doc_ids
+
+    @classmethod
+    def build(cls, chunks, k1: float = BM25_K1, b: float = BM25_B) -> "KeywordIndex":
+        """Build from (faiss_id, chunk) pairs; placeholder chunks without text are skipped."""
+        term_postings = defaultdict(list)
+        doc_ids, lengths = [], []
+        for faiss_id, chunk in chunks:
+            text = chunk.get("text", "")
+            if text.strip() == EMPTY_CHUNK_TEXT:
+                continue
+            tokens = tokenize(f"{chunk.get('title', '')} {text}")
+            doc = len(doc_ids)
+            doc_ids.append(faiss_id)
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                term_postings[term].append((doc, tf))
+
+        terms = sorted(term_postings)
+        lengths = np.array(lengths, dtype=np.float32)
+        avg_length = float(lengths.mean()) if len(lengths) else 0.0
+        avg_length = avg_length or 1.0  # all-empty corpus: avoid 0/0
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(term_postings[t]) for t in terms], out=offsets[1:])
+        postings = np.empty(offsets[-1], dtype=np.int32)
+        tfs = np.empty(offsets[-1], dtype=np.float32)
+        for i, term in enumerate(terms):
+            docs, counts = zip(*term_postings[term])
+            postings[offsets[i]:offsets[i + 1]] = docs
+            tfs[offsets[i]:offsets[i + 1]] = counts
+
+        n_docs = len(doc_ids)
+        df = np.diff(offsets).astype(np.float32)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        norm = k1 * (1 - b + b * lengths[postings] / avg_length)
+        impacts = (tfs * (k1 + 1) / (tfs + norm)).astype(np.float32)
+        return cls(terms, offsets, idf, postings, impacts, np.array(doc_ids, dtype=np.int64))
+
+    def save(self, path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, terms=np.array(list(self.vocabulary)), offsets=self.offsets, idf=self.idf,
+                     postings=self.postings, impacts=self.impacts, doc_ids=self.doc_ids)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path) -> "KeywordIndex":
+        with np.load(path) as data:
+            return cls(data["terms"].tolist(), data["offsets"], data["idf"], data["postings"],
+                       data["impacts"], data["doc_ids"])
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def search(self, query: str, top_k: int = 20) -> list:
+        """Return [(faiss_id, bm25_score), ...] best first; chunks sharing no query term are not returned."""
+        term_ids = [self.vocabulary[t] for t in dict.fromkeys(tokenize(query)) if t in self.vocabulary]
+        if not term_ids:
+            return []
+        slices = [slice(self.offsets[t], self.offsets[t + 1]) for t in term_ids]
+        docs = np.concatenate([self.postings[s] for s in slices])
+        weights = np.concatenate([self.impacts[s] * self.idf[t] for s, t in zip(slices, term_ids)])
+        matched, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k)[:top_k]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.lexsort((matched[best], -scores[best]))]
+        return [(int(self.doc_ids[matched[i]]), float(scores[i])) for i in best]
+
+
+def build_keyword_index(chunks: list, index_path) -> Path:
+    """Build and save the keyword index for a chunk list (ids from "id" or list position)."""
+    pairs = ((c["id"] if "id" in c else i, c) for i, c in enumerate(chunks))
+    return KeywordIndex.build(pairs).save(keyword_index_path_for(index_path))
+
+
+# ===========================
+# Resident keyword searcher
+# ===========================
+class KeywordSearcher:
+    """
+    Keeps the keyword index and chunk table resident, like Retriever does for
+    FAISS, reloading when either file's mtime/size signature changes. Uses the
+    saved index next to the FAISS index when it is at least as new as the
+    chunks; otherwise builds one in memory from the chunks.
+    """
+
+    def __init__(self, index_path, chunks_path):
+        self.path = keyword_index_path_for(index_path)
+        self.chunks_path = Path(chunks_path)
+        self._lock = threading.Lock()
+        self._state = None
+        self._signature = None
+
+    def _current_signature(self) -> tuple:
+        chunks_path = resolve_chunks_path(self.chunks_path)
+        index_signature = file_signature(self.path) if self.path.exists() else None
+        return (chunks_path, file_signature(chunks_path), index_signature)
+
+    def snapshot(self) -> tuple:
+        signature = self._current_signature()
+        with self._lock:
+            if signature != self._signature:
+                chunks_path, chunks_signature, index_signature = signature
+                with stage("keyword_index_load"):
+                    table = open_chunks(chunks_path)
+                    # signatures start with the mtime
+                    if index_signature is not None and index_signature[0] >= chunks_signature[0]:
+                        index = KeywordIndex.load(self.path)
+                    else:
+                        logger.info(f"No current keyword index at {self.path}, building it in memory")
+                        index = KeywordIndex.build(_items(table))
+                logger.info(f"Loaded keyword index ({len(index)} chunks, {len(index.vocabulary)} terms)")
+                self._state, self._signature = (index, table), signature
+            return self._state
+
+    def search(self, query: str, top_k: int = 20) -> list:
+        """Return [(faiss_id, chunk, bm25_score), ...] best first."""
+        index, table = self.snapshot()
+        with stage("bm25_search"):
+            hits = [(faiss_id, table.get(faiss_id), score) for faiss_id, score in index.search(query, top_k)]
+        # Ids with no chunk (index and chunks out of sync) are skipped, as in Retriever.search_vectors
+        return [hit for hit in hits if hit[1] is not None]
+
+
+def _items(table):
+    """(faiss_id, chunk) pairs from a JSON dict table or a ChunkStore."""
+    return table.items() if isinstance(table, dict) else ((record.id, record) for record in table.values())
+
+
+_searchers = {}
+_searchers_lock = threading.Lock()
+
+
+def get_keyword_searcher(index_path, chunks_path) -> KeywordSearcher:
+    key = (str(Path(index_path).resolve()), str(Path(chunks_path).resolve()))
+    with _searchers_lock:
+        searcher = _searchers.get(key)
+        if searcher is None:
+            searcher = KeywordSearcher(index_path, chunks_path)
+            _searchers[key] = searcher
+        return searcher
@@ -0,0 +1,187 @@
+# src/rag_pipeline/qa_fallback.py
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+QA_MODEL_NAME = "distilbert-base-uncased-distilled-squad"
+QA_TOP_CHUNKS = 3  # chunks searched for an answer span per question
+QA_MAX_LENGTH = 384  # tokens per (question, chunk window) sequence
+QA_DOC_STRIDE = 128  # token overlap between windows of a chunk longer than QA_MAX_LENGTH
+QA_MAX_ANSWER_TOKENS = 30
+QA_BATCH_TOKENS = 4096  # padded tokens per forward pass
+QA_MAX_BATCH = 8  # questions per extract_answers call
+# Seconds the batcher waits for more questions after the first. 0 takes just what
+# queued up while the previous batch ran, which adds no latency to a lone request.
+QA_MAX_WAIT = 0.0
+
+
+def load_qa_model(model_name: str = QA_MODEL_NAME, quantize: bool = False) -> tuple:
+    """(tokenizer, model) in eval mode; quantize=True applies dynamic int8 quantization to the Linear layers (CPU)."""
+    import torch
+    from transformers import AutoModelForQuestionAnswering, AutoTokenizer
+    logger.info(f"Loading Hugging Face QA model {model_name}{' (int8)' if quantize else ''}")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForQuestionAnswering.from_pretrained(model_name).eval()
+    if quantize:
+        from torch.ao.quantization import quantize_dynamic
+        model = quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return tokenizer, model
+
+
+def _best_spans(start_logits, end_logits, in_context, max_answer_tokens: int) -> tuple:
+    """
+    Per row, the span (first, last) inside the context with first <= last <
+    first + max_answer_tokens that maximises start_logit[first] + end_logit[last].
+    Scans the band one span length at a time instead of building the full
+    start x end matrix. Returns (scores, firsts, lasts) tensors.
+    """
+    import torch
+
+    blocked = torch.finfo(start_logits.dtype).min / 4
+    start = start_logits.masked_fill(~in_context, blocked)
+    end = end_logits.masked_fill(~in_context, blocked)
+    length = start.shape[1]
+    scores = torch.full((start.shape[0],), blocked * 2, dtype=start.dtype)
+    firsts = torch.zeros(start.shape[0], dtype=torch.long)
+    lasts = torch.zeros(start.shape[0], dtype=torch.long)
+    for width in range(min(max_answer_tokens, length)):
+        values, positions = (start[:, :length - width] + end[:, width:]).max(dim=1)
+        better = values > scores
+        scores = torch.where(better, values, scores)
+        firsts = torch.where(better, positions, firsts)
+        lasts = torch.where(better, positions + width, lasts)
+    return scores, firsts, lasts
+
+
+def extract_answers(tokenizer, model, questions: list, contexts: list, max_length: int = QA_MAX_LENGTH,
+                    stride: int = QA_DOC_STRIDE, max_answer_tokens: int = QA_MAX_ANSWER_TOKENS,
+                    batch_tokens: int = QA_BATCH_TOKENS) -> list:
+    """
+    Extractive QA for many questions, batched across questions and chunks.
+
+    Every (question, context) pair is tokenized together; contexts longer
+    than max_length are split into overlapping windows, so no part of a chunk
+    is cut off. Windows are sorted by length and run through the model in
+    groups of about batch_tokens padded tokens (chunks vary a lot in length,
+    so one padded batch would mostly compute padding). For each window the
+    best span maximises start_logit + end_logit (see _best_spans); each
+    question keeps its best span across all of its contexts' windows.
+    Returns one (answer text, score) per question, or None without a span.
+    """
+    import torch
+
+    pair_questions, pair_contexts, owners = [], [], []
+    for i, (question, question_contexts) in enumerate(zip(questions, contexts)):
+        for context in question_contexts:
+            pair_questions.append(question)
+            pair_contexts.append(context)
+            owners.append(i)
+    if not pair_questions:
+        return [None for _ in questions]
+
+    encoded = tokenizer(pair_questions, pair_contexts, truncation="only_second", max_length=max_length,
+                        stride=stride, return_overflowing_tokens=True, return_offsets_mapping=True)
+    lengths = [len(ids) for ids in encoded["input_ids"]]
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    groups, group = [], []
+    for window in order:
+        if group and (len(group) + 1) * lengths[window] > batch_tokens:
+            groups.append(group)
+            group = []
+        group.append(window)
+    groups.append(group)
+
+    answers = [None for _ in questions]
+    for group in groups:
+        features = [{name: encoded[name][w] for name in tokenizer.model_input_names} for w in group]
+        batch = tokenizer.pad(features, return_tensors="pt")
+        with torch.inference_mode():
+            outputs = model(**batch)
+            padded = outputs.start_logits.shape[1]
+            in_context = torch.tensor([[sequence == 1 for sequence in encoded.sequence_ids(w)]
+                                       + [False] * (padded - lengths[w]) for w in group])
+            scores, firsts, lasts = _best_spans(outputs.start_logits, outputs.end_logits, in_context,
+                                                max_answer_tokens)
+        for row, window in enumerate(group):
+            if not in_context[row].any():
+                continue
+            pair = encoded["overflow_to_sample_mapping"][window]
+            score, owner = float(scores[row]), owners[pair]
+            if answers[owner] is None or score > answers[owner][1]:
+                offsets = encoded["offset_mapping"][window]
+                text = pair_contexts[pair][offsets[int(firsts[row])][0]:offsets[int(lasts[row])][1]]
+                answers[owner] = (text.strip(), score)
+    return answers
+
+
+class QAFallbackEngine:
+    """
+    Micro-batching front end for extractive QA, for when the LLM is down and
+    every request lands here at once.
+
+    answer() can be called from any number of threads: requests go onto a
+    queue and one worker thread takes up to max_batch of them (those queued
+    while the previous batch ran, plus any arriving within max_wait) and
+    answers them with a single extract_answers call over each question's top
+    chunks.
+    """
+
+    def __init__(self, tokenizer, model, max_batch: int = QA_MAX_BATCH, max_wait: float = QA_MAX_WAIT,
+                 top_chunks: int = QA_TOP_CHUNKS):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.top_chunks = top_chunks
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="qa-fallback", daemon=True)
+        self._worker.start()
+
+    def submit(self, question: str, chunks: list) -> Future:
+        future = Future()
+        self._queue.put((question, list(chunks[:self.top_chunks]), future))
+        return future
+
+    def answer(self, question: str, chunks: list, timeout: float = None):
+        """Best (answer text, score) span in the top chunks, or None."""
+        return self.submit(question, chunks).result(timeout)
+
+    def _next_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while batch[-1] is not None and len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            stop = batch[-1] is None
+            requests = [request for request in batch if request is not None]
+            if requests:
+                try:
+                    answers = extract_answers(self.tokenizer, self.model, [q for q, _, _ in requests],
+                                              [chunks for _, chunks, _ in requests])
+                except Exception as e:
+                    logger.error(f"QA fallback batch failed: {e}")
+                    for _, _, future in requests:
+                        future.set_exception(e)
+                else:
+                    for (_, _, future), answer in zip(requests, answers):
+                        future.set_result(answer)
+            if stop:
+                return
+
+    def close(self):
+        """Stop the worker once the queued requests are answered."""
+        self._queue.put(None)
+        self._worker.join()
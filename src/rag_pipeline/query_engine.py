@@ -1,20 +1,27 @@
 # src/rag_pipeline/query_engine.py
 
+import hashlib
 import json
 import logging
 import os
+import random
+import threading
 import time
 from pathlib import Path
 
-import faiss
-from sentence_transformers import SentenceTransformer
-from langchain_core.runnables import RunnablePassthrough
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_groq import ChatGroq
-from transformers import AutoTokenizer, AutoModelForQuestionAnswering
 from dotenv import load_dotenv
 
+from src.compliance_analysis.mapping_index import QueryMappingIndex
+from src.rag_pipeline.answer_cache import chunk_id, make_key
+from src.rag_pipeline.chunk_store import file_signature
+from src.rag_pipeline.context_packer import get_token_counter, pack_context
+from src.rag_pipeline.embedding_service import get_encoder
+from src.rag_pipeline.hybrid_retriever import HYBRID_TOP_K, hybrid_search_batch
+from src.rag_pipeline.keyword_index import get_keyword_searcher
+from src.rag_pipeline.qa_fallback import QA_MODEL_NAME, QA_TOP_CHUNKS, QAFallbackEngine, load_qa_model
+from src.rag_pipeline.retriever import get_retriever
+from src.rag_pipeline.tracing import Trace, annotate, profiled, stage, timed
+
 # ===========================
 # Setup logging & environment
 # ===========================
@@ -22,22 +29,25 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 load_dotenv()
 
-# ===========================
-# Initialize LLMs
-# ===========================
-try:
-    llm_groq = ChatGroq(
-        groq_api_key=os.getenv("GROQ_API_KEY"),
-        model_name="llama-3.1-8b-instant",
-        temperature=0.5
-    )
-except Exception as e:
-    logger.warning(f"Failed to initialize Groq LLM: {e}")
-    llm_groq = None
+GROQ_MODEL_NAME = "llama-3.1-8b-instant"
+hf_model_name = QA_MODEL_NAME
+MAPPING_PATH = "data/mappings/compliance_mapping.json"
+INDEX_PATH = "data/knowledge_base/index.faiss"
+CHUNKS_PATH = "data/knowledge_base/chunks_structured.json"
 
-hf_model_name = "distilbert-base-uncased-distilled-squad"
-hf_tokenizer = AutoTokenizer.from_pretrained(hf_model_name)
-hf_model = AutoModelForQuestionAnswering.from_pretrained(hf_model_name)
+# Answer cache: in-memory by default; set RAG_ANSWER_CACHE_DB to persist it, RAG_ANSWER_CACHE=0 to disable
+ANSWER_CACHE_SIZE = 512
+ANSWER_CACHE_TTL = 24 * 3600
+
+# Retrieval: "hybrid" (dense + BM25 fusion with section boost) or "dense" (FAISS only, top 20).
+# RAG_RERANK_TOP_K > 0 adds the cross-encoder stage and keeps that many chunks.
+RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL", "hybrid")
+RERANK_TOP_K = int(os.getenv("RAG_RERANK_TOP_K", "0")) or None
+
+# Hugging Face QA fallback: RAG_QA_QUANTIZE=1 loads the model with dynamic int8 quantization (CPU);
+# RAG_QA_TOP_CHUNKS is how many retrieved chunks are searched for the answer span.
+QA_QUANTIZE = os.getenv("RAG_QA_QUANTIZE", "0") == "1"
+QA_CHUNKS = int(os.getenv("RAG_QA_TOP_CHUNKS", str(QA_TOP_CHUNKS)))
 
 # ===========================
 # Prompt template for Groq
@@ -51,161 +61,618 @@ Respond in clear, professional English.
 Query: {query}
 Context: {context}
 """
-prompt = ChatPromptTemplate.from_template(template)
-output_parser = StrOutputParser()
-
-if llm_groq:
-    chain = ({"query": RunnablePassthrough(), "context": RunnablePassthrough()} 
-             | prompt | llm_groq | output_parser)
-else:
-    chain = None
+PROMPT_VERSION = hashlib.sha1(template.encode("utf-8")).hexdigest()[:12]
 
 # ===========================
-# Load compliance mapping
+# Lazily loaded resources
 # ===========================
-MAPPING_PATH = "data/mappings/compliance_mapping.json"
-try:
-    with open(MAPPING_PATH, "r", encoding="utf-8") as f:
-        compliance_mapping = json.load(f)
-    logger.info(f"Loaded compliance mapping from {MAPPING_PATH}")
-except Exception as e:
-    logger.error(f"Failed to load compliance mapping: {e}")
-    compliance_mapping = {}
+# Nothing heavy happens at import time: each resource is built on first use
+# (or by warm_up()) and then shared by every caller in the process. Resources
+# read from a file (the compliance mapping) are rebuilt when it changes.
+_resources = {}
+_signatures = {}  # resource -> signature of the file it was built from
+_resource_locks = {name: threading.Lock() for name in ("llm_groq", "chain", "hf_qa", "qa_engine",
+                                                        "compliance_mapping", "mapping_index", "answer_cache")}
+
+
+def _get_resource(name: str, loader, signature=None):
+    if name in _resources and _signatures.get(name) == signature:
+        return _resources[name]
+    with _resource_locks[name]:
+        if name not in _resources or _signatures.get(name) != signature:
+            with stage(f"load_{name}"):
+                _resources[name] = loader()
+            _signatures[name] = signature
+        return _resources[name]
+
+
+def _mapping_signature():
+    """(mtime_ns, size) of the compliance mapping, or None if it is missing."""
+    try:
+        return file_signature(MAPPING_PATH)
+    except OSError:
+        return None
+
+
+def is_loaded(name: str) -> bool:
+    """True once the named resource ("llm_groq", "chain", "hf_qa", "compliance_mapping") is built."""
+    return name in _resources
+
+
+def _load_groq_llm():
+    try:
+        from langchain_groq import ChatGroq
+        return ChatGroq(
+            groq_api_key=os.getenv("GROQ_API_KEY"),
+            model_name=GROQ_MODEL_NAME,
+            temperature=0.5
+        )
+    except Exception as e:
+        logger.warning(f"Failed to initialize Groq LLM: {e}")
+        return None
+
+
+def _load_chain():
+    llm = get_groq_llm()
+    if not llm:
+        return None
+    from langchain_core.runnables import RunnablePassthrough
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+    prompt = ChatPromptTemplate.from_template(template)
+    return ({"query": RunnablePassthrough(), "context": RunnablePassthrough()}
+            | prompt | llm | StrOutputParser())
+
+
+def _load_hf_qa():
+    return load_qa_model(hf_model_name, quantize=QA_QUANTIZE)
+
+
+def _load_compliance_mapping():
+    try:
+        with open(MAPPING_PATH, "r", encoding="utf-8") as f:
+            mapping = json.load(f)
+        logger.info(f"Loaded compliance mapping from {MAPPING_PATH}")
+        return mapping
+    except Exception as e:
+        logger.error(f"Failed to load compliance mapping: {e}")
+        return {}
+
+
+def _load_answer_cache():
+    if os.getenv("RAG_ANSWER_CACHE", "1") == "0":
+        return None
+    from src.rag_pipeline.answer_cache import AnswerCache
+    return AnswerCache(max_entries=ANSWER_CACHE_SIZE, ttl_seconds=ANSWER_CACHE_TTL,
+                       db_path=os.getenv("RAG_ANSWER_CACHE_DB") or None,
+                       watch_paths=(MAPPING_PATH,))
+
+
+def get_groq_llm():
+    """Groq chat model, or None if it could not be initialized."""
+    return _get_resource("llm_groq", _load_groq_llm)
+
+
+def get_chain():
+    """prompt | Groq | parser runnable, or None when Groq is unavailable."""
+    return _get_resource("chain", _load_chain)
+
+
+def get_hf_qa() -> tuple:
+    """(tokenizer, model) for the extractive QA fallback."""
+    return _get_resource("hf_qa", _load_hf_qa)
+
+
+def get_qa_engine() -> QAFallbackEngine:
+    """Shared micro-batching QA fallback over the Hugging Face model."""
+    return _get_resource("qa_engine", lambda: QAFallbackEngine(*get_hf_qa(), top_chunks=QA_CHUNKS))
+
+
+def get_compliance_mapping() -> dict:
+    """The compliance mapping, re-read when the file changes."""
+    return _get_resource("compliance_mapping", _load_compliance_mapping, _mapping_signature())
+
+
+def get_mapping_index() -> QueryMappingIndex:
+    """Compiled keyword/section lookups over the compliance mapping, rebuilt when the file changes."""
+    return _get_resource("mapping_index", lambda: QueryMappingIndex(get_compliance_mapping()),
+                         _mapping_signature())
+
+
+def get_answer_cache():
+    """Shared AnswerCache, or None when caching is disabled."""
+    return _get_resource("answer_cache", _load_answer_cache)
+
+
+def set_answer_cache(cache):
+    """Replace the answer cache (None disables caching)."""
+    with _resource_locks["answer_cache"]:
+        _resources["answer_cache"] = cache
+
+
+def _llm_name() -> str:
+    llm = get_groq_llm()
+    return getattr(llm, "model_name", None) or type(llm).__name__
+
+
+def set_llm(llm):
+    """Swap the chat model behind the chain, e.g. a local stub for benchmarks or tests."""
+    with _resource_locks["llm_groq"], _resource_locks["chain"]:
+        _resources["llm_groq"] = llm
+        _resources.pop("chain", None)
+
+
+def warm_up(index_path=INDEX_PATH,
+            chunks_path=CHUNKS_PATH,
+            include_hf: bool = False):
+    """Optionally pay the cold start up front (e.g. at service start) instead of on the first query."""
+    get_compliance_mapping()
+    get_mapping_index()
+    get_chain()
+    retriever = get_retriever(index_path, chunks_path)
+    retriever.snapshot()
+    get_encoder(retriever.model_name, retriever.backend)  # encode() alone may be served by the query cache
+    retriever.encode(["warm up"])
+    if RETRIEVAL_MODE == "hybrid":
+        get_keyword_searcher(index_path, chunks_path).snapshot()
+    load_token_counts(index_path)
+    get_token_counter().count(template)  # loads the tokenizer
+    if include_hf:
+        get_qa_engine()
+
+
+_LEGACY_ATTRS = {
+    "llm_groq": get_groq_llm,
+    "chain": get_chain,
+    "compliance_mapping": get_compliance_mapping,
+    "hf_tokenizer": lambda: get_hf_qa()[0],
+    "hf_model": lambda: get_hf_qa()[1],
+}
+
+
+def __getattr__(name):
+    # Keep the old module-level names working, resolved on first access
+    if name in _LEGACY_ATTRS:
+        return _LEGACY_ATTRS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ===========================
 # Utility functions
 # ===========================
-def truncate_context(context: str, max_tokens: int = 3000) -> str:
-    words = context.split()
-    current_tokens = 0
-    truncated = []
-    for w in words:
-        current_tokens += 1.5
-        if current_tokens > max_tokens:
-            break
-        truncated.append(w)
-    return " ".join(truncated)
+def load_token_counts(index_path=INDEX_PATH) -> int:
+    """
+    Give the context packer the chunk token counts stored next to `index_path`,
+    so it does not re-tokenize retrieved chunks. Called by every retrieval
+    path; the file is only re-read after the index is rebuilt.
+    """
+    return get_token_counter().load(index_path)
+
+def build_context(query: str, relevant_chunks: list) -> str:
+    """
+    The prompt context: whole chunks packed by rank within the token budget,
+    near-duplicates dropped (see context_packer.pack_context). Logs the
+    prompt size and records it on the request trace as prompt_tokens.
+    """
+    with stage("pack_context"):
+        context, packed = pack_context(relevant_chunks)
+        counter = get_token_counter()
+        prompt_tokens = counter.count(template) + counter.count(query, memoize=False) + packed["tokens"]
+    annotate("prompt_tokens", prompt_tokens)
+    logger.info(f"Prompt tokens: {prompt_tokens} (context {packed['tokens']} from {packed['chunks']}/"
+                f"{len(relevant_chunks)} chunks, {packed['duplicates']} near-duplicates dropped, "
+                f"{packed['over_budget']} over budget)")
+    return context
 
 def extract_section(chunk: dict) -> str:
     return chunk.get("section", "Unknown")
 
+@timed("enhance_query")
 def enhance_query(query: str) -> str:
     """Automatically enhance query with mapping keywords"""
-    q_lower = query.lower()
-    for key, value in compliance_mapping.items():
-        if key.lower() in q_lower:
-            sections = value.get("sections", "")
-            keywords = value.get("keywords", "")
-            additions = " ".join(sections + " " + keywords)
-            return query + " " + additions
-    return query
+    return get_mapping_index().enhance(query)
+
+def query_sections(query: str) -> list:
+    """Mapped policy sections ("4.4 Access Control") whose distinctive title words appear in the query."""
+    return get_mapping_index().sections(query)
 
 # ===========================
 # Retrieve chunks (deduplicated)
 # ===========================
-def retrieve_chunks(query: str, index_path: str, chunks_path: str, top_k: int = 20) -> list:
-    try:
-        with open(chunks_path, 'r', encoding='utf-8') as f:
-            chunks = json.load(f)
+def _dedupe_hits(hits: list) -> list:
+    """Keep the first chunk for each distinct text, in rank order."""
+    seen_texts = set()
+    relevant_chunks = []
+    for _, chunk, _ in hits:
+        text = chunk["text"]
+        if text not in seen_texts:
+            seen_texts.add(text)
+            relevant_chunks.append(chunk)
+    return relevant_chunks
 
-        index = faiss.read_index(index_path)
+def retrieve_chunk_records(query: str, index_path: str, chunks_path: str, top_k: int = 20) -> list:
+    """Like retrieve_chunks, but returns the chunk dicts (section, title, text, ...)."""
+    try:
+        retriever = get_retriever(index_path, chunks_path)
+        load_token_counts(index_path)
         enhanced = enhance_query(query)
         logger.info(f"Enhanced query: {enhanced}")
 
-        model = SentenceTransformer('multi-qa-MiniLM-L6-cos-v1')
-        q_embed = model.encode([enhanced], show_progress_bar=False, normalize_embeddings=True)
-        distances, indices = index.search(q_embed, top_k)
-
         # Deduplicate chunks by text
-        seen_texts = set()
-        relevant_chunks = []
-        for idx in indices[0]:
-            if idx >= len(chunks):
-                continue
-            text = chunks[idx]["text"]
-            if text not in seen_texts:
-                seen_texts.add(text)
-                relevant_chunks.append(chunks[idx])
+        relevant_chunks = _dedupe_hits(retriever.search(enhanced, top_k))
 
         logger.info(f"Retrieved chunk sections: {[extract_section(c) for c in relevant_chunks]}")
-        return [c["text"] for c in relevant_chunks]
+        return relevant_chunks
     except Exception as e:
         logger.error(f"Error retrieving chunks: {e}")
         return []
 
+def retrieve_chunks(query: str, index_path: str, chunks_path: str, top_k: int = 20) -> list:
+    return [c["text"] for c in retrieve_chunk_records(query, index_path, chunks_path, top_k)]
+
+def retrieve_hybrid_records(query: str, index_path: str, chunks_path: str, top_k: int = HYBRID_TOP_K,
+                            rerank_top_k: int = None) -> list:
+    """Hybrid dense + BM25 retrieval (see hybrid_retriever); returns the chunk dicts, best first."""
+    return retrieve_hybrid_records_batch([query], index_path, chunks_path, top_k, rerank_top_k)[0]
+
+def retrieve_hybrid_records_batch(queries: list, index_path: str, chunks_path: str, top_k: int = HYBRID_TOP_K,
+                                  rerank_top_k: int = None) -> list:
+    try:
+        load_token_counts(index_path)
+        enhanced = [enhance_query(q) for q in queries]
+        results = hybrid_search_batch(enhanced, index_path, chunks_path,
+                                      sections=[query_sections(q) for q in queries],
+                                      top_k=top_k, rerank_top_k=rerank_top_k or RERANK_TOP_K)
+        for query, relevant_chunks in zip(queries, results):
+            logger.info(f"Retrieved chunk sections for '{query}': {[extract_section(c) for c in relevant_chunks]}")
+        return results
+    except Exception as e:
+        logger.error(f"Error retrieving chunks: {e}")
+        return [[] for _ in queries]
+
+def retrieve_chunk_records_batch(queries: list, index_path: str, chunks_path: str, top_k: int = 20) -> list:
+    """
+    The default retrieval path (hybrid or dense, see RETRIEVAL_MODE) for many
+    queries, encoding them in one batch. Returns one list of chunk dicts per query.
+    """
+    if RETRIEVAL_MODE == "hybrid":
+        return retrieve_hybrid_records_batch(queries, index_path, chunks_path, min(top_k, HYBRID_TOP_K))
+    try:
+        retriever = get_retriever(index_path, chunks_path)
+        load_token_counts(index_path)
+        enhanced = [enhance_query(q) for q in queries]
+        results = []
+        for query, hits in zip(queries, retriever.search_batch(enhanced, top_k)):
+            relevant_chunks = _dedupe_hits(hits)
+            logger.info(f"Retrieved chunk sections for '{query}': {[extract_section(c) for c in relevant_chunks]}")
+            results.append(relevant_chunks)
+        return results
+    except Exception as e:
+        logger.error(f"Error retrieving chunks: {e}")
+        return [[] for _ in queries]
+
+def retrieve_chunks_batch(queries: list, index_path: str, chunks_path: str, top_k: int = 20) -> list:
+    """retrieve_chunks for many queries, encoding them in one batch. Returns one list per query."""
+    return [[c["text"] for c in records]
+            for records in retrieve_chunk_records_batch(queries, index_path, chunks_path, top_k)]
+
+def retrieve_corpus_records(query: str, corpus_dir: str, documents: list = None, top_k: int = 20) -> list:
+    """retrieve_chunk_records across every shard of a multi-document corpus (or the `documents` subset)."""
+    try:
+        from src.rag_pipeline.corpus import get_sharded_retriever
+        sharded = get_sharded_retriever(corpus_dir)
+        for doc in sharded.documents():
+            if documents is None or doc["doc_id"] in documents:
+                load_token_counts(doc["index_path"])
+        enhanced = enhance_query(query)
+        logger.info(f"Enhanced query: {enhanced}")
+        hits = sharded.search(enhanced, top_k, documents=documents)
+        relevant_chunks = _dedupe_hits([(faiss_id, chunk, dist) for _, faiss_id, chunk, dist in hits])
+        logger.info(f"Retrieved chunk sections: {[(c.get('doc_id'), extract_section(c)) for c in relevant_chunks]}")
+        return relevant_chunks
+    except Exception as e:
+        logger.error(f"Error retrieving corpus chunks: {e}")
+        return []
+
+def retrieve_corpus_chunks(query: str, corpus_dir: str, documents: list = None, top_k: int = 20) -> list:
+    return [c["text"] for c in retrieve_corpus_records(query, corpus_dir, documents, top_k)]
+
 # ===========================
-# Fallback: scan entire chunks JSON
+# Fallback: keyword (BM25) search
 # ===========================
-def scan_chunks_fallback(query: str, chunks_path: str) -> list:
-    """Scan all chunks for the query if FAISS retrieval fails"""
+def scan_chunk_records(query: str, chunks_path: str, index_path: str = INDEX_PATH, top_k: int = 20) -> list:
+    """
+    Keyword search over all chunks if FAISS retrieval fails: BM25 over the
+    inverted index stored next to the FAISS index, ranked best first.
+    """
     try:
-        with open(chunks_path, 'r', encoding='utf-8') as f:
-            chunks = json.load(f)
-        matched_chunks = []
-        q_lower = query.lower()
-        for chunk in chunks:
-            text = chunk.get("text", "")
-            title = chunk.get("title", "")
-            if text.strip() == "[No text extracted]":
-                continue
-            if q_lower in text.lower() or q_lower in title.lower():
-                matched_chunks.append(chunk)
-        return [c["text"] for c in matched_chunks]
+        hits = get_keyword_searcher(index_path, chunks_path).search(query, top_k)
+        load_token_counts(index_path)
+        relevant_chunks = _dedupe_hits(hits)
+        logger.info(f"Keyword search sections: {[extract_section(c) for c in relevant_chunks]}")
+        return relevant_chunks
     except Exception as e:
         logger.error(f"Error scanning chunks: {e}")
         return []
 
+def scan_chunks_fallback(query: str, chunks_path: str, index_path: str = INDEX_PATH, top_k: int = 20) -> list:
+    return [c["text"] for c in scan_chunk_records(query, chunks_path, index_path, top_k)]
+
+def gather_chunks(query: str, index_path=INDEX_PATH, chunks_path=CHUNKS_PATH,
+                  full_scan=False, corpus_dir=None, documents=None) -> list:
+    """Pick the retrieval path for a query and return the chunk dicts it found."""
+    if corpus_dir:
+        return retrieve_corpus_records(query, corpus_dir, documents)
+    if full_scan:
+        # Keyword search over every chunk (BM25)
+        return scan_chunk_records(query, chunks_path, index_path)
+    if RETRIEVAL_MODE == "hybrid":
+        return retrieve_hybrid_records(query, index_path, chunks_path)
+    return retrieve_chunk_records(query, index_path, chunks_path)
+
 # ===========================
-# Query knowledge base
+# LLM call with rate-limit backoff
 # ===========================
-def query_knowledge_base(query: str,
-                         index_path="data/knowledge_base/index.faiss",
-                         chunks_path="data/knowledge_base/chunks_structured.json",
-                         full_scan=False) -> str:
+LLM_MAX_RETRIES = 3
+LLM_BACKOFF_BASE = 1.0  # seconds; doubled on every retry
+
+def _is_rate_limit_error(e: Exception) -> bool:
+    status = getattr(e, "status_code", None) or getattr(getattr(e, "response", None), "status_code", None)
+    message = str(e).lower()
+    return status == 429 or "rate limit" in message or "rate_limit" in message
+
+def _retry_after(e: Exception):
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
     try:
-        # Use full scan for complete coverage
-        relevant_chunks = scan_chunks_fallback(query, chunks_path) if full_scan else retrieve_chunks(query, index_path, chunks_path)
-        inferred = False  # flag for inferred/fallback answers
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+def invoke_with_backoff(chain, inputs: dict, max_retries: int = LLM_MAX_RETRIES,
+                        base_delay: float = LLM_BACKOFF_BASE) -> str:
+    """chain.invoke, retrying rate-limit errors with exponential backoff and jitter."""
+    for attempt in range(max_retries + 1):
+        try:
+            return chain.invoke(inputs)
+        except Exception as e:
+            if attempt == max_retries or not _is_rate_limit_error(e):
+                raise
+            delay = _retry_after(e) or base_delay * (2 ** attempt) + random.uniform(0, base_delay)
+            logger.warning(f"Groq rate limited, retrying in {delay:.1f}s ({attempt + 1}/{max_retries})")
+            time.sleep(delay)
 
+# ===========================
+# Query knowledge base
+# ===========================
+def _no_context_answer(query: str) -> str:
+    for key, value in get_compliance_mapping().items():
+        if key.lower() in query.lower():
+            fallback_text = value.get("fallback", "")
+            if fallback_text:
+                return f"[INFERRED] {fallback_text}"
+    return "[INFERRED] No relevant information found. Please refine your query."
+
+def knowledge_base_files(index_path=INDEX_PATH, chunks_path=CHUNKS_PATH, corpus_dir=None) -> tuple:
+    """The files answers from a knowledge base depend on: its index and chunks, or the corpus manifest."""
+    if corpus_dir:
+        from src.rag_pipeline.corpus import CORPUS_MANIFEST
+        return (Path(corpus_dir) / CORPUS_MANIFEST,)
+    return (index_path, chunks_path)
+
+def _answer_cache_key(query: str, relevant_chunks: list):
+    """(cache, key) for a Groq answer, or (None, None) when caching is off."""
+    cache = get_answer_cache()
+    if cache is None:
+        return None, None
+    return cache, make_key(query, [chunk_id(c) for c in relevant_chunks], PROMPT_VERSION, _llm_name())
+
+def _hf_answer(query: str, relevant_chunks: list, inferred: bool) -> str:
+    """Hugging Face extractive QA: best answer span across the top chunks, batched with concurrent fallbacks."""
+    engine = get_qa_engine()
+    with stage("hf_qa"):
+        best = engine.answer(query, relevant_chunks)
+    if best is not None and best[0]:
+        prefix = "[INFERRED] " if inferred else ""
+        return f"{prefix}Based on the policy document: {best[0]}"
+
+    return "[INFERRED] Unable to extract a precise answer. Please ask a more specific query."
+
+def answer_query(query: str, relevant_chunks: list, sources: tuple = (INDEX_PATH, CHUNKS_PATH)) -> str:
+    """
+    Generate the answer for already-retrieved chunk texts (Groq, then HF QA
+    fallback). `sources` are the files they came from (knowledge_base_files):
+    a cached answer is reused only while they are unchanged.
+    """
+    try:
         if not relevant_chunks:
-            inferred = True
-            for key, value in compliance_mapping.items():
-                if key.lower() in query.lower():
-                    fallback_text = value.get("fallback", "")
-                    if fallback_text:
-                        return f"[INFERRED] {fallback_text}"
-            return "[INFERRED] No relevant information found. Please refine your query."
+            return _no_context_answer(query)
 
-        context = "\n".join(relevant_chunks)
-        context = truncate_context(context, max_tokens=3000)
+        context = build_context(query, relevant_chunks)
 
         # Groq LLM
-        if llm_groq and chain:
+        chain = get_chain()
+        if chain:
+            cache, cache_key = _answer_cache_key(query, relevant_chunks)
+            if cache is not None:
+                with stage("answer_cache"):
+                    cached = cache.get(cache_key, sources)
+                if cached is not None:
+                    logger.info("Answer cache hit")
+                    return cached
             try:
-                response = chain.invoke({"query": query, "context": context})
-                if inferred:
-                    response = "[INFERRED] " + response
+                with stage("llm"):
+                    response = invoke_with_backoff(chain, {"query": query, "context": context})
+                if cache is not None:
+                    cache.put(cache_key, response, sources)
                 return response
             except Exception as e:
                 logger.warning(f"Groq error: {e}. Falling back to Hugging Face.")
-                inferred = True
-
-        # Hugging Face QA fallback
-        context_chunk = truncate_context(relevant_chunks[0], max_tokens=300)
-        inputs = hf_tokenizer(query, context_chunk, return_tensors="pt", truncation=True, max_length=512)
-        outputs = hf_model(**inputs)
-        start_idx = outputs.start_logits.argmax().item()
-        end_idx = outputs.end_logits.argmax().item()
-        if 0 <= start_idx <= end_idx < len(inputs.input_ids[0]):
-            answer = hf_tokenizer.decode(inputs.input_ids[0, start_idx:end_idx+1])
-            prefix = "[INFERRED] " if inferred else ""
-            return f"{prefix}Based on the policy document: {answer}"
-
-        return "[INFERRED] Unable to extract a precise answer. Please ask a more specific query."
+
+        # Hugging Face QA fallback (answers are flagged as inferred when Groq failed)
+        return _hf_answer(query, relevant_chunks, inferred=chain is not None)
     except Exception as e:
         logger.error(f"Error processing query: {e}")
         return "[ERROR] Error processing query. Please try again."
 
+def query_knowledge_base(query: str,
+                         index_path=INDEX_PATH,
+                         chunks_path=CHUNKS_PATH,
+                         full_scan=False,
+                         corpus_dir=None,
+                         documents=None) -> str:
+    """
+    Answer a query from the single-document knowledge base, or from a sharded
+    multi-document corpus when `corpus_dir` is given (optionally limited to `documents`).
+    """
+    return traced_query(query, index_path, chunks_path, full_scan, corpus_dir, documents)[0]
+
+def traced_query(query: str,
+                 index_path=INDEX_PATH,
+                 chunks_path=CHUNKS_PATH,
+                 full_scan=False,
+                 corpus_dir=None,
+                 documents=None) -> tuple:
+    """
+    query_knowledge_base that also returns the request's Trace: time spent in
+    each stage (enhance_query, encode, faiss_search, bm25_search,
+    pack_context, llm or hf_qa, ...) via trace.breakdown(), and the total;
+    trace.attributes["prompt_tokens"] is the size of the prompt sent.
+    """
+    trace = Trace(query)
+    with trace.activate(), profiled("query"):
+        records = gather_chunks(query, index_path, chunks_path, full_scan, corpus_dir, documents)
+        answer = answer_query(query, [c["text"] for c in records],
+                              knowledge_base_files(index_path, chunks_path, corpus_dir))
+    return answer, trace.finish()
+
+# ===========================
+# Streaming query
+# ===========================
+def _text_stream(chain, inputs: dict):
+    """
+    chain.stream, but without the chain's final StrOutputParser: closing the
+    parser's stream drains the rest of the LLM response first, so an answer
+    abandoned early (timeout, client gone) would keep streaming from Groq.
+    """
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.runnables import RunnableSequence
+    if isinstance(chain, RunnableSequence) and isinstance(chain.last, StrOutputParser):
+        for chunk in RunnableSequence(*chain.steps[:-1]).stream(inputs):
+            yield getattr(chunk, "content", chunk)
+        return
+    yield from chain.stream(inputs)
+
+def _stream_llm_tokens(chain, inputs: dict, max_retries: int = LLM_MAX_RETRIES,
+                       base_delay: float = LLM_BACKOFF_BASE):
+    """chain.stream with the same rate-limit backoff as invoke, retried only before the first token."""
+    for attempt in range(max_retries + 1):
+        started = False
+        try:
+            for token in _text_stream(chain, inputs):
+                started = True
+                yield token
+            return
+        except Exception as e:
+            if started or attempt == max_retries or not _is_rate_limit_error(e):
+                raise
+            delay = _retry_after(e) or base_delay * (2 ** attempt) + random.uniform(0, base_delay)
+            logger.warning(f"Groq rate limited, retrying in {delay:.1f}s ({attempt + 1}/{max_retries})")
+            time.sleep(delay)
+
+def stream_answer(query: str, relevant_chunks: list, sources: tuple = (INDEX_PATH, CHUNKS_PATH)):
+    """
+    Generator version of answer_query: yields answer text pieces as they arrive.
+    Cached, no-context and HF fallback answers arrive as a single piece. If Groq
+    fails mid-stream the partial answer is kept and an [ERROR] note is appended.
+    """
+    if not relevant_chunks:
+        yield _no_context_answer(query)
+        return
+
+    context = build_context(query, relevant_chunks)
+    chain = get_chain()
+    if chain:
+        cache, cache_key = _answer_cache_key(query, relevant_chunks)
+        with stage("answer_cache"):
+            cached = cache.get(cache_key, sources) if cache is not None else None
+        if cached is not None:
+            logger.info("Answer cache hit")
+            yield cached
+            return
+
+        pieces = []
+        try:
+            with stage("llm_stream"):  # until the last token, including time the consumer holds each one
+                for token in _stream_llm_tokens(chain, {"query": query, "context": context}):
+                    if not token:
+                        continue
+                    pieces.append(token)
+                    yield token
+            if cache is not None:
+                cache.put(cache_key, "".join(pieces), sources)
+            return
+        except Exception as e:
+            if pieces:
+                logger.error(f"Groq stream failed after {len(pieces)} tokens: {e}")
+                yield " [ERROR] Response interrupted. Please try again."
+                return
+            logger.warning(f"Groq error: {e}. Falling back to Hugging Face.")
+
+    try:
+        yield _hf_answer(query, relevant_chunks, inferred=chain is not None)
+    except Exception as e:
+        logger.error(f"Error processing query: {e}")
+        yield "[ERROR] Error processing query. Please try again."
+
+def stream_query_knowledge_base(query: str,
+                                index_path=INDEX_PATH,
+                                chunks_path=CHUNKS_PATH,
+                                full_scan=False,
+                                corpus_dir=None,
+                                documents=None):
+    """
+    Streaming query_knowledge_base. Yields event dicts:
+      {"type": "sections", "sections": [{"section", "title", "doc_id"}, ...]}  once, after retrieval
+      {"type": "token", "text": str}                                           for each answer piece
+      {"type": "done", "answer": str, "ttft_ms": float, "total_ms": float,
+       "stages": {stage: ms}, "prompt_tokens": int or None}                    at the end
+    Time-to-first-token and total latency are also logged for every request.
+    """
+    trace = Trace(query, kind="stream")
+    with trace.activate():
+        records = gather_chunks(query, index_path, chunks_path, full_scan, corpus_dir, documents)
+    yield from stream_records_answer(query, records, trace=trace,
+                                     sources=knowledge_base_files(index_path, chunks_path, corpus_dir))
+
+def section_summaries(records: list) -> list:
+    """[{"section", "title", "doc_id"}, ...] for retrieved chunk dicts, as reported to clients."""
+    return [{"section": extract_section(c), "title": c.get("title", ""), "doc_id": c.get("doc_id")} for c in records]
+
+def stream_records_answer(query: str, records: list, start: float = None, trace: Trace = None,
+                          sources: tuple = (INDEX_PATH, CHUNKS_PATH)):
+    """
+    The events of stream_query_knowledge_base for chunks that were already
+    retrieved from `sources` (see answer_query); `start` (a perf_counter
+    value) is when the request began. Answer stages are recorded into
+    `trace` (a new one if not given).
+    """
+    trace = trace or Trace(query, kind="stream")
+    if start is not None:
+        trace.start = start
+    start = trace.start
+    yield {"type": "sections", "sections": section_summaries(records)}
+
+    pieces, ttft_ms = [], None
+    for piece in trace.iterate(stream_answer(query, [c["text"] for c in records], sources)):
+        if ttft_ms is None:
+            ttft_ms = (time.perf_counter() - start) * 1000
+        pieces.append(piece)
+        yield {"type": "token", "text": piece}
+
+    total_ms = trace.finish().total_ms
+    logger.info(f"Streamed query: time-to-first-token={ttft_ms or total_ms:.0f} ms, total={total_ms:.0f} ms")
+    yield {"type": "done", "answer": "".join(pieces), "ttft_ms": ttft_ms or total_ms, "total_ms": total_ms,
+           "stages": trace.breakdown(), "prompt_tokens": trace.attributes.get("prompt_tokens")}
+
 
 # ===========================
 # Run dynamic queries
@@ -0,0 +1,141 @@
+# src/rag_pipeline/retriever.py
+
+import logging
+import os
+import threading
+from pathlib import Path
+
+import faiss
+
+from src.rag_pipeline.chunk_store import file_signature, open_chunks, resolve_chunks_path
+from src.rag_pipeline.embedding_service import EMBEDDING_MODEL_NAME, default_backend, encode_normalized
+from src.rag_pipeline.tracing import stage
+
+logger = logging.getLogger(__name__)
+
+# Queries must be encoded with the model the index was built with
+QUERY_MODEL_NAME = EMBEDDING_MODEL_NAME
+
+
+# ===========================
+# Resident retriever
+# ===========================
+class Retriever:
+    """
+    Keeps the FAISS index and chunk table resident between queries. Chunks come
+    from the memory-mapped binary store next to chunks_path when there is one
+    (see chunk_store), otherwise from the JSON. The files are re-read only when
+    their mtime/size signature changes on disk.
+    Safe to share across threads: reloads are serialized and searches run on a
+    consistent (index, chunks) snapshot.
+
+    nprobe (IVF) and ef_search (HNSW) are query-time recall/latency knobs; they
+    default to RAG_NPROBE / RAG_EF_SEARCH and are ignored by index types
+    that don't have them.
+    """
+
+    def __init__(self, index_path, chunks_path, model_name: str = QUERY_MODEL_NAME, use_cache: bool = True):
+        self.index_path = Path(index_path)
+        self.chunks_path = Path(chunks_path)
+        self.model_name = model_name
+        self.use_cache = use_cache
+        self.backend = default_backend()
+        self.nprobe = int(os.getenv("RAG_NPROBE", "0")) or None
+        self.ef_search = int(os.getenv("RAG_EF_SEARCH", "0")) or None
+        self._lock = threading.RLock()
+        self._index = None
+        self._chunks = None
+        self._signature = None
+
+    def _current_signature(self) -> tuple:
+        chunks_path = resolve_chunks_path(self.chunks_path)
+        return (file_signature(self.index_path), chunks_path, file_signature(chunks_path))
+
+    def _load(self, signature: tuple):
+        with stage("index_load"):
+            table = open_chunks(signature[1])
+            index = faiss.read_index(str(self.index_path))
+        self._apply_search_params(index)
+        self._index, self._chunks, self._signature = index, table, signature
+        logger.info(f"Loaded FAISS index ({index.ntotal} vectors) and {len(table)} chunks from {signature[1]}")
+
+    def _apply_search_params(self, index):
+        space = faiss.ParameterSpace()
+        for name, value in (("nprobe", self.nprobe), ("efSearch", self.ef_search)):
+            if value:
+                try:
+                    space.set_index_parameter(index, name, value)
+                except RuntimeError:
+                    logger.debug(f"Index {type(index).__name__} has no {name} parameter")
+
+    def set_search_params(self, nprobe: int = None, ef_search: int = None):
+        """Change nprobe / efSearch for subsequent searches."""
+        with self._lock:
+            self.nprobe = nprobe or self.nprobe
+            self.ef_search = ef_search or self.ef_search
+            if self._index is not None:
+                self._apply_search_params(self._index)
+
+    def higher_is_better(self) -> bool:
+        """True for inner-product indexes (scores are similarities), False for L2 distances."""
+        index, _ = self.snapshot()
+        return index.metric_type == faiss.METRIC_INNER_PRODUCT
+
+    def snapshot(self) -> tuple:
+        """Return the current (index, {faiss_id: chunk}) pair, reloading if the files changed."""
+        signature = self._current_signature()
+        with self._lock:
+            if signature != self._signature:
+                if self._signature is not None:
+                    logger.info(f"Knowledge base changed on disk, reloading {self.index_path}")
+                self._load(signature)
+            return self._index, self._chunks
+
+    def encode(self, texts: list):
+        """
+        Encode query texts (normalized, float32). Recently seen texts, including
+        enhanced queries, come from the in-memory query cache without touching the encoder.
+        """
+        return encode_normalized(texts, self.model_name, self.backend, use_cache=self.use_cache, persist=False)
+
+    def search(self, query: str, top_k: int = 20) -> list:
+        """
+        Return [(faiss_id, chunk, score), ...] best first. score is an L2 distance
+        or an inner-product similarity depending on the index (see higher_is_better).
+        """
+        return self.search_batch([query], top_k)[0]
+
+    def search_batch(self, queries: list, top_k: int = 20) -> list:
+        """search() for many queries with a single encoder batch and FAISS call."""
+        return self.search_vectors(self.encode(queries), top_k)
+
+    def search_vectors(self, q_embed, top_k: int = 20) -> list:
+        """search_batch() for query vectors that were already encoded (e.g. shared across shards)."""
+        index, chunks = self.snapshot()
+        with stage("faiss_search"):
+            distances, indices = index.search(q_embed, top_k)
+        results = []
+        for row_idx, row_dist in zip(indices, distances):
+            hits = []
+            for idx, dist in zip(row_idx, row_dist):
+                chunk = chunks.get(int(idx))
+                if chunk is None:
+                    continue
+                hits.append((int(idx), chunk, float(dist)))
+            results.append(hits)
+        return results
+
+
+_retrievers = {}
+_retrievers_lock = threading.Lock()
+
+
+def get_retriever(index_path, chunks_path, model_name: str = QUERY_MODEL_NAME) -> Retriever:
+    """Return the shared Retriever for a given (index, chunks, model) triple."""
+    key = (str(Path(index_path).resolve()), str(Path(chunks_path).resolve()), model_name)
+    with _retrievers_lock:
+        retriever = _retrievers.get(key)
+        if retriever is None:
+            retriever = Retriever(index_path, chunks_path, model_name)
+            _retrievers[key] = retriever
+        return retriever
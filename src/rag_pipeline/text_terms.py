@@ -0,0 +1,33 @@
+# src/rag_pipeline/text_terms.py
+#
+# Word normalization shared by the BM25 index, section matching and the
+# compliance mapping. Standard library only, so compliance_analysis can use
+# it without importing the retrieval stack (FAISS, encoders).
+
+import re
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was were will with".split()
+)
+
+
+def _fold_plural(token: str) -> str:
+    # "passwords" -> "password", "policies" -> "policy"; leave "access", "process", "status" alone
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list:
+    return [_fold_plural(t) for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+# Words too common in section titles to identify one
+GENERIC_TITLE_WORDS = frozenset(tokenize("security management policy policies information data"))
+
+
+def section_title_terms(title: str) -> frozenset:
+    return frozenset(tokenize(title)) - GENERIC_TITLE_WORDS
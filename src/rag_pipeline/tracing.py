@@ -0,0 +1,229 @@
+# src/rag_pipeline/tracing.py
+
+import cProfile
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Histogram buckets for stage latencies, in seconds (Prometheus convention)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# RAG_TRACE_LOG: append every finished request trace to this JSONL file.
+# RAG_PROFILE_DIR: profile each (non-streaming) query with cProfile and dump a .prof file there.
+TRACE_LOG = os.getenv("RAG_TRACE_LOG")
+PROFILE_DIR = os.getenv("RAG_PROFILE_DIR")
+
+_current = contextvars.ContextVar("rag_trace", default=None)
+
+
+# ===========================
+# Stage histograms
+# ===========================
+class StageMetrics:
+    """Prometheus-style latency histograms, one per stage name, safe to update from any thread."""
+
+    def __init__(self, buckets: tuple = BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._stages = {}  # name -> [bucket counts..., +Inf count, sum of seconds]
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            counts = self._stages.get(name)
+            if counts is None:
+                counts = self._stages[name] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[i] += 1
+            counts[len(self.buckets)] += 1
+            counts[-1] += seconds
+
+    def summary(self) -> dict:
+        """{stage: {"count", "mean_ms"}}"""
+        with self._lock:
+            return {name: {"count": counts[-2], "mean_ms": counts[-1] / counts[-2] * 1000}
+                    for name, counts in self._stages.items()}
+
+    def render(self, metric: str = "rag_stage_duration_seconds") -> str:
+        """The histograms in the Prometheus text exposition format."""
+        lines = [f"# HELP {metric} Time spent in each query pipeline stage.", f"# TYPE {metric} histogram"]
+        with self._lock:
+            for name, counts in sorted(self._stages.items()):
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{bound:g}"}} {count}')
+                lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {counts[-2]}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {counts[-1]:.6f}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {counts[-2]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+
+METRICS = StageMetrics()
+
+
+# ===========================
+# JSONL sink
+# ===========================
+_trace_log_lock = threading.Lock()
+
+
+def set_trace_log(path):
+    """Append finished traces to `path` as JSON lines (None turns it off)."""
+    global TRACE_LOG
+    TRACE_LOG = str(path) if path else None
+
+
+def _write_trace(record: dict):
+    if not TRACE_LOG:
+        return
+    try:
+        with _trace_log_lock, open(TRACE_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        logger.error(f"Error writing trace to {TRACE_LOG}: {e}")
+
+
+# ===========================
+# Request traces
+# ===========================
+class Trace:
+    """
+    Stage timings for one request. Code between activate() and finish()
+    records every stage() it runs into this trace; finish() adds the total,
+    feeds the "total" histogram and writes the trace to the JSONL sink.
+    """
+
+    def __init__(self, query: str = "", kind: str = "query"):
+        self.query = query
+        self.kind = kind
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.stages = []  # (name, ms) in the order they finished
+        self.attributes = {}  # request facts worth correlating with latency, e.g. prompt_tokens
+        self.total_ms = None
+        self._lock = threading.Lock()
+
+    def add(self, name: str, ms: float):
+        with self._lock:
+            self.stages.append((name, ms))
+
+    @contextmanager
+    def activate(self):
+        """Make this the current trace for the enclosed code (no yields inside: see iterate)."""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def iterate(self, iterator):
+        """
+        Wrap a generator so each step runs with this trace active, even when
+        consecutive steps run on different threads (e.g. a server executor).
+        """
+        while True:
+            with self.activate():
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def breakdown(self) -> dict:
+        """{stage: total ms}, summing repeated stages, in first-seen order."""
+        totals = {}
+        with self._lock:
+            for name, ms in self.stages:
+                totals[name] = totals.get(name, 0.0) + ms
+        return totals
+
+    def finish(self) -> "Trace":
+        if self.total_ms is None:
+            self.total_ms = (time.perf_counter() - self.start) * 1000
+            METRICS.observe("total", self.total_ms / 1000)
+            _write_trace(self.to_dict())
+        return self
+
+    def to_dict(self) -> dict:
+        return {"ts": self.started_at, "kind": self.kind, "query": self.query,
+                "total_ms": self.total_ms, "stages": self.breakdown(), **self.attributes}
+
+
+def current_trace():
+    return _current.get()
+
+
+def annotate(name: str, value):
+    """Attach `value` to the current trace (if any) as `name`."""
+    trace = _current.get()
+    if trace is not None:
+        trace.attributes[name] = value
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as pipeline stage `name` (histogram + the current trace, if any)."""
+    trace = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        METRICS.observe(name, seconds)
+        if trace is not None:
+            trace.add(name, seconds * 1000)
+
+
+def timed(name: str):
+    """Decorator form of stage()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ===========================
+# Profiling
+# ===========================
+_profile_lock = threading.Lock()
+
+
+@contextmanager
+def profiled(label: str = "query"):
+    """
+    With RAG_PROFILE_DIR set, run the enclosed block under cProfile and dump
+    <dir>/<label>-<timestamp>.prof (open with snakeviz or pstats). cProfile
+    only sees the calling thread, and one request is profiled at a time;
+    concurrent requests run unprofiled. For whole-process sampling use py-spy
+    on benchmarks/profile_query.py instead.
+    """
+    if not PROFILE_DIR or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+        path = Path(PROFILE_DIR)
+        path.mkdir(parents=True, exist_ok=True)
+        output = path / f"{label}-{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}.prof"
+        profiler.dump_stats(str(output))
+        logger.info(f"Wrote profile {output}")
+    finally:
+        _profile_lock.release()
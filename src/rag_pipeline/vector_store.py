@@ -3,19 +3,86 @@ import numpy as np
 import json
 from pathlib import Path
 
-def create_vector_store(embeddings: np.ndarray, chunks: list, index_path: Path, chunks_path: Path):
+from src.rag_pipeline.chunk_store import store_path_for, write_chunk_store
+from src.rag_pipeline.context_packer import build_token_counts
+from src.rag_pipeline.keyword_index import build_keyword_index
+
+# flat_l2 is the original exact L2 index; the others use inner product on
+# L2-normalized vectors, i.e. cosine similarity, matching how queries are encoded.
+INDEX_TYPES = ("flat_l2", "flat_ip", "ivf_flat", "hnsw", "ivf_pq")
+DEFAULT_INDEX_TYPE = "flat_ip"
+
+def default_nlist(n_vectors: int) -> int:
+    """~4*sqrt(n) IVF cells, capped so every cell gets at least 39 training points."""
+    return max(1, min(int(4 * np.sqrt(n_vectors)), n_vectors // 39))
+
+def new_index(dimension: int, index_type: str = DEFAULT_INDEX_TYPE, n_vectors: int = 0,
+              nlist: int = None, hnsw_m: int = 32, ef_construction: int = 200,
+              pq_m: int = None, pq_bits: int = 8):
+    """Create an empty (possibly untrained) FAISS index of the given type."""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}, expected one of {INDEX_TYPES}")
+    if index_type == "flat_l2":
+        return faiss.IndexFlatL2(dimension)
+    if index_type == "flat_ip":
+        return faiss.IndexFlatIP(dimension)
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = ef_construction
+        return index
+
+    nlist = nlist or default_nlist(n_vectors)
+    quantizer = faiss.IndexFlatIP(dimension)
+    if index_type == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+    # ivf_pq: default to 8 dimensions per sub-quantizer (384 -> 48 codes)
+    pq_m = pq_m or max(1, dimension // 8)
+    if dimension % pq_m:
+        raise ValueError(f"pq_m={pq_m} must divide the embedding dimension {dimension}")
+    # Each sub-quantizer needs at least 2**pq_bits training points
+    pq_bits = min(pq_bits, max(1, int(np.log2(max(n_vectors, 2)))))
+    return faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, pq_bits, faiss.METRIC_INNER_PRODUCT)
+
+def train_index(index, embeddings: np.ndarray, train_size: int = None, seed: int = 0):
+    """Train IVF/PQ indexes on a random sample (default: 256 points per IVF cell, at least 10k)."""
+    if index.is_trained:
+        return
+    ivf = faiss.extract_index_ivf(index)
+    wanted = train_size or max(256 * ivf.nlist, 10_000)
+    if len(embeddings) > wanted:
+        sample = embeddings[np.random.default_rng(seed).choice(len(embeddings), wanted, replace=False)]
+    else:
+        sample = embeddings
+    index.train(np.ascontiguousarray(sample))
+
+def prepare_embeddings(embeddings: np.ndarray, index_type: str = DEFAULT_INDEX_TYPE) -> np.ndarray:
+    """float32, contiguous and, except for flat_l2, L2-normalized in place."""
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    if index_type != "flat_l2":
+        faiss.normalize_L2(embeddings)
+    return embeddings
+
+def build_index(embeddings: np.ndarray, index_type: str = DEFAULT_INDEX_TYPE, train_size: int = None, **params):
+    """Normalize, train (if needed) and fill an index of `index_type` with `embeddings`."""
+    embeddings = prepare_embeddings(embeddings, index_type)
+    index = new_index(embeddings.shape[1], index_type, n_vectors=len(embeddings), **params)
+    train_index(index, embeddings, train_size)
+    index.add(embeddings)
+    return index
+
+def create_vector_store(embeddings: np.ndarray, chunks: list, index_path: Path, chunks_path: Path,
+                        index_type: str = DEFAULT_INDEX_TYPE, train_size: int = None, **index_params):
     """
     Create and save a FAISS index with text chunks.
     embeddings: numpy array of shape (num_chunks, embedding_dim)
     chunks: list of structured chunks (dicts)
     index_path: Path to save FAISS index
-    chunks_path: Path to save chunks JSON
+    chunks_path: Path to save chunks JSON (the binary chunk store is written next to it)
+    index_type: one of INDEX_TYPES; index_params are passed to new_index (nlist, hnsw_m, pq_m, ...)
     """
     try:
         # Initialize FAISS index
-        dimension = embeddings.shape[1]
-        index = faiss.IndexFlatL2(dimension)
-        index.add(embeddings)
+        index = build_index(embeddings, index_type, train_size=train_size, **index_params)
 
         # Ensure directories exist
         index_path.parent.mkdir(parents=True, exist_ok=True)
@@ -24,11 +91,18 @@ def create_vector_store(embeddings: np.ndarray, chunks: list, index_path: Path,
         # Save FAISS index
         faiss.write_index(index, str(index_path))
 
-        # Save chunks as JSON
+        # Save chunks as JSON, plus the binary store the query path reads
         with open(chunks_path, 'w', encoding='utf-8') as f:
             json.dump(chunks, f, indent=2, ensure_ascii=False)
+        write_chunk_store(chunks, store_path_for(chunks_path))
+
+        # Save the BM25 keyword index next to the FAISS index
+        build_keyword_index(chunks, index_path)
+
+        # Per-chunk prompt token counts, so queries don't re-tokenize the context
+        build_token_counts(chunks, index_path)
 
-        print(f"FAISS index saved to {index_path}")
+        print(f"FAISS index ({index_type}) saved to {index_path}")
         print(f"Chunks saved to {chunks_path}")
 
     except Exception as e:
@@ -36,22 +110,41 @@ def create_vector_store(embeddings: np.ndarray, chunks: list, index_path: Path,
 
 
 if __name__ == "__main__":
+    import argparse
     from src.pdf_processing.extract_text import extract_pdf_text
-    from src.pdf_processing.chunk_text import chunk_text
+    from src.pdf_processing.chunk_text import chunk_text, token_budget
+    from src.rag_pipeline.embedding_service import EMBEDDING_MODEL_NAME, max_seq_length
     from src.rag_pipeline.embeddings import generate_embeddings
+    from src.rag_pipeline.query_engine import CHUNKS_PATH, INDEX_PATH
+
+    parser = argparse.ArgumentParser(description="Build the FAISS knowledge base from the policy PDF")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only re-extract/re-embed pages and sections changed since the last build")
+    parser.add_argument("--workers", type=int, default=1, help="processes for page-parallel PDF extraction")
+    parser.add_argument("--embed-workers", type=int, default=1, help="processes for embedding generation")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default=DEFAULT_INDEX_TYPE)
+    parser.add_argument("--nlist", type=int, default=None, help="IVF cells (default ~4*sqrt(n))")
+    parser.add_argument("--hnsw-m", type=int, default=32, help="HNSW neighbours per node")
+    parser.add_argument("--pq-m", type=int, default=None, help="PQ sub-quantizers (must divide the dimension)")
+    args = parser.parse_args()
 
     pdf_path = Path("data/input/information_security_policy_v4.0.pdf")
-    index_path = Path("data/knowledge_base/index.faiss")
-    chunks_path = Path("data/knowledge_base/chunks.json")
-
-    # Extract PDF text
-    text = extract_pdf_text(pdf_path)
-    if text:
-        # Chunk text into structured sections
-        chunks = chunk_text(text, max_words=500)
-
-        # Generate embeddings for each chunk
-        embeddings = generate_embeddings(chunks)
-        if embeddings is not None:
-            # Create FAISS index + save chunks
-            create_vector_store(embeddings, chunks, index_path, chunks_path)
+    # The files the query path reads, for both kinds of build
+    index_path, chunks_path = Path(INDEX_PATH), Path(CHUNKS_PATH)
+
+    if args.incremental:
+        from src.rag_pipeline.incremental_ingest import incremental_update
+        incremental_update(pdf_path, index_path, chunks_path, index_type=args.index_type)
+    else:
+        # Extract PDF text
+        text = extract_pdf_text(pdf_path, workers=args.workers)
+        if text:
+            # Chunk text into structured sections
+            chunks = chunk_text(text, max_words=500, **token_budget(EMBEDDING_MODEL_NAME, max_seq_length()))
+
+            # Generate embeddings for each chunk
+            embeddings = generate_embeddings(chunks, workers=args.embed_workers)
+            if embeddings is not None:
+                # Create FAISS index + save chunks
+                create_vector_store(embeddings, chunks, index_path, chunks_path, index_type=args.index_type,
+                                    nlist=args.nlist, hnsw_m=args.hnsw_m, pq_m=args.pq_m)
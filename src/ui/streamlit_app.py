@@ -1,5 +1,8 @@
 import sys
 import os
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # ✅ Ensure project root is in sys.path so "src" can be imported
@@ -8,28 +11,117 @@ if ROOT_DIR not in sys.path:
     sys.path.append(ROOT_DIR)
 
 import streamlit as st
-from src.rag_pipeline.query_engine import query_knowledge_base
+from src.rag_pipeline import query_engine
+from src.rag_pipeline.query_engine import stream_query_knowledge_base
+
+logger = logging.getLogger(__name__)
+
+# Queries answered at the same time, across all sessions of this server process
+QUERY_WORKERS = int(os.getenv("RAG_UI_WORKERS", "8"))
+REPORT_PATH = Path("data/output/compliance_report.md")
+
+
+# ------------------- Shared resources -------------------
+# st.cache_resource objects are created once per server process and shared by
+# every session, so concurrent users reuse one set of models and indexes.
+@st.cache_resource(show_spinner="Loading models and indexes...")
+def load_pipeline() -> bool:
+    # Not cached if it raises, so a knowledge base built later is picked up on the next rerun
+    query_engine.warm_up()
+    return True
+
+
+@st.cache_resource
+def query_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix="ui-query")
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_report(path: str, mtime_ns: int) -> str:
+    # The mtime is part of the cache key: a regenerated report is read once, then served from memory
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def run_query(query: str) -> queue.Queue:
+    """Answer `query` on the shared executor; its stream events arrive on the returned queue, then None."""
+    events = queue.Queue()
+
+    def produce():
+        try:
+            for event in stream_query_knowledge_base(query):
+                events.put(event)
+        except Exception as e:
+            logger.error(f"Error processing query: {e}")
+            events.put({"type": "error", "error": str(e)})
+        finally:
+            events.put(None)
+
+    query_executor().submit(produce)
+    return events
+
 
 # ------------------- Streamlit UI -------------------
 st.set_page_config(page_title="Compliance Chatbot", page_icon="🔒")
 st.title("🔒 Compliance Chatbot")
 st.write("Query the Information Security Policy for **PCI-DSS** and **ISO 27001** compliance.")
 
+try:
+    load_pipeline()
+except Exception as e:
+    logger.error(f"Error loading the knowledge base: {e}")
+    st.warning("⚠️ Knowledge base not loaded. Build it with `vector_store.py`, then reload the page.")
+
 # Initialize session state for query history
 if "query_history" not in st.session_state:
     st.session_state.query_history = []
 
+# Optional per-query latency breakdown (retrieval, encoder, FAISS, LLM, ...)
+show_timings = st.sidebar.checkbox("Show stage timings", value=False)
+
 # Query input box
 query = st.text_input("Enter your query:", placeholder="e.g., What are the access control policies?")
 
 # Submit button
 if st.button("Submit Query", disabled=not query):
     if query:
-        response = query_knowledge_base(query)
+        st.write("### Response:")
+        status = st.status("Searching the policy...")
+        sources = st.empty()
+        done = {}
+
+        def answer_tokens():
+            # The query runs in the background; show the retrieved sections as soon as
+            # retrieval is done, then stream the answer as it arrives
+            events = run_query(query)
+            while (event := events.get()) is not None:
+                if event["type"] == "sections":
+                    if event["sections"]:
+                        sections = dict.fromkeys(s["section"] for s in event["sections"])
+                        sources.caption(f"📎 Sections: {', '.join(sections)}")
+                    status.update(label="Writing the answer...")
+                elif event["type"] == "token":
+                    yield event["text"]
+                elif event["type"] == "done":
+                    done.update(event)
+                    status.update(label=f"Answered in {event['total_ms'] / 1000:.1f} s", state="complete")
+                elif event["type"] == "error":
+                    status.update(label="Query failed", state="error")
+                    yield "[ERROR] Error processing query. Please try again."
+
+        response = st.write_stream(answer_tokens())
+        if show_timings and done:
+            total_ms = done["total_ms"]
+            stages = done.get("stages", {})
+            rows = [f"| {name} | {ms:.1f} | {ms / total_ms:.0%} |" for name, ms in stages.items()]
+            other_ms = max(total_ms - sum(stages.values()), 0.0)
+            prompt = f", {done['prompt_tokens']} prompt tokens" if done.get("prompt_tokens") else ""
+            with st.expander(f"⏱️ Stage timings: {total_ms:.0f} ms total, "
+                             f"first token after {done['ttft_ms']:.0f} ms{prompt}"):
+                st.markdown("\n".join(["| Stage | ms | Share |", "|---|---:|---:|", *rows,
+                                         f"| other | {other_ms:.1f} | {other_ms / total_ms:.0%} |"]))
         st.session_state.query_history.append({"query": query, "response": response})
         st.success("✅ Query processed!")
-        st.write("### Response:")
-        st.write(response)
     else:
         st.error("⚠️ Please enter a query.")
 
@@ -41,12 +133,17 @@ if st.session_state.query_history:
             st.write(f"**Response:** {item['response']}")
 
 # Show compliance report if available
-# Fixed code (correct path)
-report_path = Path("data/output/compliance_report.md")
-if report_path.exists():
-    with open(report_path, 'r', encoding='utf-8') as f:
-        report_content = f.read()
-    with st.expander("📑 Compliance Gap Analysis Report", expanded=False):
-        st.markdown(report_content)
-else:
-    st.warning("⚠️ Compliance report not found. Run `report_generator.py` to generate it.")
+@st.fragment
+def report_section():
+    """
+    The report is only sent to the browser while the toggle is on, so chat
+    turns don't re-send it, and flipping the toggle reruns just this fragment.
+    """
+    if not REPORT_PATH.exists():
+        st.warning("⚠️ Compliance report not found. Run `report_generator.py` to generate it.")
+        return
+    if st.toggle("📑 Show Compliance Gap Analysis Report", key="show_report"):
+        st.markdown(load_report(str(REPORT_PATH), REPORT_PATH.stat().st_mtime_ns))
+
+
+report_section()
@@ -0,0 +1,69 @@
+# tests/conftest.py
+#
+# Shared fixtures. Every test runs in an empty temporary project directory
+# (so the embedding cache, indexes and reports never touch data/) with the
+# offline stub encoder and stub LLM from benchmarks/, so no model is
+# downloaded and results are deterministic.
+#
+# Run from the project root:
+#   python -m pytest tests
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("HF_HUB_OFFLINE", "1")  # tokenizers fall back to estimates instead of retrying the hub
+
+from benchmarks.stub_encoder import install_stub_encoder  # noqa: E402
+from benchmarks.stub_llm import StubChatModel  # noqa: E402
+from src.pdf_processing.chunk_text import chunk_text  # noqa: E402
+from src.rag_pipeline import query_engine  # noqa: E402
+from src.rag_pipeline.embeddings import generate_embeddings  # noqa: E402
+from src.rag_pipeline.vector_store import create_vector_store  # noqa: E402
+
+POLICY_TEXT = """1 Introduction
+This policy sets the information security requirements for all staff and systems.
+4.2 Access Control
+Access to systems is granted on a least privilege basis and reviewed every quarter by the system owner.
+4.5 Password Management
+Passwords must be at least twelve characters long, changed every ninety days and never shared.
+4.9 Backup
+Backups of critical data are performed daily, encrypted and tested for restoration every month.
+4.12 Encryption
+Data at rest and in transit is encrypted with approved algorithms and keys are rotated yearly.
+4.20 Incident Management
+Security incidents are reported to the security team within one hour and reviewed after closure.
+"""
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """An empty project directory with the compliance mapping, as the working directory."""
+    mappings = tmp_path / "data" / "mappings"
+    mappings.mkdir(parents=True)
+    shutil.copy(ROOT / "data" / "mappings" / "compliance_mapping.json", mappings)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(autouse=True, scope="session")
+def stub_models():
+    encoder = install_stub_encoder()
+    query_engine.set_llm(StubChatModel())
+    query_engine.set_answer_cache(None)
+    return encoder
+
+
+@pytest.fixture
+def knowledge_base(workdir):
+    """A FAISS index and chunks built from POLICY_TEXT: (index_path, chunks_path)."""
+    index_path = workdir / "data" / "knowledge_base" / "index.faiss"
+    chunks_path = workdir / "data" / "knowledge_base" / "chunks_structured.json"
+    chunks = chunk_text(POLICY_TEXT)
+    create_vector_store(generate_embeddings(chunks), chunks, index_path, chunks_path)
+    return index_path, chunks_path
@@ -0,0 +1,67 @@
+# tests/test_answer_cache.py
+
+import json
+import os
+
+import pytest
+
+from src.rag_pipeline import query_engine
+from src.rag_pipeline.answer_cache import AnswerCache
+
+
+def touch(path, content: str):
+    path.write_text(content, encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))  # coarse mtime clocks
+
+
+@pytest.fixture
+def answer_cache(workdir):
+    cache = AnswerCache(watch_paths=(query_engine.MAPPING_PATH,), db_path=workdir / "answers.db")
+    query_engine.set_answer_cache(cache)
+    yield cache
+    query_engine.set_answer_cache(None)
+
+
+def test_entries_follow_their_own_sources(workdir):
+    a, b = workdir / "a.faiss", workdir / "b.faiss"
+    touch(a, "a")
+    touch(b, "b")
+    cache = AnswerCache(db_path=workdir / "answers.db")
+    cache.put("qa", "answer from a", (a,))
+    cache.put("qb", "answer from b", (b,))
+
+    touch(a, "a rebuilt")
+    assert cache.get("qa", (a,)) is None
+    assert cache.get("qb", (b,)) == "answer from b"
+    assert cache.stats()["invalidations"] == 1
+    # The SQLite tier checks the same generation after a restart
+    restarted = AnswerCache(db_path=workdir / "answers.db")
+    assert restarted.get("qa", (a,)) is None and restarted.get("qb", (b,)) == "answer from b"
+
+
+def test_rebuilt_knowledge_base_invalidates_its_answers(knowledge_base, answer_cache):
+    index_path, chunks_path = knowledge_base
+    query = "How are passwords managed?"
+    query_engine.query_knowledge_base(query, index_path, chunks_path)
+    query_engine.query_knowledge_base(query, index_path, chunks_path)
+    assert answer_cache.stats()["hits"] == 1
+
+    chunks = json.loads(chunks_path.read_text(encoding="utf-8"))
+    touch(chunks_path, json.dumps(chunks, indent=1))
+    query_engine.query_knowledge_base(query, index_path, chunks_path)
+    assert answer_cache.stats()["hits"] == 1 and answer_cache.stats()["invalidations"] == 1
+
+
+def test_mapping_change_reloads_the_mapping(workdir):
+    path = workdir / query_engine.MAPPING_PATH
+    mapping = json.loads(path.read_text(encoding="utf-8"))
+    assert "quantum vault" not in json.dumps(query_engine.get_compliance_mapping())
+    index = query_engine.get_mapping_index()
+    assert query_engine.get_mapping_index() is index
+
+    mapping["quantum vault"] = {"fallback": "Quantum vaults are out of scope."}
+    touch(path, json.dumps(mapping))
+    assert "quantum vault" in query_engine.get_compliance_mapping()
+    assert query_engine.get_mapping_index() is not index
+    assert "out of scope" in query_engine.answer_query("What about the quantum vault?", [])
@@ -0,0 +1,32 @@
+# tests/test_chunk_store.py
+
+import pytest
+
+from src.rag_pipeline.chunk_store import ChunkRecord, ChunkStore, write_chunk_store
+
+CHUNKS = [
+    {"id": 7, "section": "4.5", "title": "Password Management", "text": "Passwords are rotated.", "doc_id": "isp"},
+    {"id": 3, "section": "4.9", "title": "Backup", "text": "Backups run daily."},
+]
+
+
+@pytest.fixture
+def store(workdir):
+    store = ChunkStore(write_chunk_store(CHUNKS, workdir / "chunks.bin"))
+    yield store
+    store.close()
+
+
+def test_records_equal_the_dicts_they_replace(store):
+    record = store.get(7)
+    assert isinstance(record, ChunkRecord)
+    assert record == CHUNKS[0] and record.to_dict() == CHUNKS[0] and {**record} == CHUNKS[0]
+    assert record != CHUNKS[1] and record != store.get(3)
+    assert store.get(3) == CHUNKS[1] and record.get("doc_id") == "isp"
+
+
+def test_records_are_unhashable_like_dicts(store):
+    with pytest.raises(TypeError):
+        hash(store.get(7))
+    with pytest.raises(TypeError):
+        {store.get(7)}
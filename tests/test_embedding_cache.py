@@ -0,0 +1,83 @@
+# tests/test_embedding_cache.py
+
+import multiprocessing
+
+import numpy as np
+
+from benchmarks.stub_encoder import StubEncoder
+from src.rag_pipeline.embedding_cache import EmbeddingCache, QueryEmbeddingCache
+from src.rag_pipeline.embedding_service import EMBEDDING_MODEL_NAME, cache_name, default_backend, encode_normalized
+
+ENCODER = StubEncoder()
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts.extend(texts)
+        return ENCODER.encode(texts)
+
+
+def test_encodes_only_unseen_texts(workdir):
+    cache, encode_fn = EmbeddingCache("stub", workdir), CountingEncoder()
+    first = cache.encode(["access control", "password policy"], encode_fn)
+    second = cache.encode(["password policy", "backup", "access control"], encode_fn)
+    assert encode_fn.texts == ["access control", "password policy", "backup"]
+    assert np.array_equal(second[[2, 0]], first)
+    assert np.array_equal(second[1], ENCODER.encode("backup"))
+    assert cache.stats()["hits"] == 2
+
+
+def test_instances_share_one_store(workdir):
+    a, b = EmbeddingCache("stub", workdir), EmbeddingCache("stub", workdir)
+    a.encode(["only a"], ENCODER.encode)
+    b.encode(["only b"], ENCODER.encode)
+    a.encode(["only a again"], ENCODER.encode)
+    vectors, found = b.lookup(["only a", "only b", "only a again"])
+    assert found.all()
+    assert np.array_equal(vectors, ENCODER.encode(["only a", "only b", "only a again"]))
+    assert len(EmbeddingCache("stub", workdir)) == 3
+
+
+def _fill(cache_dir, worker):
+    cache = EmbeddingCache("stub", cache_dir)
+    for batch in range(5):
+        # Some texts are shared between workers, most are not
+        cache.encode([f"shared {batch}"] + [f"worker {worker} text {batch} {i}" for i in range(10)], ENCODER.encode)
+
+
+def test_processes_append_without_clobbering(workdir):
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_fill, args=(str(workdir), w)) for w in range(3)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(60)
+        assert process.exitcode == 0
+
+    cache = EmbeddingCache("stub", workdir)
+    texts = [f"shared {b}" for b in range(5)] + [f"worker {w} text {b} {i}"
+                                                 for w in range(3) for b in range(5) for i in range(10)]
+    vectors, found = cache.lookup(texts)
+    assert found.all() and len(cache) == len(texts)
+    assert np.array_equal(vectors, ENCODER.encode(texts))
+
+
+def test_queries_are_not_persisted(workdir):
+    encode_normalized(["a one-off user question"], persist=False)
+    encode_normalized(["a corpus chunk"])
+    cache = EmbeddingCache(f"{cache_name(EMBEDDING_MODEL_NAME, default_backend())}-normalized")
+    assert cache.lookup(["a one-off user question", "a corpus chunk"])[1].tolist() == [False, True]
+
+
+def test_query_cache_is_bounded():
+    cache, encode_fn = QueryEmbeddingCache(max_entries=2), CountingEncoder()
+    cache.encode(["a", "b"], encode_fn)
+    cache.encode(["a"], encode_fn)  # "a" is now the most recently used
+    cache.encode(["c"], encode_fn)  # evicts "b"
+    cache.encode(["a", "b"], encode_fn)
+    assert encode_fn.texts == ["a", "b", "c", "b"]
+    assert len(cache) == 2
+
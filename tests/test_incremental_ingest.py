@@ -0,0 +1,106 @@
+# tests/test_incremental_ingest.py
+
+import hashlib
+import json
+
+import faiss  # type: ignore
+import pytest
+
+from src.rag_pipeline import incremental_ingest
+from src.rag_pipeline.incremental_ingest import incremental_update, manifest_path_for
+from src.rag_pipeline.vector_store import prepare_embeddings
+
+PAGES = [
+    "1 Introduction\nThis policy sets the information security requirements for all staff.",
+    "4.5 Password Management\nPasswords must be at least twelve characters long and never shared.",
+    "4.9 Backup\nBackups of critical data are performed daily and tested every month.",
+]
+
+
+@pytest.fixture
+def pdf(monkeypatch):
+    """A stand-in PDF: edit `pages` between updates; returns (pages, extracted page numbers per call)."""
+    pages, extracted = list(PAGES), []
+
+    def extract(pdf_path, numbers):
+        extracted.append(list(numbers))
+        return {n: pages[n] for n in numbers}
+
+    monkeypatch.setattr(incremental_ingest, "page_fingerprints",
+                        lambda pdf_path: [hashlib.sha1(p.encode("utf-8")).hexdigest() for p in pages])
+    monkeypatch.setattr(incremental_ingest, "extract_pdf_pages", extract)
+    return pages, extracted
+
+
+@pytest.fixture
+def paths(workdir):
+    return workdir / "policy.pdf", workdir / "kb" / "index.faiss", workdir / "kb" / "chunks_structured.json"
+
+
+def load(index_path, chunks_path):
+    with open(chunks_path, 'r', encoding='utf-8') as f:
+        return faiss.read_index(str(index_path)), {c["section"]: c for c in json.load(f)}
+
+
+def test_full_build_then_noop(pdf, paths):
+    first = incremental_update(*paths)
+    assert first["full_build"] and first["chunks_embedded"] == first["chunks_total"] == 3
+
+    second = incremental_update(*paths)
+    assert not second["full_build"]
+    assert (second["pages_extracted"], second["chunks_embedded"], second["chunks_removed"]) == (0, 0, 0)
+    assert pdf[1] == [[0, 1, 2], []]
+
+
+def test_edit_reembeds_only_the_changed_section(pdf, paths):
+    pages, extracted = pdf
+    incremental_update(*paths)
+    _, before = load(*paths[1:])
+
+    pages[1] = pages[1].replace("twelve", "fourteen")
+    stats = incremental_update(*paths)
+    index, after = load(*paths[1:])
+
+    assert extracted[-1] == [1]
+    assert (stats["chunks_embedded"], stats["chunks_removed"], stats["chunks_total"]) == (1, 1, 3)
+    assert after["1"]["id"] == before["1"]["id"] and after["4.9"]["id"] == before["4.9"]["id"]
+    assert after["4.5"]["id"] != before["4.5"]["id"] and "fourteen" in after["4.5"]["text"]
+    assert index.ntotal == 3
+    assert sorted(faiss.vector_to_array(index.id_map)) == sorted(c["id"] for c in after.values())
+
+
+def test_no_chunks_leaves_the_knowledge_base_alone(pdf, paths):
+    pages, _ = pdf
+    pages[:] = ["", ""]
+    with pytest.raises(ValueError, match="No chunks"):
+        incremental_update(*paths)
+    assert not paths[1].exists() and not manifest_path_for(paths[1]).exists()
+
+    pages[:] = PAGES
+    incremental_update(*paths)
+    manifest = manifest_path_for(paths[1]).read_bytes()
+    pages[:] = [""]
+    with pytest.raises(ValueError):
+        incremental_update(*paths)
+    assert manifest_path_for(paths[1]).read_bytes() == manifest
+    assert load(*paths[1:])[0].ntotal == 3
+
+
+def test_rejects_index_types_without_removal(paths):
+    with pytest.raises(ValueError, match="incremental"):
+        incremental_update(*paths, index_type="hnsw")
+
+
+@pytest.mark.parametrize("index_type", ["flat_ip", "ivf_flat"])
+def test_ids_still_match_vectors_after_an_edit(pdf, paths, index_type, stub_models):
+    pages, _ = pdf
+    pages[:] = [f"4.{n} Control\nThe policy requires ctl{n}a ctl{n}b ctl{n}c ctl{n}d reviews." for n in range(1, 41)]
+    incremental_update(*paths, index_type=index_type)
+    pages[2] = pages[2].replace("requires", "mandates")
+    incremental_update(*paths, index_type=index_type)
+
+    index, chunks = load(*paths[1:])
+    records = list(chunks.values())
+    vectors = prepare_embeddings(stub_models.encode([c["text"] for c in records]), index_type)
+    _, ids = index.search(vectors, 1)
+    assert ids[:, 0].tolist() == [c["id"] for c in records]
@@ -0,0 +1,105 @@
+# tests/test_server.py
+
+import json
+import time
+
+import pytest
+from starlette.testclient import TestClient
+
+from benchmarks.stub_llm import StubChatModel
+from src.api import server
+from src.api.server import create_app
+from src.rag_pipeline import query_engine
+
+
+@pytest.fixture
+def client(knowledge_base):
+    with TestClient(create_app(*knowledge_base)) as client:
+        yield client
+
+
+@pytest.fixture
+def slow_llm():
+    query_engine.set_llm(StubChatModel(latency=1.0))
+    yield
+    query_engine.set_llm(StubChatModel())
+
+
+def test_query(client):
+    response = client.post("/query", json={"query": "How are passwords managed?"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["answer"] and body["sections"]
+    assert {"retrieval", "llm"} <= set(body["stages"])
+    assert client.post("/query", json={"query": "backups", "full_scan": True}).status_code == 200
+
+
+@pytest.mark.parametrize("kwargs", [{"json": {}}, {"json": {"query": "  "}}, {"json": {"query": 3}},
+                                    {"json": ["query"]}, {"content": b"not json"}, {"content": b""}])
+def test_bad_query_bodies(client, kwargs):
+    assert client.post("/query", **kwargs).status_code == 400
+    assert client.post("/stream", **kwargs).status_code == 400
+
+
+def test_stream(client):
+    response = client.post("/stream", json={"query": "How is data encrypted?"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0]["type"] == "sections"
+    assert any(e["type"] == "token" for e in events)
+    assert events[-1]["type"] == "done" and "stages" in events[-1]
+
+
+def test_report(client):
+    response = client.post("/report", json={"mode": "evidence"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/markdown")
+    assert "Password" in response.text
+    assert client.post("/report").status_code == 200  # empty body: defaults
+
+
+@pytest.mark.parametrize("kwargs", [{"json": {"mode": "nope"}}, {"json": {"mode": 1}}, {"json": []},
+                                    {"json": "evidence"}, {"content": b"{"}])
+def test_bad_report_bodies(client, kwargs):
+    assert client.post("/report", **kwargs).status_code == 400
+
+
+def test_timed_out_report_keeps_the_lock(client, monkeypatch):
+    running, overlaps = [], []
+
+    def render(**kwargs):
+        running.append(1)
+        overlaps.append(len(running))
+        time.sleep(0.5)
+        running.pop()
+        return "# Report"
+
+    monkeypatch.setattr(server, "_render_report", render)
+    monkeypatch.setattr(server, "REPORT_TIMEOUT", 0.1)
+    assert client.post("/report").status_code == 504
+    monkeypatch.setattr(server, "REPORT_TIMEOUT", 5.0)
+    assert client.post("/report").text == "# Report"
+    assert overlaps == [1, 1]
+
+
+def test_timeouts(knowledge_base, slow_llm):
+    with TestClient(create_app(*knowledge_base, timeout=0.3)) as client:
+        assert client.post("/query", json={"query": "slow"}).status_code == 504
+        last = client.post("/stream", json={"query": "slow stream"}).text.splitlines()[-1]
+        assert json.loads(last) == {"type": "error", "error": "timed out"}
+        assert client.get("/health").json()["timed_out"] == 2
+
+
+def test_overload(knowledge_base):
+    with TestClient(create_app(*knowledge_base, max_in_flight=0)) as client:
+        response = client.post("/query", json={"query": "anything"})
+        assert response.status_code == 503 and response.headers["retry-after"]
+
+
+def test_health_and_metrics(client):
+    client.post("/query", json={"query": "Who reviews access?"})
+    health = client.get("/health").json()
+    assert health["status"] == "ok" and health["in_flight"] == 0
+    metrics = client.get("/metrics")
+    assert metrics.headers["content-type"].startswith("text/plain")
+    assert 'rag_stage_duration_seconds_count{stage="llm"}' in metrics.text